@@ -1,5 +1,7 @@
 """bufr treatment."""
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timezone
 from math import exp
 
 import numpy as np
@@ -18,9 +20,8 @@ except Exception:
     eccodes = None
 
 
-from .datetime_utils import as_datetime_args
 from .obs import ObservationSet
-from .observation import Observation
+from .observation import PositionIndex
 
 
 class BufrObservationSet(ObservationSet):
@@ -37,6 +38,7 @@ class BufrObservationSet(ObservationSet):
         label="bufr",
         use_first=False,
         sigmao=None,
+        workers=None,
     ):
         """Initialize a bufr observation set.
 
@@ -50,6 +52,7 @@ class BufrObservationSet(ObservationSet):
             label (str): A label for the resulting observations set
             use_first (bool): Use only the first valid observation for a point if more are found
             sigmao (float, optional): Observation error relative to normal background error. Defaults to None.
+            workers (int, optional): Decode the messages in this many processes. Defaults to None.
 
         Raises:
             RuntimeError: ECCODES not found. Needed for bufr reading
@@ -65,12 +68,6 @@ class BufrObservationSet(ObservationSet):
             raise RuntimeError("ECCODES not found. Needed for bufr reading")
         logging.debug(eccodes.__file__)
 
-        # open bufr file
-        file_handler = open(bufrfile, mode="rb")
-        number_of_bytes = file_handler.seek(0, 2)
-        logging.info("File size: %s", number_of_bytes)
-        file_handler.seek(0)
-
         # define the keys to be printed
         keys = [
             "latitude",
@@ -87,7 +84,6 @@ class BufrObservationSet(ObservationSet):
             "stationNumber",
             "blockNumber",
         ]
-        processed_threshold = 0
         nerror = {}
         ntime = {}
         nundef = {}
@@ -137,13 +133,245 @@ class BufrObservationSet(ObservationSet):
 
         logging.info("Reading %s", bufrfile)
         logging.info("Looking for keys: %s", str(keys))
-        cnt = 0
-        observations = list()
+        decode_keys = [key for key in dict.fromkeys(keys) if key in self.key_columns]
+        if workers is not None and workers > 1:
+            message_columns, not_decoded = self.decode_parallel(
+                bufrfile, decode_keys, workers
+            )
+        else:
+            message_columns, not_decoded = self.decode_messages(bufrfile, decode_keys)
+        cnt = len(message_columns)
+        nsubsets = sum(message_size for message_size, __ in message_columns)
+
+        # Join the messages. Use the default value if a key was not found.
+        columns = {}
+        for name, default in self.columns.items():
+            values = [np.full(0, default, dtype=type(default))]
+            for message_size, message in message_columns:
+                if name in message:
+                    values.append(message[name])
+                else:
+                    values.append(np.full(message_size, default, dtype=type(default)))
+            columns.update({name: np.concatenate(values)})
+        lat = columns["lat"]
+        lon = columns["lon"]
+        elev = columns["elev"]
+
+        # Use local position if position is not set
+        lat = np.where(np.isnan(lat), columns["local_lat"], lat)
+        lon = np.where(np.isnan(lon), columns["local_lon"], lon)
+        got_pos = ~np.isnan(lat) & ~np.isnan(lon)
+
+        # Times and the check on position in space and time
+        obs_dtgs, valid_dtg_values = self.observation_times(
+            columns["year"],
+            columns["month"],
+            columns["day"],
+            columns["hour"],
+            columns["minute"],
+        )
+        bad_times = got_pos & ~valid_dtg_values
+        if np.any(bad_times):
+            logging.warning(
+                "Bad observation times for %s reports. First one at lon=%s, lat=%s",
+                np.count_nonzero(bad_times),
+                lon[bad_times][0],
+                lat[bad_times][0],
+            )
+        inside_domain = got_pos & (
+            (latrange[0] <= lat)
+            & (lat <= latrange[1])
+            & (lonrange[0] <= lon)
+            & (lon <= lonrange[1])
+        )
+        inside_window = valid_dtg_values & self.inside_window_array(
+            obs_dtgs, valid_dtg, valid_range
+        )
+        all_keys = (
+            got_pos
+            & (columns["year"] != -1)
+            & (columns["month"] != -1)
+            & (columns["day"] != -1)
+            & (columns["hour"] != -1)
+            & (columns["minute"] != -1)
+            & ~np.isnan(elev)
+        )
+
+        valid = np.zeros((lat.size, len(variables)), dtype=bool)
+        values = np.full((lat.size, len(variables)), np.nan)
+        for ivar, var in enumerate(variables):
+            value = np.full(lat.size, np.nan)
+            if np.any(got_pos):
+                value = self.get_values(var, columns)
+            defined = inside_domain & ~np.isnan(value) & valid_dtg_values
+            valid[:, ivar] = defined & inside_window
+            values[:, ivar] = value
+            nerror.update(
+                {var: int(np.count_nonzero(got_pos & ~(all_keys & ~np.isnan(value))))}
+            )
+            ndomain.update({var: int(np.count_nonzero(got_pos & ~inside_domain))})
+            nundef.update({var: int(np.count_nonzero(inside_domain & ~defined))})
+            ntime.update({var: int(np.count_nonzero(defined & ~inside_window))})
+
+        # Create the observation columns in the order they were found in the file
+        stids = self.station_ids(
+            columns["block_number"], columns["station_number"], columns["site_name"]
+        )
+        rows, ivars = np.nonzero(valid)
+        if use_first:
+            # Keep the first occurence of each position and variable
+            keys = PositionIndex.position_keys(lon[rows], lat[rows])
+            __, first = np.unique(
+                np.column_stack((keys, ivars)), axis=0, return_index=True
+            )
+            keep = np.sort(first)
+            logging.debug("Removed %s duplicated positions", rows.size - keep.size)
+            rows = rows[keep]
+            ivars = ivars[keep]
+        obs_columns = {
+            "obstimes": obs_dtgs[rows],
+            "lons": lon[rows],
+            "lats": lat[rows],
+            "stids": stids[rows],
+            "elevs": elev[rows],
+            "values": values[rows, ivars],
+            "varnames": np.array(list(variables), dtype=object)[ivars],
+        }
+        for ivar, var in enumerate(variables):
+            nobs.update({var: int(np.count_nonzero(ivars == ivar))})
+
+        logging.info("Found %s/%s in %s reports", str(rows.size), str(cnt), str(nsubsets))
+        logging.info("Not decoded: %s", str(not_decoded))
+        for var in variables:
+            logging.info("Observations for var=%s: %s", var, str(nobs[var]))
+            logging.info(
+                "Observations removed because of domain check: %s", str(ndomain[var])
+            )
+            logging.info(
+                "Observations removed because of not being defined/found: %s",
+                str(nundef[var]),
+            )
+            logging.info(
+                "Observations removed because of time window: %s", str(ntime[var])
+            )
+            logging.info(
+                "Messages not containing information on all keys: %s", str(nerror[var])
+            )
+
+        ObservationSet.__init__(self, label=label, sigmao=sigmao, columns=obs_columns)
+
+    # Decoded columns and their value if the key is not found
+    columns = {
+        "lat": np.nan,
+        "local_lat": np.nan,
+        "lon": np.nan,
+        "local_lon": np.nan,
+        "year": -1.0,
+        "month": -1.0,
+        "day": -1.0,
+        "hour": -1.0,
+        "minute": -1.0,
+        "elev": np.nan,
+        "station_number": -1.0,
+        "block_number": -1.0,
+        "site_name": "NA",
+        "t2m": np.nan,
+        "rh2m": np.nan,
+        "td2m": np.nan,
+        "s_d": np.nan,
+        "temp": np.nan,
+        "t_d": np.nan,
+        "c_b": np.nan,
+    }
+
+    # Column for each key. Later keys in the key list override earlier ones.
+    key_columns = {
+        "latitude": "lat",
+        "localLatitude": "local_lat",
+        "longitude": "lon",
+        "localLongitude": "local_lon",
+        "year": "year",
+        "month": "month",
+        "day": "day",
+        "hour": "hour",
+        "minute": "minute",
+        "heightOfStation": "elev",
+        "heightOfStationGroundAboveMeanSeaLevel": "elev",
+        "stationNumber": "station_number",
+        "blockNumber": "block_number",
+        "stationOrSiteName": "site_name",
+        "airTemperatureAt2M": "t2m",
+        "/heightOfSensorAboveLocalGroundOrDeckOfMarinePlatform=2/airTemperature": "temp",
+        "/heightOfSensorAboveLocalGroundOrDeckOfMarinePlatform=1.5/airTemperature": "temp",
+        "/heightOfSensorAboveLocalGroundOrDeckOfMarinePlatform=2/relativeHumidity": "rh2m",
+        "dewpointTemperatureAt2M": "td2m",
+        "/heightOfSensorAboveLocalGroundOrDeckOfMarinePlatform=2"
+        "/dewpointTemperature": "t_d",
+        "/heightOfSensorAboveLocalGroundOrDeckOfMarinePlatform=1.5"
+        "/dewpointTemperature": "t_d",
+        "totalSnowDepth": "s_d",
+        "heightOfBaseOfCloud": "c_b",
+    }
+
+    @staticmethod
+    def message_ranges(bufrfile):
+        """Find the byte range of each message in a bufr file.
+
+        The messages start with BUFR and end with 7777. The total length of the message
+        is found in section 0. If the length is not consistent with the end marker, the
+        next end marker is used.
+
+        Args:
+            bufrfile (str): Full path of the bufr file
+
+        Returns:
+            list: Start and end byte for each message
+
+        """
+        with open(bufrfile, mode="rb") as file_handler:
+            data = file_handler.read()
+
+        ranges = []
+        start = data.find(b"BUFR")
+        while start >= 0:
+            end = start + int.from_bytes(data[start + 4 : start + 7], "big")
+            if data[end - 4 : end] != b"7777":
+                end = data.find(b"7777", start + 8)
+                if end < 0:
+                    logging.warning("Message at byte %s is not terminated", start)
+                    break
+                end = end + 4
+            ranges.append((start, end))
+            start = data.find(b"BUFR", end)
+        return ranges
+
+    @staticmethod
+    def decode_messages(bufrfile, keys, offset=0, nmessages=None):
+        """Decode the keys for the messages in a bufr file.
+
+        Args:
+            bufrfile (str): Full path of the bufr file
+            keys (list): Keys to decode
+            offset (int, optional): Byte where the first message starts. Defaults to 0.
+            nmessages (int, optional): Number of messages to read. Defaults to None
+                                       which means until the end of the file.
+
+        Returns:
+            tuple: The decoded message columns in file order and the number of messages
+                   which could not be decoded
+
+        """
+        # open bufr file
+        file_handler = open(bufrfile, mode="rb")
+        number_of_bytes = file_handler.seek(0, 2)
+        if nmessages is None:
+            logging.info("File size: %s", number_of_bytes)
+        file_handler.seek(offset)
 
-        # loop for the messages in the file
+        processed_threshold = 0
         not_decoded = 0
-        registry = {}
-        while 1:
+        message_columns = []
+        while nmessages is None or len(message_columns) + not_decoded < nmessages:
             # get handle for message
             bufr = eccodes.codes_bufr_new_from_file(file_handler)
             if bufr is None:
@@ -159,325 +387,332 @@ class BufrObservationSet(ObservationSet):
                 logging.error('Error with key="unpack" : %s', err.msg)
                 decoded = False
 
-            # print the values for the selected keys from the message
             if decoded:
-                lat = np.nan
-                local_lat = np.nan
-                lon = np.nan
-                local_lon = np.nan
-                value = np.nan
-                elev = np.nan
-                year = -1
-                month = -1
-                day = -1
-                hour = -1
-                minute = -1
-                stid = "NA"
-                station_number = -1
-                block_number = -1
-                site_name = "NA"
-                t2m = np.nan
-                rh2m = np.nan
-                td2m = np.nan
-                s_d = np.nan
-                temp = np.nan
-                t_d = np.nan
-                c_b = np.nan
-                for key in keys:
+                message_columns.append(BufrObservationSet.decode_message(bufr, keys))
+                if nmessages is None:
                     try:
-                        logging.debug("Decode: %s", key)
-                        val = eccodes.codes_get(bufr, key)
-                        logging.debug("Got: %s=%s", key, val)
-                        if (
-                            val == eccodes.CODES_MISSING_DOUBLE
-                            or val == eccodes.CODES_MISSING_LONG
-                        ):
-                            val = np.nan
-                        if key == "latitude":
-                            lat = val
-                            if lat < -90 or lat > 90:
-                                lat = np.nan
-                        if key == "longitude":
-                            lon = val
-                            if lon < -180 or lon > 180:
-                                lon = np.nan
-                        if key == "localLatitude":
-                            local_lat = val
-                            if local_lat < -90 or local_lat > 90:
-                                local_lat = np.nan
-                        if key == "localLongitude":
-                            local_lon = val
-                            if local_lon < -180 or local_lon > 180:
-                                local_lon = np.nan
-                        if key == "year":
-                            year = val
-                        if key == "month":
-                            month = val
-                        if key == "day":
-                            day = val
-                        if key == "hour":
-                            hour = val
-                        if key == "minute":
-                            minute = val
-                        if key == "heightOfStation":
-                            if not np.isnan(val):
-                                elev = val
-                        if key == "heightOfStationGroundAboveMeanSeaLevel":
-                            if not np.isnan(val):
-                                elev = val
-                        if key == "stationNumber":
-                            station_number = val
-                        if key == "blockNumber":
-                            block_number = val
-                        if key == "stationOrSiteName":
-                            site_name = str(val)
-                        if key == "airTemperatureAt2M":
-                            t2m = val
-                        if (
-                            key
-                            == "/heightOfSensorAboveLocalGroundOrDeckOfMarinePlatform=2"
-                            "/airTemperature"
-                            or key
-                            == "/heightOfSensorAboveLocalGroundOrDeckOfMarinePlatform=1.5"
-                            "/airTemperature"
-                        ):
-                            temp = val
-                        if (
-                            key
-                            == "/heightOfSensorAboveLocalGroundOrDeckOfMarinePlatform=2"
-                            "/relativeHumidity"
-                        ):
-                            rh2m = val
-                        if key == "dewpointTemperatureAt2M":
-                            td2m = val
-                        if (
-                            key
-                            == "/heightOfSensorAboveLocalGroundOrDeckOfMarinePlatform=2"
-                            "/dewpointTemperature"
-                            or key
-                            == "/heightOfSensorAboveLocalGroundOrDeckOfMarinePlatform=1.5"
-                            "/dewpointTemperature"
-                        ):
-                            t_d = val
-                        if key == "totalSnowDepth":
-                            s_d = val
-                        if key == "heightOfBaseOfCloud":
-                            c_b = val
-
-                    except eccodes.CodesInternalError:
-                        logging.debug('Report does not contain key="%s"', key)
-
-                got_pos = True
-                if np.isnan(lat):
-                    if np.isnan(local_lat):
-                        got_pos = False
-                    else:
-                        lat = local_lat
-                if np.isnan(lon):
-                    if np.isnan(local_lon):
-                        got_pos = False
-                    else:
-                        lon = local_lon
-
-                if got_pos:
-                    # Assign value to var
-                    pos = f"{lon:.5f}:{lat:.5f}"
-                    for var in variables:
-                        exists = False
-                        if use_first:
-                            if pos in registry:
-                                if var in registry[pos]:
-                                    exists = registry[pos][var]
-                            else:
-                                registry.update({pos: {}})
-                        if not exists:
-                            logging.debug("Pos does not exist %s %s", pos, var)
-                            if var == "relativeHumidityAt2M":
-                                if (
-                                    not np.isnan(t2m)
-                                    and not np.isnan(td2m)
-                                    and np.isnan(rh2m)
-                                ):
-                                    try:
-                                        value = self.td2rh(td2m, t2m)
-                                        value = value * 0.01
-                                    except Exception:
-                                        logging.debug("Got exception for %s:", var)
-                                        value = np.nan
-                                elif (
-                                    not np.isnan(temp)
-                                    and not np.isnan(t_d)
-                                    and np.isnan(rh2m)
-                                ):
-                                    try:
-                                        value = self.td2rh(t_d, temp)
-                                        value = value * 0.01
-                                    except Exception:
-                                        logging.debug(
-                                            "Got exception for %s",
-                                            var,
-                                        )
-                                        value = np.nan
-                                else:
-                                    value = np.nan
-
-                                if np.isnan(value) and not np.isnan(rh2m):
-                                    value = 0.01 * rh2m
-
-                            elif var == "airTemperatureAt2M":
-                                if np.isnan(t2m):
-                                    if not np.isnan(temp):
-                                        value = temp
-                                else:
-                                    value = t2m
-                            elif var == "totalSnowDepth":
-                                value = s_d
-                            elif var == "heightOfBaseOfCloud":
-                                value = c_b
-                            elif var == "stationOrSiteName":
-                                site_name = site_name
-                            else:
-                                raise NotImplementedError(
-                                    f"Var {var} is not coded! Please do it!"
-                                )
-                        else:
-                            logging.debug("Pos already exists %s %s", pos, var)
-
-                        all_found = True
-                        if np.isnan(lat):
-                            all_found = False
-                        if np.isnan(lon):
-                            all_found = False
-                        if year == -1:
-                            all_found = False
-                        if month == -1:
-                            all_found = False
-                        if day == -1:
-                            all_found = False
-                        if hour == -1:
-                            all_found = False
-                        if minute == -1:
-                            all_found = False
-                        if np.isnan(elev):
-                            all_found = False
-                        if np.isnan(value):
-                            all_found = False
-                        if not all_found:
-                            nerror.update({var: nerror[var] + 1})
-
-                        logging.debug(
-                            "Check on position in space and time %s %s %s %s %s %s",
-                            lon,
-                            lonrange[0],
-                            lonrange[1],
-                            lat,
-                            latrange[0],
-                            latrange[1],
-                        )
-                        if (
-                            latrange[0] <= lat <= latrange[1]
-                            and lonrange[0] <= lon <= lonrange[1]
-                        ):
-                            obs_dtg = None
-                            try:
-                                obs_dtg = as_datetime_args(
-                                    year=year,
-                                    month=month,
-                                    day=day,
-                                    hour=hour,
-                                    minute=minute,
-                                )
-                            except ValueError:
-                                logging.warning(
-                                    "Bad observations time: year=%s month=%s day=%s hour=%s minute=%s Position is lon=%s, lat=%s",
-                                    year,
-                                    month,
-                                    day,
-                                    hour,
-                                    minute,
-                                    lon,
-                                    lat,
-                                )
-                                obs_dtg = None
-                            if not np.isnan(value) and obs_dtg is not None:
-                                if self.inside_window(obs_dtg, valid_dtg, valid_range):
-                                    logging.debug(
-                                        "Valid DTG for station %s %s %s %s %s %s %s %s",
-                                        obs_dtg,
-                                        valid_dtg,
-                                        valid_range,
-                                        lon,
-                                        lat,
-                                        value,
-                                        elev,
-                                        stid,
-                                    )
-                                    if station_number > 0 and block_number > 0:
-                                        stid = str((block_number * 1000) + station_number)
-
-                                    if (
-                                        stid == "NA"
-                                        and site_name != "NA"
-                                        and site_name.isnumeric()
-                                    ):
-                                        stid = site_name
-
-                                    observations.append(
-                                        Observation(
-                                            obs_dtg,
-                                            lon,
-                                            lat,
-                                            value,
-                                            elev=elev,
-                                            stid=stid,
-                                            varname=var,
-                                        )
-                                    )
-                                    if use_first:
-                                        registry[pos].update({var: True})
-                                    nobs.update({var: nobs[var] + 1})
-                                else:
-                                    ntime.update({var: ntime[var] + 1})
-                            else:
-                                nundef.update({var: nundef[var] + 1})
-                        else:
-                            ndomain.update({var: ndomain[var] + 1})
-
-                cnt += 1
-                try:
-                    nbytes = file_handler.tell()
-                except ValueError:
-                    nbytes = number_of_bytes
-
-                processed = int(round(float(nbytes) * 100.0 / float(number_of_bytes)))
-                if processed > processed_threshold and processed % 5 == 0:
-                    processed_threshold = processed
-                    logging.info("Read: %s%%", processed)
+                        nbytes = file_handler.tell()
+                    except ValueError:
+                        nbytes = number_of_bytes
+
+                    processed = int(round(float(nbytes) * 100.0 / float(number_of_bytes)))
+                    if processed > processed_threshold and processed % 5 == 0:
+                        processed_threshold = processed
+                        logging.info("Read: %s%%", processed)
 
             # delete handle
             eccodes.codes_release(bufr)
+        # close the file
+        file_handler.close()
+        return message_columns, not_decoded
 
-        logging.info("Found %s/%s", str(len(observations)), str(cnt))
-        logging.info("Not decoded: %s", str(not_decoded))
-        for var in variables:
-            logging.info("Observations for var=%s: %s", var, str(nobs[var]))
-            logging.info(
-                "Observations removed because of domain check: %s", str(ndomain[var])
-            )
-            logging.info(
-                "Observations removed because of not being defined/found: %s",
-                str(nundef[var]),
+    @staticmethod
+    def decode_parallel(bufrfile, keys, workers):
+        """Decode the messages in a bufr file in parallel processes.
+
+        The file is split in chunks of consecutive messages. The decoded chunks are
+        joined in file order so the result is the same as decoding sequentially.
+
+        Args:
+            bufrfile (str): Full path of the bufr file
+            keys (list): Keys to decode
+            workers (int): Number of processes
+
+        Returns:
+            tuple: The decoded message columns in file order and the number of messages
+                   which could not be decoded
+
+        """
+        ranges = BufrObservationSet.message_ranges(bufrfile)
+        nchunks = max(1, min(len(ranges), workers * 4))
+        chunks = [
+            chunk
+            for chunk in np.array_split(np.arange(len(ranges)), nchunks)
+            if chunk.size > 0
+        ]
+        logging.info(
+            "Decode %s messages in %s chunks with %s workers",
+            len(ranges),
+            len(chunks),
+            workers,
+        )
+
+        message_columns = []
+        not_decoded = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    BufrObservationSet.decode_messages,
+                    bufrfile,
+                    keys,
+                    offset=ranges[chunk[0]][0],
+                    nmessages=chunk.size,
+                )
+                for chunk in chunks
+            ]
+            for future in futures:
+                chunk_columns, chunk_not_decoded = future.result()
+                message_columns = message_columns + chunk_columns
+                not_decoded = not_decoded + chunk_not_decoded
+        return message_columns, not_decoded
+
+    @staticmethod
+    def decode_key(bufr, key, nsubsets):
+        """Decode a key for all subsets in a message.
+
+        Args:
+            bufr (int): Handle of an unpacked message
+            key (str): Key
+            nsubsets (int): Number of subsets in the message
+
+        Returns:
+            np.ndarray: Value for each subset with missing values as nan. None if the
+                        message does not contain the key.
+
+        """
+        try:
+            if key.endswith("stationOrSiteName"):
+                values = np.array(eccodes.codes_get_string_array(bufr, key), dtype=object)
+            else:
+                values = np.asarray(
+                    eccodes.codes_get_double_array(bufr, key), dtype="float64"
+                )
+                values[values == eccodes.CODES_MISSING_DOUBLE] = np.nan
+        except eccodes.CodesInternalError:
+            return None
+
+        if values.size == 0:
+            return BufrObservationSet.missing_values(key, nsubsets)
+        if values.size == nsubsets:
+            return values
+        if values.size == 1 or nsubsets == 1:
+            # Use the first occurence of the key for each subset
+            return np.full(nsubsets, values[0], dtype=values.dtype)
+
+        # Key occurs several times in each subset. Use the first occurence.
+        subset_values = BufrObservationSet.missing_values(key, nsubsets)
+        for subset in range(nsubsets):
+            if key.startswith("/"):
+                subset_key = f"/subsetNumber={subset + 1}{key}"
+            else:
+                subset_key = f"/subsetNumber={subset + 1}/{key}"
+            value = BufrObservationSet.decode_key(bufr, subset_key, 1)
+            if value is not None:
+                subset_values[subset] = value[0]
+        return subset_values
+
+    @staticmethod
+    def missing_values(key, nsubsets):
+        """Get a column with missing values for a key.
+
+        Args:
+            key (str): Key
+            nsubsets (int): Number of subsets in the message
+
+        Returns:
+            np.ndarray: "NA" for the station name and nan for other keys.
+
+        """
+        if key.endswith("stationOrSiteName"):
+            return np.full(nsubsets, "NA", dtype=object)
+        return np.full(nsubsets, np.nan)
+
+    @staticmethod
+    def decode_message(bufr, keys):
+        """Decode the keys for all subsets in an unpacked message.
+
+        Args:
+            bufr (int): Handle of an unpacked message
+            keys (list): Keys to decode
+
+        Returns:
+            tuple: Number of subsets and the decoded column for each found name in
+                   columns
+
+        """
+        nsubsets = int(eccodes.codes_get(bufr, "numberOfSubsets"))
+        columns = {}
+        for key in keys:
+            values = BufrObservationSet.decode_key(bufr, key, nsubsets)
+            if values is None:
+                continue
+            name = BufrObservationSet.key_columns[key]
+            if name in ["lat", "local_lat"]:
+                values[(values < -90) | (values > 90)] = np.nan
+            elif name in ["lon", "local_lon"]:
+                values[(values < -180) | (values > 180)] = np.nan
+            elif name == "elev" and name in columns:
+                values = np.where(np.isnan(values), columns[name], values)
+            columns.update({name: values})
+        return nsubsets, columns
+
+    def get_values(self, var, columns):
+        """Get the observation values for a variable.
+
+        Args:
+            var (str): Variable name
+            columns (dict): Decoded columns
+
+        Returns:
+            np.ndarray: Values
+
+        """
+        if var == "relativeHumidityAt2M":
+            t2m = columns["t2m"]
+            td2m = columns["td2m"]
+            temp = columns["temp"]
+            t_d = columns["t_d"]
+            rh2m = columns["rh2m"]
+            value = np.full(t2m.size, np.nan)
+            from_t2m = ~np.isnan(t2m) & ~np.isnan(td2m) & np.isnan(rh2m)
+            value[from_t2m] = 0.01 * self.td2rh_array(td2m[from_t2m], t2m[from_t2m])
+            from_temp = ~from_t2m & ~np.isnan(temp) & ~np.isnan(t_d) & np.isnan(rh2m)
+            value[from_temp] = 0.01 * self.td2rh_array(t_d[from_temp], temp[from_temp])
+            return np.where(np.isnan(value) & ~np.isnan(rh2m), 0.01 * rh2m, value)
+        elif var == "airTemperatureAt2M":
+            return np.where(np.isnan(columns["t2m"]), columns["temp"], columns["t2m"])
+        elif var == "totalSnowDepth":
+            return columns["s_d"]
+        elif var == "heightOfBaseOfCloud":
+            return columns["c_b"]
+        elif var == "stationOrSiteName":
+            return np.full(columns["site_name"].size, np.nan)
+        else:
+            raise NotImplementedError(f"Var {var} is not coded! Please do it!")
+
+    @staticmethod
+    def station_ids(block_number, station_number, site_name):
+        """Get station IDs from WMO block and station numbers or a numeric site name.
+
+        Args:
+            block_number (np.ndarray): WMO block numbers
+            station_number (np.ndarray): WMO station numbers
+            site_name (np.ndarray): Station or site names
+
+        Returns:
+            np.ndarray: Station ID for each report. "NA" if not known.
+
+        """
+        stids = []
+        for block, station, name in zip(
+            block_number.tolist(), station_number.tolist(), site_name.tolist()
+        ):
+            if station > 0 and block > 0:
+                stids.append(str(int(block * 1000 + station)))
+            elif name != "NA" and name.isnumeric():
+                stids.append(name)
+            else:
+                stids.append("NA")
+        return np.array(stids, dtype=object)
+
+    @staticmethod
+    def observation_times(year, month, day, hour, minute):
+        """Get observation times from the date and time columns.
+
+        Args:
+            year (np.ndarray): Years
+            month (np.ndarray): Months
+            day (np.ndarray): Days
+            hour (np.ndarray): Hours
+            minute (np.ndarray): Minutes
+
+        Returns:
+            tuple: Observation times as np.datetime64 and if the time is valid
+
+        """
+        with np.errstate(invalid="ignore"):
+            valid = (
+                (year >= 1)
+                & (month >= 1)
+                & (month <= 12)
+                & (day >= 1)
+                & (hour >= 0)
+                & (hour <= 23)
+                & (minute >= 0)
+                & (minute <= 59)
             )
-            logging.info(
-                "Observations removed because of time window: %s", str(ntime[var])
+        months = (np.where(valid, year, 1970) - 1970) * 12 + np.where(valid, month, 1) - 1
+        months = months.astype("int64").astype("datetime64[M]")
+        first_day = months.astype("datetime64[D]")
+        days_in_month = ((months + 1).astype("datetime64[D]") - first_day).astype("int64")
+        valid = valid & (day <= days_in_month)
+        obs_dtgs = (
+            first_day.astype("datetime64[m]")
+            + (np.where(valid, day, 1).astype("int64") - 1) * np.timedelta64(1, "D")
+            + np.where(valid, hour, 0).astype("int64") * np.timedelta64(1, "h")
+            + np.where(valid, minute, 0).astype("int64") * np.timedelta64(1, "m")
+        )
+        return obs_dtgs, valid
+
+    @staticmethod
+    def inside_window_array(obs_dtgs, valid_dtg, valid_range):
+        """Check if observation times are inside the window.
+
+        Args:
+            obs_dtgs (np.ndarray): Observation times as np.datetime64
+            valid_dtg (as_datetime): Valid datetime
+            valid_range (as_timedelta): Window
+
+        Returns:
+            np.ndarray: True if inside window
+
+        """
+        if valid_dtg is None:
+            return np.ones(obs_dtgs.size, dtype=bool)
+        valid_dtg = np.datetime64(
+            valid_dtg.astimezone(timezone.utc).replace(tzinfo=None), "s"
+        )
+        valid_range = np.timedelta64(valid_range)
+        return (valid_dtg - valid_range <= obs_dtgs) & (
+            obs_dtgs <= valid_dtg + valid_range
+        )
+
+    @staticmethod
+    def td2rh_array(t_d, temp, kelvin=True):
+        """Convert dew point temperatures to relative humidity.
+
+        Args:
+            t_d (np.ndarray): Dew point temperatures
+            temp (np.ndarray): Temperatures
+            kelvin (bool, optional): Kelvin. Defaults to True.
+
+        Returns:
+            np.ndarray: Relative humidity (percent). Missing if not Kelvin or invalid.
+
+        """
+        t_d = np.asarray(t_d, dtype="float64")
+        temp = np.asarray(temp, dtype="float64")
+        not_kelvin = np.zeros(t_d.size, dtype=bool)
+        if kelvin:
+            not_kelvin = (t_d < 100) | (temp < 100)
+            if np.any(not_kelvin):
+                logging.debug(
+                    "Temperatures are probably not Kelvin for %s values",
+                    np.count_nonzero(not_kelvin),
+                )
+            t_d = t_d - 273.15
+            temp = temp - 273.15
+
+        r_h = 100 * (
+            np.exp((17.625 * t_d) / (243.04 + t_d))
+            / np.exp((17.625 * temp) / (243.04 + temp))
+        )
+        r_h[not_kelvin] = np.nan
+        invalid = (r_h > 110) | (r_h < 1)
+        if np.any(invalid):
+            logging.warning(
+                "Calculated rh outside 1-110%% for %s values. Set them to missing",
+                np.count_nonzero(invalid),
             )
-            logging.info(
-                "Messages not containing information on all keys: %s", str(nerror[var])
+            r_h[invalid] = np.nan
+        truncate = r_h > 100
+        if np.any(truncate):
+            logging.warning(
+                "Calculated rh above 100%% for %s values. Truncate to 100%%",
+                np.count_nonzero(truncate),
             )
-        # close the file
-        file_handler.close()
-
-        ObservationSet.__init__(self, observations, label=label, sigmao=sigmao)
+            r_h[truncate] = 100
+        return r_h
 
     @staticmethod
     def td2rh(t_d, temp, kelvin=True):
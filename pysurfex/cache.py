@@ -1,5 +1,6 @@
 """Cache."""
 import logging
+import threading
 
 from .datetime_utils import as_datetime_args
 
@@ -19,6 +20,9 @@ class Cache:
         self.file_handler = []
         self.interpolators = {}
         self.saved_fields = {}
+        self.first_guess_fields = {}
+        self.obs_operators = {}
+        self.lock = threading.RLock()
 
     @property
     def files(self):
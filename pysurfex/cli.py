@@ -1,8 +1,10 @@
 """Command line interfaces."""
 import json
 import logging
+import multiprocessing
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import toml
@@ -49,6 +51,7 @@ from .cmd_parsing import (
     parse_sentinel_obs,
     parse_set_domain,
 )
+from .columnar import is_columnar_file, write_columns
 from .configuration import (
     ConfigurationFromHarmonieAndConfigFile,
     ConfigurationFromTomlFile,
@@ -57,7 +60,12 @@ from .datetime_utils import as_datetime, as_datetime_args, as_timedelta
 from .file import PGDFile, PREPFile, SURFFile
 from .forcing import modify_forcing, run_time_loop, set_forcing_config
 from .geo import LonLatVal, get_geo_object, set_domain, shape2ign
-from .input_methods import create_obsset_file, get_datasources, set_geo_from_obs_set
+from .input_methods import (
+    create_obsset_file,
+    get_datasources,
+    get_datasources_for_variables,
+    set_geo_from_obs_set,
+)
 from .interpolation import horizontal_oi
 from .namelist import NamelistGenerator
 from .namelist_legacy import BaseNamelist, Namelist
@@ -74,10 +82,11 @@ from .pseudoobs import CryoclimObservationSet, SentinelObservationSet
 from .read import ConvertedInput, Converter
 from .run import BatchJob, Masterodb, PerturbedOffline, SURFEXBinary
 from .titan import (
-    TitanDataSet,
     dataset_from_file,
-    define_quality_control,
     merge_json_qc_data_sets,
+    merge_qc_columns,
+    titan_variable,
+    variable_output_file,
 )
 from .variable import Variable
 
@@ -893,18 +902,60 @@ def run_titan(**kwargs):
     an_time = kwargs["dtg"]
     if isinstance(an_time, str):
         an_time = as_datetime(an_time)
-    var = kwargs["variable"]
+    variables = kwargs["variable"]
+    if isinstance(variables, str):
+        variables = [variables]
+    workers = None
+    if "workers" in kwargs:
+        workers = kwargs["workers"]
 
-    tests = define_quality_control(
-        tests, settings[var], an_time, domain_geo=domain_geo, blacklist=blacklist
-    )
     logging.debug("Settings: %s", settings)
-    datasources = get_datasources(an_time, settings[var]["sets"])
-    data_set = TitanDataSet(var, settings[var], tests, datasources, an_time)
-    data_set.perform_tests()
+    if len(variables) == 1:
+        var = variables[0]
+        datasources = get_datasources(an_time, settings[var]["sets"])
+        titan_variable(
+            var,
+            settings[var],
+            tests,
+            datasources,
+            an_time,
+            domain_geo=domain_geo,
+            blacklist=blacklist,
+            output_file=output_file,
+            indent=indent,
+        )
+        return
 
-    if output_file is not None:
-        data_set.write_output(output_file, indent=indent)
+    # Decode the observations once and run the variables in parallel
+    datasources = get_datasources_for_variables(
+        an_time, {var: settings[var]["sets"] for var in variables}
+    )
+    # Spawn the processes as HDF5 is not fork safe once netCDF files are opened
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = []
+        for var in variables:
+            var_output_file = None
+            if output_file is not None:
+                var_output_file = variable_output_file(output_file, var)
+            futures.append(
+                executor.submit(
+                    titan_variable,
+                    var,
+                    settings[var],
+                    tests,
+                    datasources[var],
+                    an_time,
+                    domain_geo=domain_geo,
+                    blacklist=blacklist,
+                    output_file=var_output_file,
+                    indent=indent,
+                )
+            )
+        for var, future in zip(variables, futures):
+            future.result()
+            logging.info("Quality control done for %s", var)
 
 
 def run_oi2soda(**kwargs):
@@ -1454,8 +1505,14 @@ def cli_merge_qc_data(argv=None):
         )
     logging.info("************ merge_qc_data ******************")
 
-    qc_data = merge_json_qc_data_sets(kwargs.get("validtime"), kwargs.get("filenames"))
-    qc_data.write_output(kwargs.get("output"), indent=kwargs.get("indent"))
+    output = kwargs.get("output")
+    if is_columnar_file(output):
+        write_columns(output, merge_qc_columns(kwargs.get("filenames")))
+    else:
+        qc_data = merge_json_qc_data_sets(
+            kwargs.get("validtime"), kwargs.get("filenames")
+        )
+        qc_data.write_output(output, indent=kwargs.get("indent"))
 
 
 def masterodb(argv=None):
@@ -1829,6 +1886,7 @@ def bufr2json(argv=None):
     indent = kwargs.get("indent")
     lonrange = kwargs.get("lonrange")
     latrange = kwargs.get("latrange")
+    workers = kwargs.get("workers")
 
     create_obsset_file(
         valid_dtg,
@@ -1842,6 +1900,7 @@ def bufr2json(argv=None):
         label=label,
         indent=indent,
         sigmao=sigmao,
+        workers=workers,
     )
 
 
@@ -1882,6 +1941,7 @@ def obs2json(argv=None):
     indent = kwargs.get("indent")
     lonrange = kwargs.get("lonrange")
     latrange = kwargs.get("latrange")
+    workers = kwargs.get("workers")
     if pos_t_range is not None:
         pos_t_range = as_timedelta(seconds=pos_t_range)
     if neg_t_range is not None:
@@ -1904,6 +1964,7 @@ def obs2json(argv=None):
         obtypes=obtypes,
         subtypes=subtypes,
         sigmao=sigmao,
+        workers=workers,
     )
 
 
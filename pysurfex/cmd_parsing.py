@@ -144,6 +144,76 @@ def parse_args_create_forcing(argv):
     parser.add_argument(
         "--single", help="Print single time step twice", action="store_true"
     )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        help="Open input files this many time steps ahead of reading. "
+        "Not used with --parallel process",
+        default=0,
+        required=False,
+    )
+    parser.add_argument(
+        "--parallel",
+        type=str,
+        help="Read the variables of a time step concurrently in threads or processes",
+        default="none",
+        choices=["none", "thread", "process"],
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of workers for parallel reading",
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--chunks",
+        type=int,
+        help="Split the period in time chunks created in parallel processes",
+        default=1,
+        required=False,
+    )
+    parser.add_argument(
+        "--buffer_steps",
+        type=int,
+        help="Number of time steps to buffer before writing netcdf output. "
+        "Defaults to the time length of a chunk for nc4 and 1 otherwise",
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--zlib", help="Compress nc4 output", action="store_true", default=False
+    )
+    parser.add_argument(
+        "--complevel", type=int, help="Compression level", default=4, required=False
+    )
+    parser.add_argument(
+        "--shuffle",
+        help="Use the shuffle filter for nc4 output",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--write_queue",
+        type=int,
+        help="Write time steps in a separate thread. Max time steps waiting in queue",
+        default=0,
+        required=False,
+    )
+    parser.add_argument(
+        "--checkpoint_steps",
+        type=int,
+        help="Save a checkpoint for --resume at least every n time steps written. "
+        "0 disables checkpoints. Defaults to each time chunk (48 steps) or buffer",
+        default=None,
+        required=False,
+    )
+    parser.add_argument(
+        "--resume",
+        help="Resume the forcing from the checkpoint of an interrupted run",
+        action="store_true",
+        default=False,
+    )
     parser.add_argument("--version", action="version", version=__version__)
 
     group_ta = parser.add_argument_group("TA", description="Air temperature [K]")
@@ -430,12 +500,35 @@ def parse_args_modify_forcing(argv):
     parser.add_argument(
         "-t",
         "--time_step",
-        type=str,
-        help="Time step ",
+        type=int,
+        help="First time step to copy from input. Negative values count from the end",
         nargs="?",
         required=False,
         default=-1,
     )
+    parser.add_argument(
+        "-n",
+        "--ntimes",
+        type=int,
+        help="Number of time steps to copy",
+        required=False,
+        default=1,
+    )
+    parser.add_argument(
+        "--output_time_step",
+        type=int,
+        help="First time step to modify in output",
+        required=False,
+        default=0,
+    )
+    parser.add_argument(
+        "--points",
+        type=str,
+        nargs="+",
+        help="Points to modify. Indices or start:stop ranges",
+        required=False,
+        default=None,
+    )
     parser.add_argument(
         "-o",
         "--output_file",
@@ -1155,12 +1248,28 @@ def parse_args_titan(argv):
         "-o",
         "--output_file",
         type=str,
-        help="Output json file with quality checked observations",
+        help="Output json or columnar .npz file with quality checked observations. "
+        "With several variables @VAR@ is replaced by the variable or the variable "
+        "is added before the extension",
         required=False,
         default="qc_obs.json",
     )
     parser.add_argument(
-        "-v", "--variable", type=str, required=True, help="Observation variable"
+        "-v",
+        "--variable",
+        type=str,
+        nargs="+",
+        required=True,
+        help="Observation variable(s). Several variables are run in parallel. "
+        "Bufr and netatmo sources are decoded once for all variables, other sources "
+        "are read once for each varname",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        required=False,
+        default=None,
+        help="Number of processes running variables in parallel",
     )
     parser.add_argument("--indent", type=int, default=None, help="Indent")
     parser.add_argument(
@@ -1392,7 +1501,11 @@ def parse_args_bufr2json(argv):
         "-v", dest="vars", nargs="+", type=str, required=True, help="Variables"
     )
     parser.add_argument(
-        "-o", dest="output", type=str, required=True, help="Output JSON file"
+        "-o",
+        dest="output",
+        type=str,
+        required=True,
+        help="Output JSON or columnar .npz file",
     )
     parser.add_argument(
         "-dtg", dest="dtg", type=str, required=True, help="DTG (YYYYMMDHH)"
@@ -1415,6 +1528,13 @@ def parse_args_bufr2json(argv):
         default=None,
         help="Observation error relative to normal background error.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of processes decoding the bufr messages",
+        default=None,
+        required=False,
+    )
     parser.add_argument(
         "--debug", action="store_true", help="Debug", required=False, default=False
     )
@@ -1460,7 +1580,11 @@ def parse_args_obs2json(argv):
         "-v", dest="vars", nargs="+", type=str, required=True, help="Variables"
     )
     parser.add_argument(
-        "-o", dest="output", type=str, required=True, help="Output JSON file"
+        "-o",
+        dest="output",
+        type=str,
+        required=True,
+        help="Output JSON or columnar .npz file",
     )
     parser.add_argument(
         "-dtg", dest="obs_time", type=str, required=True, help="DTG (YYYYMMDHH)"
@@ -1520,6 +1644,13 @@ def parse_args_obs2json(argv):
         default=None,
         help="Observation error relative to normal background error.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of processes reading the input (bufr, netatmo)",
+        default=None,
+        required=False,
+    )
     parser.add_argument(
         "--debug", action="store_true", help="Debug", required=False, default=False
     )
@@ -1779,7 +1910,7 @@ def parse_args_merge_qc_data(argv):
         type=str,
         nargs="+",
         dest="filenames",
-        help="Input QC JSON files",
+        help="Input QC JSON or columnar .npz files",
         required=True,
     )
     parser.add_argument(
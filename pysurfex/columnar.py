@@ -0,0 +1,109 @@
+"""Columnar files for observations and QC data."""
+import logging
+import struct
+import zipfile
+
+import numpy as np
+
+COLUMNAR_EXTENSION = ".npz"
+
+
+def is_columnar_file(filename):
+    """Check if a file name is a columnar file.
+
+    Args:
+        filename (str): File name
+
+    Returns:
+        bool: True if the file is a columnar file selected by the extension.
+
+    """
+    return str(filename).endswith(COLUMNAR_EXTENSION)
+
+
+def write_columns(filename, columns):
+    """Write columns to an uncompressed npz file.
+
+    Object columns are stored as fixed width unicode strings and None is
+    stored as an empty string.
+
+    Args:
+        filename (str): File name
+        columns (dict): Columns as array like objects with the same length.
+
+    """
+    arrays = {}
+    for name, values in columns.items():
+        values = np.asarray(values)
+        if values.dtype == object:
+            values = np.array(
+                ["" if value is None else str(value) for value in values.tolist()],
+                dtype=str,
+            )
+        arrays[name] = values
+    logging.info("Writing %s columns to %s", len(arrays), filename)
+    with open(filename, mode="wb") as file_handler:
+        np.savez(file_handler, **arrays)
+
+
+def read_columns(filename):
+    """Read columns from an npz file.
+
+    The columns are memory mapped read-only from the file without copying.
+    Compressed members are read into memory.
+
+    Args:
+        filename (str): File name
+
+    Raises:
+        RuntimeError: If a column contains python objects
+
+    Returns:
+        dict: Columns as numpy arrays
+
+    """
+    columns = {}
+    with zipfile.ZipFile(filename, mode="r") as archive:
+        members = archive.infolist()
+    with open(filename, mode="rb") as file_handler:
+        for member in members:
+            name = member.filename[: -len(".npy")]
+            if member.compress_type != zipfile.ZIP_STORED:
+                with zipfile.ZipFile(filename, mode="r") as archive:
+                    with archive.open(member) as npy_file:
+                        columns[name] = np.lib.format.read_array(npy_file)
+                continue
+
+            # Skip the local file header of the member
+            file_handler.seek(member.header_offset)
+            header = file_handler.read(30)
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            file_handler.seek(member.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(file_handler)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(
+                    file_handler
+                )
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(
+                    file_handler
+                )
+            if dtype.hasobject:
+                raise RuntimeError(f"Column {name} in {filename} contains objects")
+            order = "F" if fortran_order else "C"
+            if int(np.prod(shape)) == 0:
+                columns[name] = np.zeros(shape, dtype=dtype, order=order)
+            else:
+                columns[name] = np.asarray(
+                    np.memmap(
+                        filename,
+                        dtype=dtype,
+                        mode="r",
+                        offset=file_handler.tell(),
+                        shape=shape,
+                        order=order,
+                    )
+                )
+    logging.debug("Read columns %s from %s", list(columns), filename)
+    return columns
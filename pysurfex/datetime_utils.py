@@ -2,6 +2,8 @@
 """Implement helper routines to deal with dates and times."""
 from datetime import date, datetime, timedelta, timezone
 
+import numpy as np
+
 
 # TODO use ISO times
 def as_datetime(dtg):
@@ -53,3 +55,52 @@ def as_datetime_args(year=None, month=None, day=None, hour=0, minute=0, second=0
     return datetime(
         year=year, month=month, day=day, hour=hour, minute=minute, second=second
     ).replace(tzinfo=timezone.utc)
+
+
+def as_datetime64(dtgs):
+    """Convert datetime objects to UTC np.datetime64 values in seconds."""
+    if isinstance(dtgs, np.ndarray) and np.issubdtype(dtgs.dtype, np.datetime64):
+        return dtgs.astype("datetime64[s]")
+    values = []
+    for dtg in dtgs:
+        if dtg.tzinfo is not None:
+            dtg = dtg.astimezone(timezone.utc).replace(tzinfo=None)
+        values.append(dtg)
+    return np.array(values, dtype="datetime64[s]")
+
+
+def from_datetime64(values):
+    """Convert np.datetime64 values to UTC datetime objects."""
+    return [
+        dtg.replace(tzinfo=timezone.utc)
+        for dtg in values.astype("datetime64[s]").astype(object)
+    ]
+
+
+def datetime64_from_dates(dates, times):
+    """Convert YYYYMMDD dates and HHMMSS times to np.datetime64 values in seconds."""
+    dates = np.asarray(dates, dtype="int64")
+    times = np.asarray(times, dtype="int64")
+    year, month_day = np.divmod(dates, 10000)
+    month, day = np.divmod(month_day, 100)
+    hour, minute_second = np.divmod(times, 10000)
+    minute, second = np.divmod(minute_second, 100)
+    months = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+    return (
+        months.astype("datetime64[D]").astype("datetime64[s]")
+        + (day - 1) * np.timedelta64(1, "D")
+        + hour * np.timedelta64(1, "h")
+        + minute * np.timedelta64(1, "m")
+        + second * np.timedelta64(1, "s")
+    )
+
+
+def dtgs_as_datetime64(dtgs):
+    """Convert YYYYMMDDHH[MM[SS]] strings to UTC np.datetime64 values in seconds."""
+    dtgs = np.asarray(dtgs, dtype=str)
+    lengths = np.char.str_len(dtgs)
+    if np.any((lengths != 10) & (lengths != 12) & (lengths != 14)):
+        dtg = dtgs[(lengths != 10) & (lengths != 12) & (lengths != 14)][0]
+        raise RuntimeError(f"dtg={dtg} len(dtg) is {len(dtg)}")
+    dates, times = np.divmod(np.char.ljust(dtgs, 14, "0").astype("int64"), 1000000)
+    return datetime64_from_dates(dates, times)
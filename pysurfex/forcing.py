@@ -4,8 +4,12 @@ import copy
 import json
 import logging
 import os
+import queue
+import re
 import shutil
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 import netCDF4
 import numpy as np
@@ -13,9 +17,10 @@ import toml
 
 from .cache import Cache
 from .configuration import ConfigurationFromHarmonie
-from .datetime_utils import as_datetime, as_timedelta
+from .datetime_utils import as_datetime, as_datetime_string, as_timedelta
 from .file import ForcingFileNetCDF
 from .geo import get_geo_object
+from .netcdf import NETCDF_LOCK
 from .read import ConstantValue, ConvertedInput, Converter
 from .util import deep_update
 
@@ -60,6 +65,7 @@ class SurfexOutputForcing(object):
         self.time_step = 0
         self.time_step_value = 0
         self.var_objs = var_objs
+        self.executor = None
         self._check_sanity()
 
     def _check_sanity(self):
@@ -93,10 +99,61 @@ class SurfexOutputForcing(object):
         "CO2": 0,
     }
 
-    @abc.abstractmethod
+    def read_forcing(self, this_time, cache):
+        """Read and convert all forcing variables for a time step.
+
+        The variables are read concurrently if an executor is set. The fields are
+        always returned in the order of var_objs. Worker processes read with the
+        state of the variables in this process and the updated state is merged
+        back, so the state is the same as when reading in this process.
+
+        Args:
+            this_time (as_datetime): Valid time
+            cache (Cache): Cache
+
+        Returns:
+            list: Fields for each variable in var_objs
+
+        """
+        if self.executor is None:
+            return [read_forcing_variable(obj, this_time, cache) for obj in self.var_objs]
+
+        if isinstance(self.executor, ProcessPoolExecutor):
+            futures = [
+                self.executor.submit(
+                    read_forcing_variable_in_worker, index, this_time, obj.get_state()
+                )
+                for index, obj in enumerate(self.var_objs)
+            ]
+            fields = []
+            for obj, future in zip(self.var_objs, futures):
+                field, state = future.result()
+                obj.set_state(state)
+                fields.append(field)
+            return fields
+
+        futures = [
+            self.executor.submit(read_forcing_variable, obj, this_time, cache)
+            for obj in self.var_objs
+        ]
+        return [future.result() for future in futures]
+
     def write_forcing(self, var_objs, this_time, cache):
-        """Write forcing."""
-        raise NotImplementedError("users must define writeForcing to use this base class")
+        """Read and write forcing for the current time step.
+
+        Args:
+            var_objs (list): Forcing variables
+            this_time (as_datetime): Valid time
+            cache (Cache): Cache
+
+        """
+        fields = self.read_forcing(this_time, cache)
+        self.write_fields(fields, self.time_step, self.time_step_value)
+
+    @abc.abstractmethod
+    def write_fields(self, fields, time_step, time_step_value, state=None):
+        """Write the fields of a time step."""
+        raise NotImplementedError("users must define write_fields to use this base class")
 
 
 class NetCDFOutput(SurfexOutputForcing):
@@ -118,6 +175,9 @@ class NetCDFOutput(SurfexOutputForcing):
         "CO2": "CO2air",
     }
 
+    # Time steps in a chunk of the nc4 variables
+    chunk_time_steps = 48
+
     def __init__(
         self,
         base_time,
@@ -130,9 +190,18 @@ class NetCDFOutput(SurfexOutputForcing):
         cache,
         time_step,
         fmt="netcdf",
+        buffer_steps=None,
+        zlib=False,
+        complevel=4,
+        shuffle=False,
+        resume=False,
+        checkpoint_steps=None,
     ):
         """Construct netcdf forcing.
 
+        The progress is saved in a checkpoint next to the temporary file when
+        buffered time steps are written, and a forcing can be resumed from it.
+
         Args:
             base_time (_type_): _description_
             geo (_type_): _description_
@@ -144,9 +213,28 @@ class NetCDFOutput(SurfexOutputForcing):
             cache (_type_): _description_
             time_step (_type_): _description_
             fmt (str, optional): _description_. Defaults to "netcdf".
+            buffer_steps (int, optional): Number of time steps to buffer in memory
+                                          before writing them as one block.
+                                          Defaults to None which is the time
+                                          length of a chunk for nc4 and 1 step
+                                          otherwise.
+            zlib (bool, optional): Compress variables (nc4 only). Defaults to False.
+            complevel (int, optional): Compression level. Defaults to 4.
+            shuffle (bool, optional): Use the shuffle filter (nc4 only).
+                                      Defaults to False.
+            resume (bool, optional): Continue writing the temporary file from the
+                                     checkpoint. Defaults to False.
+            checkpoint_steps (int, optional): Minimum number of time steps between
+                                              checkpoints. 0 disables checkpoints,
+                                              unless the forcing is resumed where a
+                                              checkpoint is written at each flush.
+                                              Defaults to None which is each
+                                              flushed time chunk.
 
         Raises:
             NotImplementedError: NotImplementedError
+            RuntimeError: If no checkpoint is found when resuming
+            RuntimeError: If the checkpoint does not match the forcing
 
         """
         SurfexOutputForcing.__init__(self, base_time, geo, ntimes, var_objs, time_step)
@@ -162,32 +250,226 @@ class NetCDFOutput(SurfexOutputForcing):
             fname = "FORCING.nc"
         self.fname = fname
         self.tmp_fname = self.fname + ".tmp"
-        self.file_handler = netCDF4.Dataset(
-            self.tmp_fname, "w", format=self.output_format
-        )
-        self._define_forcing(geo, att_objs, att_time, cache)
+        self.checkpoint_fname = self.tmp_fname + ".checkpoint.npz"
+        self.checkpoint = None
+        self.state = None
+
+        self.var_settings = {}
+        self.time_chunk = None
+        self.point_block = None
+        if self.output_format == "NETCDF4":
+            # Time contiguous chunks for blocks of points of about 1 MB
+            self.time_chunk = min(self.ntimes, self.chunk_time_steps)
+            self.point_block = max(1, min(geo.npoints, 262144 // self.time_chunk))
+            self.var_settings.update(
+                {
+                    "chunksizes": (self.time_chunk, self.point_block),
+                    "zlib": zlib,
+                    "complevel": complevel,
+                    "shuffle": shuffle,
+                }
+            )
+        elif zlib or shuffle:
+            logging.warning("Compression is only possible for nc4 output")
+
+        # Buffer time steps and write them in blocks. By default complete time
+        # chunks are written at once.
+        if buffer_steps is None:
+            buffer_steps = 1
+            if self.time_chunk is not None:
+                buffer_steps = self.time_chunk
+        self.buffer_steps = max(1, min(buffer_steps, ntimes))
+
+        # Checkpoint at least a time chunk at a time
+        if checkpoint_steps is None:
+            checkpoint_steps = max(
+                self.buffer_steps, min(self.ntimes, self.chunk_time_steps)
+            )
+        if resume and checkpoint_steps <= 0:
+            checkpoint_steps = 1
+        self.checkpoint_steps = checkpoint_steps
+        self.checkpoint_start = 0
+        self.buffer_start = 0
+        self.nbuffered = 0
+        self.buffer = {}
+        self.write_time = 0.0
+        self.write_bytes = 0
+
+        if resume:
+            if os.path.exists(self.tmp_fname) and os.path.exists(self.checkpoint_fname):
+                self.checkpoint = self.load_checkpoint(self.checkpoint_fname)
+            else:
+                raise RuntimeError(
+                    f"No checkpoint {self.checkpoint_fname} found to resume {fname}"
+                )
+        if self.checkpoint is not None:
+            if (
+                self.checkpoint["ntimes"] != self.ntimes
+                or self.checkpoint["base_time"] != as_datetime_string(self.base_time)
+                or self.checkpoint["time_step_intervall"] != self.time_step_intervall
+            ):
+                raise RuntimeError(
+                    f"Checkpoint {self.checkpoint_fname} does not match the forcing"
+                )
+            logging.info(
+                "Resume %s from time step %s",
+                self.tmp_fname,
+                self.checkpoint["time_step"],
+            )
+            self.time_step = self.checkpoint["time_step"]
+            self.time_step_value = self.time_step
+            self.buffer_start = self.time_step
+            self.checkpoint_start = self.time_step
+            self.file_handler = netCDF4.Dataset(self.tmp_fname, "a")
+            self.forcing_file["TIME"] = self.file_handler["time"]
+            for this_obj in self.var_objs:
+                name = self.translation[this_obj.var_name]
+                self.forcing_file[name] = self.file_handler[name]
+        else:
+            self.file_handler = netCDF4.Dataset(
+                self.tmp_fname, "w", format=self.output_format
+            )
+            self._define_forcing(geo, att_objs, att_time, cache)
+        self._set_chunk_cache()
 
-    def write_forcing(self, var_objs, this_time, cache):
-        """Write forcing.
+    def _set_chunk_cache(self):
+        """Keep partly written chunks in memory.
+
+        If the buffer is not a multiple of the time chunk, the chunks of a row of
+        time steps are written several times. The chunk cache of each variable is
+        made large enough to hold them until they are complete, so compressed
+        chunks are not read back from file.
+
+        """
+        if self.time_chunk is None or self.buffer_steps % self.time_chunk == 0:
+            return
+        nchunks = -(-self.geo.npoints // self.point_block)
+        size = nchunks * self.time_chunk * self.point_block * 4
+        logging.info("Use a chunk cache of %.1f MB for each variable", size / 1.0e6)
+        for this_obj in self.var_objs:
+            name = self.translation[this_obj.var_name]
+            self.forcing_file[name].set_var_chunk_cache(
+                size=size, nelems=2 * nchunks + 1, preemption=0.0
+            )
+
+    def write_fields(self, fields, time_step, time_step_value, state=None):
+        """Write the fields of a time step.
 
         Args:
-            var_objs (_type_): _description_
-            this_time (_type_): _description_
-            cache (_type_): _description_
+            fields (list): Fields for each variable in var_objs
+            time_step (int): Time step index in file
+            time_step_value (int): Value of the time variable
+            state (list, optional): State of each variable in var_objs after reading
+                                    the time step. Defaults to None.
 
         """
         # VARS
-        for this_obj in self.var_objs:
-            this_var = this_obj.var_name
-            logging.info("Preparing variable %s", this_obj.var_name)
-            tic = time.time()
-            field = this_obj.read_time_step(this_time, cache)
-            field = field.reshape([self.geo.nlats, self.geo.nlons], order="F").flatten()
-            toc = time.time()
-            logging.info("Preparation took %s seconds", str(toc - tic))
-            self.forcing_file[self.translation[this_var]][self.time_step, :] = field
+        index = time_step - self.buffer_start
+        for this_obj, field in zip(self.var_objs, fields):
+            name = self.translation[this_obj.var_name]
+            if name not in self.buffer:
+                self.buffer[name] = np.empty(
+                    [self.buffer_steps, self.geo.npoints], dtype="f4"
+                )
+            # Points ordered as reshape([nlats, nlons], order="F").flatten()
+            self.buffer[name][index, :].reshape([self.geo.nlats, self.geo.nlons])[
+                :, :
+            ] = field.reshape([self.geo.nlons, self.geo.nlats]).T
+
+        with NETCDF_LOCK:
+            self.forcing_file["TIME"][time_step] = time_step_value
+        self.nbuffered = index + 1
+        self.state = state
+        if self.nbuffered == self.buffer_steps:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered time steps to file."""
+        nsteps = self.nbuffered
+        if nsteps == 0:
+            return
+        tic = time.time()
+        with NETCDF_LOCK:
+            for name, buffer in self.buffer.items():
+                self.forcing_file[name][
+                    self.buffer_start : self.buffer_start + nsteps, :
+                ] = buffer[:nsteps, :]
+                self.write_bytes = self.write_bytes + buffer[:nsteps, :].nbytes
+        self.write_time = self.write_time + time.time() - tic
+        logging.debug(
+            "Wrote time steps %s-%s", self.buffer_start, self.buffer_start + nsteps - 1
+        )
+        self.buffer_start = self.buffer_start + nsteps
+        self.nbuffered = 0
+        if (
+            self.checkpoint_steps > 0
+            and self.buffer_start - self.checkpoint_start >= self.checkpoint_steps
+        ):
+            with NETCDF_LOCK:
+                self.file_handler.sync()
+            self.save_checkpoint()
+            self.checkpoint_start = self.buffer_start
+
+    def save_checkpoint(self):
+        """Save the number of time steps written and the state of the variables."""
+        progress = {
+            "time_step": self.buffer_start,
+            "ntimes": self.ntimes,
+            "base_time": as_datetime_string(self.base_time),
+            "time_step_intervall": self.time_step_intervall,
+            "states": [],
+        }
+        fields = {}
+        if self.state is not None:
+            for obj_index, state in enumerate(self.state):
+                var_states = []
+                for index, (basetime, validtime, field) in state.items():
+                    var_states.append(
+                        {
+                            "index": index,
+                            "basetime": as_datetime_string(basetime),
+                            "validtime": as_datetime_string(validtime),
+                        }
+                    )
+                    fields.update({f"field_{obj_index}_{index}": field})
+                progress["states"].append(var_states)
 
-        self.forcing_file["TIME"][self.time_step] = self.time_step_value
+        # Replace the checkpoint in one operation
+        tmp_checkpoint = self.checkpoint_fname + ".tmp"
+        with open(tmp_checkpoint, mode="wb") as fhandler:
+            np.savez(fhandler, progress=json.dumps(progress), **fields)
+        os.replace(tmp_checkpoint, self.checkpoint_fname)
+
+    @staticmethod
+    def load_checkpoint(checkpoint_fname):
+        """Load a checkpoint.
+
+        Args:
+            checkpoint_fname (str): Checkpoint file
+
+        Returns:
+            dict: Progress with the state of each variable
+
+        """
+        with np.load(checkpoint_fname) as data:
+            progress = json.loads(str(data["progress"]))
+            states = []
+            for obj_index, var_states in enumerate(progress["states"]):
+                state = {}
+                for var_state in var_states:
+                    index = var_state["index"]
+                    state.update(
+                        {
+                            index: (
+                                as_datetime(var_state["basetime"]),
+                                as_datetime(var_state["validtime"]),
+                                data[f"field_{obj_index}_{index}"],
+                            )
+                        }
+                    )
+                states.append(state)
+        progress["states"] = states
+        return progress
 
     def _define_forcing(self, geo, att_objs, att_time, cache):
         logging.info("Define netcdf forcing")
@@ -270,6 +552,7 @@ class NetCDFOutput(SurfexOutputForcing):
                         "time",
                         "Number_of_points",
                     ),
+                    **self.var_settings,
                 )
                 self.forcing_file["Tair"].longname = "Near_Surface_Air_Temperature"
                 self.forcing_file["Tair"].units = "K"
@@ -281,6 +564,7 @@ class NetCDFOutput(SurfexOutputForcing):
                         "time",
                         "Number_of_points",
                     ),
+                    **self.var_settings,
                 )
                 self.forcing_file["Qair"].longname = "Near_Surface_Specific_Humidity"
                 self.forcing_file["Qair"].units = "kg/kg"
@@ -292,6 +576,7 @@ class NetCDFOutput(SurfexOutputForcing):
                         "time",
                         "Number_of_points",
                     ),
+                    **self.var_settings,
                 )
                 self.forcing_file["PSurf"].longname = "Surface_Pressure"
                 self.forcing_file["PSurf"].units = "Pa"
@@ -303,6 +588,7 @@ class NetCDFOutput(SurfexOutputForcing):
                         "time",
                         "Number_of_points",
                     ),
+                    **self.var_settings,
                 )
                 self.forcing_file[
                     "DIR_SWdown"
@@ -316,6 +602,7 @@ class NetCDFOutput(SurfexOutputForcing):
                         "time",
                         "Number_of_points",
                     ),
+                    **self.var_settings,
                 )
                 self.forcing_file[
                     "SCA_SWdown"
@@ -329,6 +616,7 @@ class NetCDFOutput(SurfexOutputForcing):
                         "time",
                         "Number_of_points",
                     ),
+                    **self.var_settings,
                 )
                 self.forcing_file[
                     "LWdown"
@@ -342,6 +630,7 @@ class NetCDFOutput(SurfexOutputForcing):
                         "time",
                         "Number_of_points",
                     ),
+                    **self.var_settings,
                 )
                 self.forcing_file["Rainf"].longname = "Rainfall_Rate"
                 self.forcing_file["Rainf"].units = "kg/m2/s"
@@ -353,6 +642,7 @@ class NetCDFOutput(SurfexOutputForcing):
                         "time",
                         "Number_of_points",
                     ),
+                    **self.var_settings,
                 )
                 self.forcing_file["Snowf"].longname = "Snowfall_Rate"
                 self.forcing_file["Snowf"].units = "kg/m2/s"
@@ -364,6 +654,7 @@ class NetCDFOutput(SurfexOutputForcing):
                         "time",
                         "Number_of_points",
                     ),
+                    **self.var_settings,
                 )
                 self.forcing_file["Wind"].longname = "Wind_Speed"
                 self.forcing_file["Wind"].units = "m/s"
@@ -375,6 +666,7 @@ class NetCDFOutput(SurfexOutputForcing):
                         "time",
                         "Number_of_points",
                     ),
+                    **self.var_settings,
                 )
                 self.forcing_file["Wind_DIR"].longname = "Wind_Direction"
             elif this_var == "CO2":
@@ -385,6 +677,7 @@ class NetCDFOutput(SurfexOutputForcing):
                         "time",
                         "Number_of_points",
                     ),
+                    **self.var_settings,
                 )
                 self.forcing_file["CO2air"].longname = "Near_Surface_CO2_Concentration"
                 self.forcing_file["CO2air"].units = "kg/m3"
@@ -393,11 +686,49 @@ class NetCDFOutput(SurfexOutputForcing):
                     f"This should never happen! {this_var} is not defined!"
                 )
 
+    def merge_chunk(self, chunk_fname, offset):
+        """Copy the time steps of a forcing file created for a time chunk.
+
+        Args:
+            chunk_fname (str): Forcing file for the chunk
+            offset (int): Time step in this forcing of the first time step in the chunk
+
+        Returns:
+            int: Number of time steps copied
+
+        """
+        with netCDF4.Dataset(chunk_fname, "r") as chunk_file:
+            ntimes = len(chunk_file.dimensions["time"])
+            logging.info("Merge %s time steps from %s", ntimes, chunk_fname)
+            for this_obj in self.var_objs:
+                name = self.translation[this_obj.var_name]
+                field = chunk_file[name][:, :]
+                self.forcing_file[name][offset : offset + ntimes, :] = field
+            self.forcing_file["TIME"][offset : offset + ntimes] = (
+                chunk_file["time"][:] + offset
+            )
+        return ntimes
+
     def finalize(self):
         """Finalize the forcing. Close the file."""
+        self.flush()
         logging.debug("Close file")
+        tic = time.time()
         self.file_handler.close()
+        self.write_time = self.write_time + time.time() - tic
         shutil.move(self.tmp_fname, self.fname)
+        if os.path.exists(self.checkpoint_fname):
+            os.remove(self.checkpoint_fname)
+        if self.write_bytes > 0:
+            megabytes = self.write_bytes / 1.0e6
+            throughput = megabytes / max(self.write_time, 1.0e-9)
+            logging.info(
+                "Wrote %.1f MB of forcing in %.2f seconds (%.1f MB/s). File size: %.1f MB",
+                megabytes,
+                self.write_time,
+                throughput,
+                os.path.getsize(self.fname) / 1.0e6,
+            )
 
 
 class AsciiOutput(SurfexOutputForcing):
@@ -426,19 +757,19 @@ class AsciiOutput(SurfexOutputForcing):
         self.fname = fname
         self._define_forcing(geo, att_objs, att_time, cache)
 
-    def write_forcing(self, var_objs, this_time, cache):
-        """Write forcing.
+    def write_fields(self, fields, time_step, time_step_value, state=None):
+        """Write the fields of a time step.
 
         Args:
-            var_objs (_type_): _description_
-            this_time (_type_): _description_
-            cache (_type_): _description_
+            fields (list): Fields for each variable in var_objs
+            time_step (int): Time step index
+            time_step_value (int): Value of the time step
+            state (list, optional): Not used. Defaults to None.
 
         """
-        for this_obj in self.var_objs:
+        for this_obj, field in zip(self.var_objs, fields):
             this_var = this_obj.var_name
             logging.info("Write var name %s", this_obj.var_name)
-            field = this_obj.read_time_step(this_time, cache)
             fmt = "%20.8f"
             cols = 50
             write_formatted_array(self.file_handler[this_var], field, cols, fmt)
@@ -491,22 +822,421 @@ class AsciiOutput(SurfexOutputForcing):
             self.file_handler[key].close()
 
 
+class WriteBehind(object):
+    """Write forcing time steps from a bounded queue in a writer thread."""
+
+    def __init__(self, output, queue_size):
+        """Construct the writer and start the writer thread.
+
+        Args:
+            output (SurfexOutputForcing): Forcing output
+            queue_size (int): Maximum number of time steps waiting to be written.
+                              The reader blocks when the queue is full.
+
+        """
+        self.output = output
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.put_time = 0.0
+        self.write_time = 0.0
+        self.idle_time = 0.0
+        self.thread = threading.Thread(
+            target=self.run, name="forcing-writer", daemon=True
+        )
+        self.thread.start()
+
+    def put(self, fields, time_step, time_step_value, state=None):
+        """Queue the fields of a time step for writing.
+
+        Args:
+            fields (list): Fields for each variable in var_objs
+            time_step (int): Time step index
+            time_step_value (int): Value of the time step
+            state (list, optional): State of the variables. Defaults to None.
+
+        Raises:
+            RuntimeError: If writing a previous time step failed
+
+        """
+        if self.error is not None:
+            raise RuntimeError("Writing forcing failed") from self.error
+        tic = time.time()
+        self.queue.put((fields, time_step, time_step_value, state))
+        self.put_time = self.put_time + time.time() - tic
+
+    def run(self):
+        """Write queued time steps until the queue is closed."""
+        while True:
+            tic = time.time()
+            item = self.queue.get()
+            self.idle_time = self.idle_time + time.time() - tic
+            if item is None:
+                break
+            # Keep draining the queue after an error so the reader never blocks
+            if self.error is None:
+                tic = time.time()
+                try:
+                    self.output.write_fields(*item)
+                except Exception as exc:
+                    logging.error("Writing time step %s failed: %s", item[1], exc)
+                    self.error = exc
+                self.write_time = self.write_time + time.time() - tic
+
+    def close(self):
+        """Write the remaining time steps and stop the writer thread.
+
+        Raises:
+            RuntimeError: If writing a time step failed
+
+        """
+        self.queue.put(None)
+        self.thread.join()
+        if self.error is not None:
+            raise RuntimeError("Writing forcing failed") from self.error
+
+
+# Groups of four digits "0000"-"9999", right aligned "   0"-"9999" and four blanks
+DIGIT_GROUPS = np.frombuffer(
+    (
+        "".join([f"{i:04d}" for i in range(10000)])
+        + "".join([f"{i:4d}" for i in range(10000)])
+        + "    "
+    ).encode("ascii"),
+    dtype="uint32",
+)
+
+
+def product_error(values, factor, product):
+    """Get the exact rounding error of a floating point product.
+
+    Args:
+        values (np.ndarray): Values
+        factor (float): Factor
+        product (np.ndarray): values * factor in floating point
+
+    Returns:
+        np.ndarray: values * factor - product
+
+    """
+    split = 134217729.0
+    tmp = split * values
+    values_hi = tmp - (tmp - values)
+    values_lo = values - values_hi
+    tmp = split * factor
+    factor_hi = tmp - (tmp - factor)
+    factor_lo = factor - factor_hi
+    return (
+        (values_hi * factor_hi - product) + values_hi * factor_lo + values_lo * factor_hi
+    ) + values_lo * factor_lo
+
+
+def digit_groups(numbers, ngroups, blank=False):
+    """Render non-negative integers as characters in groups of four digits.
+
+    Args:
+        numbers (np.ndarray): Integers
+        ngroups (int): Number of groups
+        blank (bool, optional): Replace leading zeros with blanks. Defaults to False.
+
+    Returns:
+        np.ndarray: Characters with shape (numbers.size, 4 * ngroups)
+
+    """
+    digits = np.empty((numbers.size, ngroups), dtype="uint32")
+    for group in range(ngroups - 1, -1, -1):
+        quotient = numbers // 10000
+        index = numbers - quotient * 10000
+        if blank:
+            index = index + 10000 * (quotient == 0)
+            if group < ngroups - 1:
+                index[numbers == 0] = 20000
+        digits[:, group] = DIGIT_GROUPS[index]
+        numbers = quotient
+    return digits.view("uint8")
+
+
+def format_fixed_array(array, width, precision, fileformat):
+    """Format values with a fixed width "%<width>.<precision>f" format.
+
+    The values are rounded exactly as printf does and rendered into one character
+    array without formatting each value in python.
+
+    Args:
+        array (np.ndarray): Values
+        width (int): Field width
+        precision (int): Number of decimals
+        fileformat (str): Format for values not handled by the vectorized path
+
+    Returns:
+        np.ndarray: Characters with shape (array.size, width). None if the values do
+                    not fit in the fixed width.
+
+    """
+    values = np.asarray(array, dtype="float64").flatten()
+    if precision > 9:
+        return None
+    scale = 10.0**precision
+    with np.errstate(invalid="ignore"):
+        scaled = values * scale
+        rounded = np.rint(scaled)
+        special = ~(np.abs(rounded) < 2.0**53)
+        # Exact ties of the rounded product are rounded by the sign of the error
+        ties = np.abs(scaled - rounded) == 0.5
+    if np.any(ties):
+        error = product_error(values[ties], scale, scaled[ties])
+        rounded[ties] = np.where(
+            error == 0.0, rounded[ties], np.floor(scaled[ties]) + (error > 0.0)
+        )
+    rounded[special] = 0.0
+    number = np.abs(rounded).astype("int64")
+    integer = number // 10**precision
+    fraction = (number - integer * 10**precision).astype("uint32")
+    maxint = int(integer.max(initial=0))
+    if maxint < 2**32:
+        integer = integer.astype("uint32")
+    negative = np.flatnonzero(np.signbit(values) & ~special)
+    ndigits = (
+        np.searchsorted(
+            10 ** np.arange(1, 19, dtype="int64"), integer[negative], side="right"
+        )
+        + 1
+    )
+    nint = width - precision - (1 if precision > 0 else 0)
+    if len(str(maxint)) > nint or np.any(ndigits >= nint):
+        return None
+
+    chars = np.empty((values.size, width), dtype="uint8")
+    if precision > 0:
+        fgroups = -(-precision // 4)
+        fraction = fraction * 10 ** (4 * fgroups - precision)
+        chars[:, nint + 1 :] = digit_groups(fraction, fgroups)[:, :precision]
+        chars[:, nint] = ord(".")
+    igroups = -(-len(str(maxint)) // 4)
+    ncopy = min(nint, 4 * igroups)
+    chars[:, nint - ncopy : nint] = digit_groups(integer, igroups, blank=True)[
+        :, 4 * igroups - ncopy :
+    ]
+    chars[:, : nint - ncopy] = ord(" ")
+    chars[negative, nint - 1 - ndigits] = ord("-")
+
+    for row in np.flatnonzero(special):
+        text = (fileformat % values[row]).encode("ascii")
+        if len(text) != width:
+            return None
+        chars[row, :] = np.frombuffer(text, dtype="uint8")
+    return chars
+
+
 def write_formatted_array(file, array, columns, fileformat):
-    """Write a formatted array."""
-    astr = np.empty(array.size - array.size % columns, dtype="float64")
-    astr = array[0 : astr.size]
-    astr = astr.reshape((columns, astr.size / columns), order="F")
-    mlw = (len(fileformat % 0)) * (columns + 1)
-    formatter = {"float_kind": lambda x: fileformat % x}
-    astr_end = np.array2string(
-        array[astr.size :], separator="", max_line_width=mlw, formatter=formatter
-    )[1:-1]
-    np.savetxt(file, astr.T, fmt=fileformat, newline="\n", delimiter="")
-    file.write(astr_end + "\n")
+    """Write a formatted array.
+
+    Args:
+        file (io.TextIOWrapper): File handler
+        array (np.ndarray): Values
+        columns (int): Number of values per line
+        fileformat (str): Format of a value
+
+    """
+    values = np.asarray(array).flatten()
+    nrows, ntail = divmod(values.size, columns)
+    chars = None
+    spec = re.fullmatch(r"%(\d+)\.(\d+)f", fileformat)
+    if spec is not None:
+        width = int(spec.group(1))
+        chars = format_fixed_array(values, width, int(spec.group(2)), fileformat)
+
+    if chars is None:
+        astr = values[0 : nrows * columns].reshape((columns, nrows), order="F")
+        mlw = (len(fileformat % 0)) * (columns + 1)
+        formatter = {"float_kind": lambda x: fileformat % x}
+        astr_end = np.array2string(
+            values[astr.size :], separator="", max_line_width=mlw, formatter=formatter
+        )[1:-1]
+        np.savetxt(file, astr.T, fmt=fileformat, newline="\n", delimiter="")
+        file.write(astr_end + "\n")
+        return
+
+    # Full lines, the remaining values and a final newline in one write
+    line = columns * width + 1
+    text = np.full(nrows * line + ntail * width + 1, ord("\n"), dtype="uint8")
+    text[: nrows * line].reshape(nrows, line)[:, :-1] = chars[: nrows * columns].reshape(
+        nrows, columns * width
+    )
+    text[nrows * line : -1] = chars[nrows * columns :].flatten()
+    file.write(text.tobytes().decode("ascii"))
+
+
+def read_forcing_variable(var_obj, this_time, cache):
+    """Read and convert a forcing variable for a time step.
+
+    Args:
+        var_obj (ReadData): Forcing variable
+        this_time (as_datetime): Valid time
+        cache (Cache): Cache
+
+    Returns:
+        np.ndarray: Field
+
+    """
+    logging.info("Preparing variable %s", var_obj.var_name)
+    tic = time.time()
+    field = var_obj.read_time_step(this_time, cache)
+    toc = time.time()
+    logging.info("Preparation took %s seconds", str(toc - tic))
+    return field
+
+
+# Forcing variables and cache of a worker process
+_worker = {}
+
+
+def init_forcing_worker(var_objs, cache_interval):
+    """Initialize a worker process reading forcing variables.
+
+    Args:
+        var_objs (list): Forcing variables
+        cache_interval (int): Cache interval in seconds
+
+    """
+    _worker["var_objs"] = var_objs
+    _worker["cache"] = Cache(cache_interval)
+
+
+def read_forcing_variable_in_worker(index, this_time, state):
+    """Read a forcing variable in a worker process.
+
+    Args:
+        index (int): Index of the variable in the worker's forcing variables
+        this_time (as_datetime): Valid time
+        state (dict): State of the variable in the main process
+
+    Returns:
+        tuple: Field and the state of the variable after reading
+
+    """
+    cache = _worker["cache"]
+    cache.clean_fields(this_time)
+    var_obj = _worker["var_objs"][index]
+    var_obj.set_state(state)
+    field = read_forcing_variable(var_obj, this_time, cache)
+    return field, var_obj.get_state()
+
+
+def netcdf_settings(options):
+    """Get the settings for the NetCDF forcing writer from the options.
+
+    Args:
+        options (dict): Forcing options
+
+    Returns:
+        dict: Keyword arguments to NetCDFOutput
+
+    """
+    settings = {}
+    for key in ["buffer_steps", "zlib", "complevel", "shuffle", "checkpoint_steps"]:
+        if key in options and options[key] is not None:
+            settings.update({key: options[key]})
+    return settings
+
+
+def run_time_chunks(options, var_objs, att_objs):
+    """Create the forcing in time chunks processed in parallel.
+
+    The period is split into contiguous chunks. Each chunk is created by
+    run_time_loop in a worker process with its own cache and written to a
+    separate file. The chunks are then merged into the final output file.
+    The variables keep the initial basetime of the full period, so the
+    first time step of a chunk reads the previous time step of accumulated
+    variables from file exactly as the serial time loop does.
+
+    Args:
+        options (dict): Forcing options
+        var_objs (list): Forcing variables
+        att_objs (list): Forcing attributes
+
+    Raises:
+        NotImplementedError: Only implemented for NetCDF output and without resume
+        RuntimeError: Chunks can not be used with the single option
+
+    """
+    tic = time.time()
+    output_format = str.lower(options["output_format"])
+    if output_format not in ["netcdf", "nc4"]:
+        raise NotImplementedError(
+            "Time chunks are only implemented for netcdf output " + output_format
+        )
+    if "single" in options and options["single"]:
+        raise RuntimeError("Time chunks can not be used with option single")
+    if "resume" in options and options["resume"]:
+        raise NotImplementedError("Resume is not implemented for time chunks")
+
+    validtimes = []
+    this_time = options["start"]
+    while this_time <= options["stop"]:
+        validtimes.append(this_time)
+        this_time = this_time + as_timedelta(seconds=options["timestep"])
+    ntimes = len(validtimes)
+    nchunks = max(1, min(options["chunks"], ntimes))
+
+    fname = options["output_file"]
+    if fname is None:
+        fname = "FORCING.nc"
+    chunk_options = []
+    for chunk, indices in enumerate(np.array_split(np.arange(ntimes), nchunks)):
+        chunk_option = copy.copy(options)
+        chunk_option.update(
+            {
+                "start": validtimes[indices[0]],
+                "stop": validtimes[indices[-1]],
+                "output_file": f"{fname}.chunk{chunk:04d}",
+                "chunks": 1,
+                "parallel": "none",
+                "prefetch": 0,
+            }
+        )
+        chunk_options.append(chunk_option)
+
+    workers = None
+    if "workers" in options:
+        workers = options["workers"]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(run_time_loop, chunk_option, var_objs, att_objs)
+            for chunk_option in chunk_options
+        ]
+        for future in futures:
+            future.result()
+
+    logging.info("Merge %s chunks into %s", len(chunk_options), fname)
+    cache = Cache(options["cache_interval"])
+    output = NetCDFOutput(
+        options["start"],
+        options["geo_out"],
+        fname,
+        ntimes,
+        var_objs,
+        att_objs,
+        options["start"],
+        cache,
+        options["timestep"],
+        fmt=output_format,
+        **netcdf_settings(options),
+    )
+    offset = 0
+    for chunk_option in chunk_options:
+        offset = offset + output.merge_chunk(chunk_option["output_file"], offset)
+        os.remove(chunk_option["output_file"])
+    output.finalize()
+    toc = time.time()
+    logging.info("Forcing generation took %s seconds", str(toc - tic))
 
 
 def run_time_loop(options, var_objs, att_objs):
     """Run time loop."""
+    if "chunks" in options and options["chunks"] > 1:
+        run_time_chunks(options, var_objs, att_objs)
+        return
+
     tic = time.time()
     this_time = options["start"]
 
@@ -515,12 +1245,51 @@ def run_time_loop(options, var_objs, att_objs):
     single = False
     if "single" in options:
         single = options["single"]
+    prefetch = 0
+    if "prefetch" in options:
+        prefetch = options["prefetch"]
+    write_queue = 0
+    if "write_queue" in options and options["write_queue"] is not None:
+        write_queue = options["write_queue"]
+    resume = False
+    if "resume" in options:
+        resume = options["resume"]
 
     # Find how many time steps we want to write
     ntimes = 0
+    validtimes = []
     while this_time <= options["stop"]:
         ntimes = ntimes + 1
+        validtimes.append(this_time)
         this_time = this_time + as_timedelta(seconds=options["timestep"])
+
+    # Precompute basetimes and file names for the whole period
+    for var_obj in var_objs:
+        var_obj.set_schedule(validtimes)
+    validtimes_index = {validtime: index for index, validtime in enumerate(validtimes)}
+
+    parallel = "none"
+    if "parallel" in options and options["parallel"] is not None:
+        parallel = options["parallel"]
+    workers = None
+    if "workers" in options:
+        workers = options["workers"]
+    if parallel == "thread":
+        executor = ThreadPoolExecutor(max_workers=workers)
+    elif parallel == "process":
+        if prefetch > 0:
+            # The workers read with their own caches
+            logging.warning("Prefetch is not used with parallel mode process")
+            prefetch = 0
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_forcing_worker,
+            initargs=(var_objs, options["cache_interval"]),
+        )
+    elif parallel == "none":
+        executor = None
+    else:
+        raise NotImplementedError(f"Parallel mode {parallel} is not implemented")
     if single:
         time_step = 1
         if ntimes == 1:
@@ -528,6 +1297,8 @@ def run_time_loop(options, var_objs, att_objs):
             logging.info("Print single time step twice %s", 0)
         else:
             raise Exception("Option single should be used with one time step")
+        if resume:
+            raise RuntimeError("Option single can not be resumed")
 
     # Create output object
     if (
@@ -547,8 +1318,12 @@ def run_time_loop(options, var_objs, att_objs):
             cache,
             time_step,
             fmt=str.lower(options["output_format"]),
+            resume=resume,
+            **netcdf_settings(options),
         )
     elif str.lower(options["output_format"]) == "ascii":
+        if resume:
+            raise NotImplementedError("Resume is not implemented for ASCII forcing")
         att_time = options["start"]
         output = AsciiOutput(
             options["start"],
@@ -563,9 +1338,23 @@ def run_time_loop(options, var_objs, att_objs):
         )
     else:
         raise NotImplementedError("Invalid output format " + options["output_format"])
+    output.executor = executor
+    writer = None
+    if write_queue > 0:
+        writer = WriteBehind(output, write_queue)
+    read_time = 0.0
+    write_time = 0.0
+
+    # Continue after the last time step written
+    this_time = options["start"]
+    if output.time_step > 0:
+        for var_obj, state in zip(var_objs, output.checkpoint["states"]):
+            var_obj.set_state(state)
+        this_time = this_time + as_timedelta(
+            seconds=options["timestep"] * output.time_step
+        )
 
     # Loop output time steps
-    this_time = options["start"]
     while this_time <= options["stop"]:
 
         # Write for each time step
@@ -574,7 +1363,22 @@ def run_time_loop(options, var_objs, att_objs):
             this_time.strftime("%Y%m%d%H"),
             str(output.time_step),
         )
-        output.write_forcing(var_objs, this_time, cache)
+        if prefetch > 0:
+            prefetch_index = min(
+                validtimes_index[this_time] + prefetch, len(validtimes) - 1
+            )
+            for var_obj in var_objs:
+                var_obj.prefetch(validtimes[prefetch_index], cache)
+        tic_read = time.time()
+        fields = output.read_forcing(this_time, cache)
+        state = [var_obj.get_state() for var_obj in var_objs]
+        read_time = read_time + time.time() - tic_read
+        if writer is None:
+            tic_write = time.time()
+            output.write_fields(fields, output.time_step, output.time_step_value, state)
+            write_time = write_time + time.time() - tic_write
+        else:
+            writer.put(fields, output.time_step, output.time_step_value, state)
         output.time_step = output.time_step + 1
         if not single:
             output.time_step_value = output.time_step
@@ -587,6 +1391,22 @@ def run_time_loop(options, var_objs, att_objs):
                 this_time = this_time + as_timedelta(seconds=options["timestep"])
 
     # Finalize forcing
+    if writer is not None:
+        writer.close()
+        logging.info(
+            "Reading took %.2f seconds of which %.2f seconds waiting for the writer. "
+            "Writing took %.2f seconds and the writer was idle for %.2f seconds",
+            read_time,
+            writer.put_time,
+            writer.write_time,
+            writer.idle_time,
+        )
+    else:
+        logging.info(
+            "Reading took %.2f seconds. Writing took %.2f seconds", read_time, write_time
+        )
+    if executor is not None:
+        executor.shutdown()
     output.finalize()
     toc = time.time()
     logging.info("Forcing generation took %s seconds", str(toc - tic))
@@ -1025,28 +1845,155 @@ def set_forcing_config(**kwargs):
     if "single" in kwargs:
         options["single"] = kwargs["single"]
     options["cache_interval"] = cache_interval
+    options["prefetch"] = 0
+    if "prefetch" in kwargs and kwargs["prefetch"] is not None:
+        options["prefetch"] = kwargs["prefetch"]
+    options["parallel"] = "none"
+    if "parallel" in kwargs and kwargs["parallel"] is not None:
+        options["parallel"] = kwargs["parallel"]
+    options["workers"] = None
+    if "workers" in kwargs:
+        options["workers"] = kwargs["workers"]
+    options["chunks"] = 1
+    if "chunks" in kwargs and kwargs["chunks"] is not None:
+        options["chunks"] = kwargs["chunks"]
+    for key in [
+        "buffer_steps",
+        "zlib",
+        "complevel",
+        "shuffle",
+        "write_queue",
+        "resume",
+        "checkpoint_steps",
+    ]:
+        if key in kwargs:
+            options[key] = kwargs[key]
 
     return options, var_objs, att_objs
 
 
+def get_point_indices(points, npoints):
+    """Get the indices of the selected points.
+
+    Args:
+        points (list): Point indices or "start:stop" ranges with stop excluded.
+                       None selects all points.
+        npoints (int): Number of points
+
+    Returns:
+        np.ndarray: Sorted unique point indices. None if all points are selected.
+
+    Raises:
+        RuntimeError: If a point is outside the domain or no points are selected
+
+    """
+    if points is None or len(points) == 0:
+        return None
+    indices = []
+    for point in points:
+        if isinstance(point, str) and ":" in point:
+            start, stop = point.split(":")
+            start = int(start) if start != "" else 0
+            stop = int(stop) if stop != "" else npoints
+            indices.append(np.arange(start, stop))
+        else:
+            indices.append(np.array([int(point)]))
+    indices = np.unique(np.concatenate(indices))
+    if indices.size == 0:
+        raise RuntimeError("No points selected")
+    if indices[0] < 0 or indices[-1] >= npoints:
+        raise RuntimeError(f"Points must be in the range 0-{npoints - 1}")
+    return indices
+
+
 def modify_forcing(**kwargs):
-    """Modify forcing."""
+    """Modify forcing.
+
+    Copy a window of time steps of the variables from the input forcing into the
+    output forcing, optionally only for a subset of the points. Each variable is
+    copied with one read of the input and one read and write of the output.
+
+    Args:
+        input_file (str): Input forcing file
+        output_file (str): Forcing file to modify
+        variables (list): Variables to copy
+        time_step (int, optional): First time step to copy from input. Negative values
+                                   count from the end. Defaults to -1.
+        ntimes (int, optional): Number of time steps to copy. Defaults to 1.
+        output_time_step (int, optional): First time step to write in output.
+                                          Defaults to 0.
+        points (list, optional): Point indices or "start:stop" ranges to copy.
+                                 Defaults to all points.
+
+    Raises:
+        RuntimeError: If the time window is outside the forcing
+
+    """
     infile = kwargs["input_file"]
     outfile = kwargs["output_file"]
-    time_step = kwargs["time_step"]
     variables = kwargs["variables"]
+    time_step = -1
+    if "time_step" in kwargs and kwargs["time_step"] is not None:
+        time_step = int(kwargs["time_step"])
+    ntimes = 1
+    if "ntimes" in kwargs and kwargs["ntimes"] is not None:
+        ntimes = int(kwargs["ntimes"])
+    output_time_step = 0
+    if "output_time_step" in kwargs and kwargs["output_time_step"] is not None:
+        output_time_step = int(kwargs["output_time_step"])
+    points = None
+    if "points" in kwargs:
+        points = kwargs["points"]
 
-    ifile = netCDF4.Dataset(infile, "r")
-    ofile = netCDF4.Dataset(outfile, "r+")
-
-    for var in variables:
-        print("Modify variable " + var)
-        print(
-            "input", ifile[var][time_step, :], ifile[var][time_step, :].shape, time_step
-        )
-        print("output", ofile[var][0, :], ofile[var][0, :].shape)
-        ofile[var][0, :] = ifile[var][time_step, :]
+    tic = time.time()
+    with netCDF4.Dataset(infile, "r") as ifile, netCDF4.Dataset(outfile, "r+") as ofile:
+        in_ntimes = len(ifile.dimensions["time"])
+        if time_step < 0:
+            time_step = time_step + in_ntimes
+        if time_step < 0 or time_step + ntimes > in_ntimes:
+            raise RuntimeError(
+                f"Time steps {time_step}-{time_step + ntimes - 1} not in {infile}"
+            )
+        if output_time_step < 0 or output_time_step + ntimes > len(
+            ofile.dimensions["time"]
+        ):
+            raise RuntimeError(
+                f"Time steps {output_time_step}-{output_time_step + ntimes - 1} "
+                f"not in {outfile}"
+            )
+        in_window = slice(time_step, time_step + ntimes)
+        out_window = slice(output_time_step, output_time_step + ntimes)
+
+        # Copy the bounding hyperslab of the points
+        npoints = len(ofile.dimensions["Number_of_points"])
+        indices = get_point_indices(points, npoints)
+        if indices is None:
+            point_window = slice(0, npoints)
+            columns = slice(None)
+        else:
+            point_window = slice(int(indices[0]), int(indices[-1]) + 1)
+            columns = indices - indices[0]
+
+        for var in variables:
+            values = ifile[var][in_window, point_window]
+            old_values = ofile[var][out_window, point_window]
+            new_values = old_values.copy()
+            new_values[:, columns] = values[:, columns]
+            ofile[var][out_window, point_window] = new_values
+
+            change = np.ma.abs(new_values - old_values)
+            logging.info(
+                "Modified %s time steps %s-%s from time steps %s-%s in %s for %s "
+                "points. %s values changed. Max change: %s",
+                var,
+                out_window.start,
+                out_window.stop - 1,
+                in_window.start,
+                in_window.stop - 1,
+                infile,
+                npoints if indices is None else indices.size,
+                int(np.ma.sum(change > 0.0)),
+                np.ma.max(change),
+            )
         ofile.sync()
-
-    ifile.close()
-    ofile.close()
+    logging.info("Modifying forcing took %.2f seconds", time.time() - tic)
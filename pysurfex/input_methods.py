@@ -1,12 +1,21 @@
 """Input methods."""
+import copy
 import glob
+import json
 import logging
 import os
 
+import numpy as np
+
 from .bufr import BufrObservationSet
 from .datetime_utils import as_timedelta
 from .geo import LonLatVal
-from .obs import JsonObservationSet, MetFrostObservations, NetatmoObservationSet
+from .obs import (
+    JsonObservationSet,
+    MetFrostObservations,
+    NetatmoObservationSet,
+    ObservationSet,
+)
 from .obsoul import ObservationDataSetFromObsoulFile
 from .util import parse_filepattern
 
@@ -52,6 +61,8 @@ def get_datasources(obs_time, settings):
                 filename = parse_filepattern(filepattern, obs_time, validtime)
                 if "varname" in settings[obs_set]:
                     varname = settings[obs_set]["varname"]
+                    if isinstance(varname, str):
+                        varname = [varname]
                 else:
                     raise RuntimeError("You must set variable name")
 
@@ -61,6 +72,8 @@ def get_datasources(obs_time, settings):
                     kwargs.update({"latrange": settings[obs_set]["latrange"]})
                 if "sigmao" in settings[obs_set]:
                     kwargs.update({"sigmao": settings[obs_set]["sigmao"]})
+                if "workers" in settings[obs_set]:
+                    kwargs.update({"workers": settings[obs_set]["workers"]})
                 if "dt" in settings[obs_set]:
                     deltat = settings[obs_set]["dt"]
                 else:
@@ -121,6 +134,8 @@ def get_datasources(obs_time, settings):
                     kwargs.update({"dt": settings[obs_set]["dt"]})
                 else:
                     kwargs.update({"dt": 1800})
+                if "workers" in settings[obs_set]:
+                    kwargs.update({"workers": settings[obs_set]["workers"]})
 
                 if filenames is not None:
                     datasources.append(
@@ -212,6 +227,82 @@ def get_datasources(obs_time, settings):
     return datasources
 
 
+def get_datasources_for_variables(obs_time, settings):
+    """Get data sources for several variables decoding each source once.
+
+    Data sources with the same settings are only read once. Bufr and netatmo files
+    are decoded once for all the requested variables and split per variable
+    afterwards. The observation errors are set per variable and data source.
+
+    Args:
+        obs_time (datetime.datetime): Observation time
+        settings (dict): Data source settings for each variable
+
+    Returns:
+        dict: List of observation data sets for each variable
+    """
+    sources = {}
+    for var, var_settings in settings.items():
+        for label, set_settings in var_settings.items():
+            source_settings = copy.deepcopy(set_settings)
+            # Settings not used when decoding
+            source_settings.pop("sigmao", None)
+            source_settings.pop("tests", None)
+            varnames = source_settings.get("varname")
+            if isinstance(varnames, str):
+                varnames = [varnames]
+            # Sources decoding several variables in one pass
+            merged = str(source_settings.get("filetype", "")).lower() in [
+                "bufr",
+                "netatmo",
+            ]
+            if merged:
+                source_settings.pop("varname", None)
+            key = json.dumps(source_settings, sort_keys=True, default=str)
+            if key not in sources:
+                sources.update(
+                    {key: {"settings": source_settings, "varnames": [], "users": []}}
+                )
+            source = sources[key]
+            if merged:
+                for varname in varnames:
+                    if varname not in source["varnames"]:
+                        source["varnames"].append(varname)
+                source["settings"].update({"varname": source["varnames"]})
+            source["users"].append(
+                (var, label, set_settings.get("sigmao"), varnames, merged)
+            )
+
+    datasources = {var: [] for var in settings}
+    for key, source in sources.items():
+        logging.info(
+            "Decode data source %s for %s", key, [user[0] for user in source["users"]]
+        )
+        obs_sets = get_datasources(obs_time, {"source": source["settings"]})
+        if len(obs_sets) == 0:
+            continue
+        columns = obs_sets[0].columns()
+        for var, label, sigmao, varnames, merged in source["users"]:
+            var_columns = columns
+            if merged:
+                selected = np.isin(columns["varnames"].astype(str), varnames)
+                var_columns = {name: values[selected] for name, values in columns.items()}
+            datasources[var].append(
+                (label, ObservationSet(label=label, sigmao=sigmao, columns=var_columns))
+            )
+
+    # Keep the order of the data sources in the settings
+    for var, var_settings in settings.items():
+        labels = list(var_settings)
+        datasources[var] = [
+            obs_set
+            for __, obs_set in sorted(
+                datasources[var], key=lambda source: labels.index(source[0])
+            )
+        ]
+    return datasources
+
+
 def set_geo_from_obs_set(
     obs_time, obs_type, varname, inputfile, lonrange=None, latrange=None
 ):
@@ -286,6 +377,7 @@ def get_obsset(
     obtypes=None,
     subtypes=None,
     sigmao=None,
+    workers=None,
 ):
     """Create an observation set from an input data set.
 
@@ -304,6 +396,7 @@ def get_obsset(
         obtypes (list, optional): Obstypes (obsoul)
         subtypes (list, optional): Subtypes (obsoul)
         sigmao (float, optional): Observation error relative to normal background error. Defaults to None.
+        workers (int, optional): Number of processes reading the input (bufr, netatmo). Defaults to None.
 
     Returns:
         obsset (ObservationSet): Observation set
@@ -352,6 +445,8 @@ def get_obsset(
             "neg_t_range": neg_t_range_seconds,
         }
     }
+    if workers is not None:
+        settings[label].update({"workers": workers})
 
     logging.debug("%s", settings)
     logging.debug("Get data source")
@@ -375,6 +470,7 @@ def create_obsset_file(
     obtypes=None,
     subtypes=None,
     sigmao=None,
+    workers=None,
 ):
     """Create an observation set from an input data set.
 
@@ -395,6 +491,7 @@ def create_obsset_file(
         obtypes (list, optional): Obstypes (obsoul)
         subtypes (list, optional): Subtypes (obsoul)
         sigmao (float, optional): Observation error relative to normal background error. Defaults to None.
+        workers (int, optional): Number of processes reading the input (bufr, netatmo). Defaults to None.
 
     """
     logging.debug("Get data source")
@@ -413,5 +510,6 @@ def create_obsset_file(
         obtypes=obtypes,
         subtypes=subtypes,
         sigmao=sigmao,
+        workers=workers,
     )
     obsset.write_json_file(output, indent=indent)
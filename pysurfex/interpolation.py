@@ -1,4 +1,5 @@
 """Interpolation. All interfaces to gridpp."""
+import hashlib
 import logging
 
 try:
@@ -208,8 +209,20 @@ class Interpolation(object):
                     interpolated_field = new_field.reshape(self.npoints)
             return interpolated_field
 
-    def rotate_wind_to_geographic(self):
-        """Not implemented."""
+    def rotate_wind_to_geographic(self, field):
+        """Rotate wind to geographic directions. Not implemented.
+
+        Args:
+            field (np.ndarray): Wind component
+
+        Raises:
+            NotImplementedError: Rotation of wind is not implemented
+
+        """
+        raise NotImplementedError(
+            "Rotation of wind to geographic directions is not implemented. "
+            "Set rotate_to_geographic to False for the wind components."
+        )
 
     @staticmethod
     def distance(lon1, lat1, lon2, lat2):
@@ -390,9 +403,14 @@ def inside_grid(grid_lons, grid_lats, p_lons, p_lats, distance=2500.0):
 class ObsOperator(object):
     """Obs operator. Class to convert a field to an observation point."""
 
-    def __init__(self, operator, geo, dataset, grid_values, max_distance=5000):
+    def __init__(
+        self, operator, geo, dataset, grid_values, max_distance=5000, cache=None
+    ):
         """Construct the observation operator.
 
+        With a cache the gridpp grid, the points and the interpolated values are
+        re-used for the same geometry and station set.
+
         Args:
             operator (str): Interpolation operator.
             geo (surfex.Geo): Surfex geometry.
@@ -400,6 +418,7 @@ class ObsOperator(object):
             grid_values (np.darray): Values in the grid.
             max_distance (int, optional): Max allowed deviation in meters from grid borders.
                                           Defaults to 5000.
+            cache (surfex.Cache, optional): Cache. Defaults to None.
 
         """
         lons = dataset.lons
@@ -407,14 +426,81 @@ class ObsOperator(object):
         logging.info(
             'Setting up "%s" observation operator for %s points', operator, str(len(lons))
         )
-        obs_values = gridpos2points(
-            geo.lons, geo.lats, lons, lats, grid_values, operator=operator
-        )
-        self.inside_grid = inside_grid(
-            geo.lons, geo.lats, lons, lats, distance=max_distance
-        )
+        if cache is None:
+            obs_values = gridpos2points(
+                geo.lons, geo.lats, lons, lats, grid_values, operator=operator
+            )
+            self.inside_grid = inside_grid(
+                geo.lons, geo.lats, lons, lats, distance=max_distance
+            )
+        else:
+            with cache.lock:
+                obs_values, self.inside_grid = self.cached_values(
+                    cache, operator, geo, lons, lats, grid_values, max_distance
+                )
         self.obs_values = obs_values
 
+    @staticmethod
+    def station_set_id(lons, lats):
+        """Create an identifier for a set of station positions.
+
+        Args:
+            lons (np.ndarray): Longitudes
+            lats (np.ndarray): Latitudes
+
+        Returns:
+            str: Identifier
+
+        """
+        digest = hashlib.sha1()
+        digest.update(np.ascontiguousarray(lons, dtype=np.float64).tobytes())
+        digest.update(np.ascontiguousarray(lats, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def cached_values(cache, operator, geo, lons, lats, grid_values, max_distance):
+        """Interpolate values re-using the grid, points and values in the cache.
+
+        Args:
+            cache (surfex.Cache): Cache
+            operator (str): Interpolation operator.
+            geo (surfex.Geo): Surfex geometry.
+            lons (np.ndarray): Point longitudes
+            lats (np.ndarray): Point latitudes
+            grid_values (np.darray): Values in the grid.
+            max_distance (int): Max allowed deviation in meters from grid borders.
+
+        Returns:
+            tuple: Interpolated values and the inside grid mask.
+
+        """
+        key = (geo.identifier(), ObsOperator.station_set_id(lons, lats))
+        if key not in cache.obs_operators:
+            logging.debug("Create grid and points for %s", key)
+            cache.obs_operators[key] = {
+                "grid": Grid(geo.lons, geo.lats),
+                "points": Points(lons, lats),
+                "inside_grid": {},
+                "values": [],
+            }
+        cached = cache.obs_operators[key]
+
+        if max_distance not in cached["inside_grid"]:
+            cached["inside_grid"][max_distance] = cached["points"].inside_grid(
+                cached["grid"], distance=max_distance
+            )
+
+        # Fields are identified by the object as they are shared by reference
+        for field, field_operator, values in cached["values"]:
+            if field is grid_values and field_operator == operator:
+                logging.info("Using cached %s values for %s", operator, key)
+                return values, cached["inside_grid"][max_distance]
+        values = grid2points(
+            cached["grid"], cached["points"], grid_values, operator=operator
+        )
+        cached["values"].append((grid_values, operator, values))
+        return values, cached["inside_grid"][max_distance]
+
     def get_obs_value(self, pos=None):
         """Get the observed value.
 
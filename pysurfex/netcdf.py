@@ -2,6 +2,7 @@
 import logging
 import os
 import re
+import threading
 from enum import Enum
 
 import netCDF4
@@ -21,6 +22,9 @@ from .datetime_utils import fromtimestamp, isdatetime, offsetaware, utcfromtimes
 from .geo import ConfProj, Geo
 from .interpolation import Interpolation
 
+# The netCDF and udunits libraries are not thread safe
+NETCDF_LOCK = threading.RLock()
+
 
 class Netcdf(object):
     """Netcdf input."""
@@ -34,7 +38,8 @@ class Netcdf(object):
         """
         self.filename = filename
         logging.debug("filename: %s", filename)
-        self.file = netCDF4.Dataset(filename, "r")
+        with NETCDF_LOCK:
+            self.file = netCDF4.Dataset(filename, "r")
 
     def nc_slice(
         self,
@@ -295,9 +300,10 @@ class Netcdf(object):
             validtime = [validtime]
 
         logging.debug("level %s member %s validtime %s", level, member, validtime)
-        field, geo_in = self.nc_slice(
-            var_name, levels=level, members=member, times=validtime, units=units
-        )
+        with NETCDF_LOCK:
+            field, geo_in = self.nc_slice(
+                var_name, levels=level, members=member, times=validtime, units=units
+            )
         # Reshape to fortran 2D style
         field = np.reshape(field, [geo_in.nlons, geo_in.nlats], order="F")
         return field, geo_in
@@ -754,26 +760,18 @@ def read_first_guess_netcdf_file(input_file, var):
         else:
             raise NotImplementedError
     else:
-        lons = np.array(np.transpose(np.reshape(lons, [n_y, n_x], order="F")))
-        lats = np.array(np.transpose(np.reshape(lats, [n_y, n_x], order="F")))
+        lons = np.reshape(lons, [n_y, n_x], order="F").T
+        lats = np.reshape(lats, [n_y, n_x], order="F").T
         geo = Geo(lons, lats)
 
-    background = file_handler[var][:]
-    background = np.array(np.reshape(background, [n_x * n_y]))
-    background = np.reshape(background, [n_y, n_x])
-    background = np.transpose(background)
+    # The fields are stored as (y, x) and returned as (x, y) views without copying
+    background = np.ma.getdata(file_handler[var][:]).reshape(n_y, n_x).T
     fill_value = file_handler.variables[var].getncattr("_FillValue")
     logging.info("Field %s got %s. Fill with nan", var, str(fill_value))
     background[background == fill_value] = np.nan
 
-    glafs = file_handler["land_area_fraction"][:]
-    glafs = np.array(np.reshape(glafs, [n_x * n_y]))
-    glafs = np.reshape(glafs, [n_y, n_x])
-    glafs = np.transpose(glafs)
-    gelevs = file_handler["altitude"][:]
-    gelevs = np.array(np.reshape(gelevs, [n_x * n_y]))
-    gelevs = np.reshape(gelevs, [n_y, n_x])
-    gelevs = np.transpose(gelevs)
+    glafs = np.ma.getdata(file_handler["land_area_fraction"][:]).reshape(n_y, n_x).T
+    gelevs = np.ma.getdata(file_handler["altitude"][:]).reshape(n_y, n_x).T
 
     file_handler.close()
     return geo, validtime, background, glafs, gelevs
@@ -2,6 +2,7 @@
 import json
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import requests
@@ -16,35 +17,154 @@ except:  # noqa
     cfunits = None
 
 
-from .datetime_utils import as_datetime, as_datetime_args, as_timedelta, utcfromtimestamp
-from .observation import Observation
+from .columnar import is_columnar_file, read_columns, write_columns
+from .datetime_utils import (
+    as_datetime,
+    as_datetime64,
+    as_datetime_args,
+    as_timedelta,
+    from_datetime64,
+)
+from .observation import Observation, PositionIndex
 from .titan import dataset_from_file
 
 
 class ObservationSet(object):
-    """Set of observations."""
+    """Set of observations.
 
-    def __init__(self, observations, label="", sigmao=None):
+    The observations are stored as columns. Observation objects are only created
+    when the observations property is accessed.
+
+    """
+
+    def __init__(self, observations=None, label="", sigmao=None, columns=None):
         """Create an observation set.
 
         Args:
-            observations (list): Observation objects.
+            observations (list, optional): Observation objects. Defaults to None.
             label (str, optional): Name of set. Defaults to "".
             sigmao (float, optional): Observation error relative to normal background error. Defaults to None.
+            columns (dict, optional): Columns with obstimes, lons, lats, stids, elevs,
+                                      values, varnames and sigmaos. Used instead of
+                                      observations. Defaults to None.
 
         """
-        self.size = len(observations)
+        if columns is None:
+            if observations is None:
+                observations = []
+            columns = self.observations2columns(observations)
+
+        self.obstimes = as_datetime64(columns["obstimes"])
+        self.size = self.obstimes.size
+        self.lons = np.asarray(columns["lons"], dtype="float64").reshape(self.size)
+        self.lats = np.asarray(columns["lats"], dtype="float64").reshape(self.size)
+        self.stids = np.array(self.object_column(columns, "stids", "NA"), dtype=str)
+        self.elevs = self.float_column(columns, "elevs", np.nan)
+        self.values = np.asarray(columns["values"], dtype="float64").reshape(self.size)
+        self.varnames = self.object_column(columns, "varnames", None)
+        self.sigmaos = self.float_column(columns, "sigmaos", 1.0)
         self.label = label
-        self.index_pos = {}
-        self.index_stid = {}
+        self.position_index = PositionIndex(self.lons, self.lats)
+        defined_stids = np.nonzero(self.stids != "NA")[0]
+        self.index_stid = dict(
+            zip(self.stids[defined_stids].tolist(), defined_stids.tolist())
+        )
 
         if sigmao is not None:
             logging.info(
                 "Setting sigmao=%s for all observations for label=%s", sigmao, label
             )
-            for obs in observations:
-                obs.sigmao = sigmao
-        self.observations = observations
+            self.sigmaos[:] = sigmao
+
+    def float_column(self, columns, name, default):
+        """Get a float column with a default value if not set.
+
+        Args:
+            columns (dict): Columns
+            name (str): Column name
+            default (float): Default value
+
+        Returns:
+            np.ndarray: Column
+
+        """
+        if name not in columns or columns[name] is None:
+            return np.full(self.size, default, dtype="float64")
+        values = np.array(columns[name], dtype="float64")
+        if values.ndim == 0:
+            values = np.full(self.size, values, dtype="float64")
+        return values
+
+    def object_column(self, columns, name, default):
+        """Get a column of python objects with a default value if not set.
+
+        Args:
+            columns (dict): Columns
+            name (str): Column name
+            default (any): Default value
+
+        Returns:
+            np.ndarray: Column
+
+        """
+        values = np.full(self.size, default, dtype=object)
+        if name in columns and columns[name] is not None:
+            if isinstance(columns[name], (str, np.str_)):
+                values[:] = columns[name]
+            else:
+                values[:] = list(columns[name])
+        return values
+
+    @staticmethod
+    def observations2columns(observations):
+        """Convert a list of observations to columns.
+
+        Args:
+            observations (list): Observation objects.
+
+        Returns:
+            dict: Columns
+
+        """
+        columns = {
+            "obstimes": [],
+            "lons": [],
+            "lats": [],
+            "stids": [],
+            "elevs": [],
+            "values": [],
+            "varnames": [],
+            "sigmaos": [],
+        }
+        for obs in observations:
+            columns["obstimes"].append(obs.obstime)
+            columns["lons"].append(obs.lon)
+            columns["lats"].append(obs.lat)
+            columns["stids"].append(obs.stid)
+            columns["elevs"].append(obs.elev)
+            columns["values"].append(obs.value)
+            columns["varnames"].append(obs.varname)
+            columns["sigmaos"].append(np.nan if obs.sigmao is None else obs.sigmao)
+        return columns
+
+    @property
+    def observations(self):
+        """Observation objects created from the columns."""
+        return [
+            Observation(
+                obstime,
+                lon,
+                lat,
+                value,
+                elev=elev,
+                stid=stid,
+                varname=varname,
+                sigmao=sigmao,
+            )
+            for obstime, lon, lat, stid, elev, value, varname, sigmao in zip(
+                *self.get_obs()
+            )
+        ]
 
     def get_stid_index(self, stid):
         """Get station ID index.
@@ -72,11 +192,9 @@ class ObservationSet(object):
         Returns:
             int: Found position index.
         """
-        lon = Observation.format_lon(lon)
-        lat = Observation.format_lat(lat)
-        pos = lon + ":" + lat
-        if pos in self.index_pos:
-            return self.index_pos[pos]
+        ind = int(self.position_index.lookup([lon], [lat])[0])
+        if ind >= 0:
+            return ind
         else:
             return None
 
@@ -87,31 +205,16 @@ class ObservationSet(object):
             (list, list , list, list, list, list, list): times, lons, lats, stids, elevs,
                                                          values, varnames, sigmaos
         """
-        obs2vectors = np.vectorize(Observation.obs2vectors)
-        logging.debug("Obs dim %s", len(self.observations))
-        if len(self.observations) > 0:
-            times, lons, lats, stids, elevs, values, varnames, sigmaos = obs2vectors(
-                self.observations
-            )
-
-            for point, lon in enumerate(lons):
-                lon = Observation.format_lon(lon)
-                lat = Observation.format_lat(lats[point])
-                stid = str(stids[point])
-
-                pos = lon + ":" + lat
-                self.index_pos.update({pos: point})
-                if stid != "NA":
-                    self.index_stid.update({stid: point})
-
-            times = times.tolist()
-            lons = lons.tolist()
-            lats = lats.tolist()
-            stids = stids.tolist()
-            elevs = elevs.tolist()
-            values = values.tolist()
-            varnames = varnames.tolist()
-            sigmaos = sigmaos.tolist()
+        logging.debug("Obs dim %s", self.size)
+        if self.size > 0:
+            times = from_datetime64(self.obstimes)
+            lons = self.lons.tolist()
+            lats = self.lats.tolist()
+            stids = self.stids.tolist()
+            elevs = self.elevs.tolist()
+            values = self.values.tolist()
+            varnames = self.varnames.tolist()
+            sigmaos = self.sigmaos.tolist()
 
             return times, lons, lats, stids, elevs, values, varnames, sigmaos
         return [], [], [], [], [], [], [], []
@@ -126,16 +229,10 @@ class ObservationSet(object):
             bool: True if found
 
         """
-        found = False
-        for i in range(0, len(self.observations)):
-            if my_obs.obstime == self.observations.obstimes[i]:
-                lon = self.observations.obstimes[i]
-                lat = self.observations.obstimes[i]
-                pos = Observation.format_lon(lon) + ":" + Observation.format_lat(lat)
-
-                if pos in self.index_pos:
-                    found = True
-        return found
+        obstime = as_datetime64([my_obs.obstime])[0]
+        same_time = self.obstimes == obstime
+        indices = self.position_index.lookup(self.lons[same_time], self.lats[same_time])
+        return bool(np.any(indices >= 0))
 
     def points(self, geo, validtime=None):
         """Extract points from observations.
@@ -150,17 +247,16 @@ class ObservationSet(object):
         my_times = []
         my_values = []
         my_stids = []
-        times, lons, lats, stids, __, values, __, __ = self.get_obs()
+        times, __, __, stids, __, values, __, __ = self.get_obs()
 
+        indices = self.position_index.lookup(geo.lonlist, geo.latlist).tolist()
         for i in range(0, geo.nlons):
             lon = geo.lonlist[i]
             lat = geo.latlist[i]
             pos = Observation.format_lon(lon) + ":" + Observation.format_lat(lat)
 
-            lons.append(lon)
-            lats.append(lat)
-            if pos in self.index_pos:
-                ind = self.index_pos[pos]
+            ind = indices[i]
+            if ind >= 0:
                 if validtime is not None:
                     print("No time check implemented yet")
                 my_times.append(times[ind])
@@ -175,36 +271,71 @@ class ObservationSet(object):
         my_values = np.asanyarray(my_values)
         return my_times, my_values, my_stids
 
+    def columns(self):
+        """Get the observation columns.
+
+        Returns:
+            dict: Columns with obstimes, lons, lats, stids, elevs, values, varnames
+                  and sigmaos.
+
+        """
+        return {
+            "obstimes": self.obstimes,
+            "lons": self.lons,
+            "lats": self.lats,
+            "stids": self.stids,
+            "elevs": self.elevs,
+            "values": self.values,
+            "varnames": self.varnames,
+            "sigmaos": self.sigmaos,
+        }
+
     def write_json_file(self, filename, indent=None):
         """Write a json file.
 
+        A columnar file is written if the file name has the columnar extension.
+
         Args:
             filename (str): Name of file
             indent (int, optional): Indentation in file. Defaults to None.
         """
-        obs2vectors = np.vectorize(Observation.obs2vectors)
+        if is_columnar_file(filename):
+            write_columns(filename, self.columns())
+            return
+
         data = {}
-        if len(self.observations) > 0:
-            obstimes, lons, lats, stids, elevs, values, varnames, sigmao = obs2vectors(
-                self.observations
+        obstimes = np.datetime_as_string(self.obstimes, unit="s").tolist()
+        for obs, (obstime, lon, lat, stid, elev, value, varname, sigmao) in enumerate(
+            zip(
+                obstimes,
+                self.lons.tolist(),
+                self.lats.tolist(),
+                self.stids.tolist(),
+                self.elevs.tolist(),
+                self.values.tolist(),
+                self.varnames.tolist(),
+                self.sigmaos.tolist(),
             )
-            for obs, lon in enumerate(lons):
-                data.update(
-                    {
-                        obs: {
-                            "obstime": obstimes[obs].strftime("%Y%m%d%H%M%S"),
-                            "varname": varnames[obs],
-                            "lon": lon,
-                            "lat": lats[obs],
-                            "stid": stids[obs],
-                            "elev": elevs[obs],
-                            "value": values[obs],
-                            "sigmao": sigmao[obs],
-                        }
+        ):
+            data.update(
+                {
+                    obs: {
+                        "obstime": obstime.replace("-", "")
+                        .replace("T", "")
+                        .replace(":", ""),
+                        "varname": varname,
+                        "lon": lon,
+                        "lat": lat,
+                        "stid": stid,
+                        "elev": elev,
+                        "value": value,
+                        "sigmao": sigmao,
                     }
-                )
+                }
+            )
+        # json.dumps uses the C encoder when indent is not set
         with open(filename, mode="w", encoding="utf-8") as file_handler:
-            json.dump(data, file_handler, indent=indent)
+            file_handler.write(json.dumps(data, indent=indent))
 
 
 class NetatmoObservationSet(ObservationSet):
@@ -221,12 +352,14 @@ class NetatmoObservationSet(ObservationSet):
         latrange=None,
         label="netatmo",
         sigmao=None,
+        workers=None,
     ):
         """Construct netatmo obs.
 
         Args:
             filenames (list): Filenames
-            variable (str): Variable
+            variable (str or list): Variable or variables read in one pass over the
+                                    files
             target_time (as_datetime): _description_
             dt (int, optional): _description_. Defaults to 3600.
             re (bool, optional): _description_. Defaults to True.
@@ -234,6 +367,7 @@ class NetatmoObservationSet(ObservationSet):
             latrange (_type_, optional): _description_. Defaults to None.
             label (str, optional): _description_. Defaults to "netatmo".
             sigmao (float, optional): Observation error relative to normal background error. Defaults to None.
+            workers (int, optional): Read the files in this many processes. Defaults to None.
 
         Raises:
             RuntimeError: Lonrange must be a list with length 2
@@ -252,135 +386,285 @@ class NetatmoObservationSet(ObservationSet):
         if not isinstance(latrange, list) or len(latrange) != 2:
             raise RuntimeError(f"Latrange must be a list with length 2 {latrange}")
 
-        data = {}  # key: id, value: list of values
-        times = {}  # key: id, value: list of times
-        metadata = {}
-
-        # Parse json data
-        #
-        # The raw data is not valid JSON, since it is missing commas between lists
-        # e.g. [...][...][...]. Instead format it like this: [..., ..., ...]
-
-        observations = []
-        num_missing_metadata = 0
-        num_missing_obs = 0
-        num_missing_time = 0
-        num_missing_elev = 0
-        num_wrong_time = 0
-        for ifilename in filenames:
-            with open(ifilename, mode="r", encoding="utf-8") as ifile:
-                text = ifile.read()
-
-            try:
-                # Older files had an additional bug. This code will work for both cases
-                if len(text) == 0:
-                    # Sometimes netatmo files are empty
-                    logging.info("Empty file: %s", ifilename)
-                    continue
-
-                if text[0] == "{":
-                    text = f"[{text}"
-
-                text = text.replace("}]{", "}{")
-                text = text.replace("}][{", "},{")
-                text = text.replace("}{", "},{")
-                print(text)
-                text = '{"data": %s}' % text
-                raw = json.loads(text)
-                raw = raw["data"]
-                logging.debug("Parsing %d stations in %s", len(raw), ifilename)
-            except RuntimeError:
-                logging.error("Could not parse %s.", ifilename)
-                continue
-
-            for line in raw:
-                if "data" in line and "_id" in line and "location" in line:
-                    my_id = line["_id"]
-                    location = line["location"]
-                    curr_data = line["data"]
-                    if variable in curr_data:
-                        if "time_utc" in curr_data:
-                            time_utc = curr_data["time_utc"]
-
-                            # Record this observation if it is closer to the target time than any
-                            # other previously parsed observation for this location. Also, only
-                            # ecord if the time difference is within acceptable limits.
-
-                            if "altitude" not in line:
-                                num_missing_elev += 1
-
-                            if not re or "altitude" in line:
-                                lon = location[0]
-                                lat = location[1]
-                                if lonrange[0] <= lon <= lonrange[1]:
-                                    if latrange[0] <= lat <= latrange[1]:
-                                        if my_id not in data:
-                                            data[my_id] = list()
-                                            times[my_id] = list()
-
-                                            elev = np.nan
-                                            metadata[my_id] = {
-                                                "lon": lon,
-                                                "lat": lat,
-                                                "elev": elev,
-                                            }
-                                        if (
-                                            np.isnan(metadata[my_id]["elev"])
-                                            and "altitude" in line
-                                        ):
-                                            metadata[my_id]["elev"] = line["altitude"]
-
-                                        value = curr_data[variable]
-                                        if variable == "Temperature":
-                                            value = value + 273.15
-                                        if variable == "Humidity":
-                                            value = value * 0.01
-                                        data[my_id] += [value]
-                                        times[my_id] += [time_utc]
-                        else:
-                            num_missing_time += 1
-                    else:
-                        num_missing_obs += 1
-                else:
-                    num_missing_metadata += 1
-
+        variables = [variable] if isinstance(variable, str) else list(variable)
+        args = [(ifilename, variables, lonrange, latrange, re) for ifilename in filenames]
+        if workers is not None and workers > 1 and len(filenames) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self.read_file, *zip(*args)))
+        else:
+            results = [self.read_file(*arg) for arg in args]
+
+        # Join the files in the order they were given
+        counters = {
+            "missing_metadata": 0,
+            "missing_obs": 0,
+            "missing_time": 0,
+            "missing_elev": 0,
+        }
+        readings = {
+            var: {
+                "ids": [],
+                "lons": [],
+                "lats": [],
+                "elevs": [],
+                "times": [],
+                "values": [],
+            }
+            for var in variables
+        }
+        for file_readings, file_counters in results:
+            for key, value in file_counters.items():
+                counters[key] = counters[key] + value
+            for var in variables:
+                for key, value in file_readings[var].items():
+                    readings[var][key] = readings[var][key] + value
+
+        var_columns = [
+            self.variable_columns(readings[var], var, target_time, dt)
+            for var in variables
+        ]
+        columns = {
+            name: np.concatenate([var_column[name] for var_column in var_columns])
+            for name in var_columns[0]
+        }
         if target_time is not None:
-            num_valid_stations = 0
-            for my_id, time in times.items():
-                this_diff_times = [
-                    (utcfromtimestamp(t) - target_time).total_seconds() for t in time
-                ]
-                curr_times = [utcfromtimestamp(t) for t in time]
-                if np.min(np.abs(np.array(this_diff_times))) < dt:
-                    ibest = int(np.argmin(np.abs(np.array(this_diff_times))))
-                    curr_time = curr_times[ibest]
-                    elev = metadata[my_id]["elev"]
-                    observations.append(
-                        Observation(
-                            curr_time,
-                            metadata[my_id]["lon"],
-                            metadata[my_id]["lat"],
-                            data[my_id][ibest],
-                            elev=elev,
-                            varname=variable,
-                        )
-                    )
-                    num_valid_stations += 1
+            num_valid_stations = columns["values"].size
         else:
-            num_valid_stations = len(data)
+            num_valid_stations = sum(
+                np.unique(readings[var]["ids"]).size for var in variables
+            )
 
         logging.info("Found %d valid observations:", num_valid_stations)
-        logging.info("   %d missing obs", num_missing_obs)
-        logging.info("   %d missing metadata", num_missing_metadata)
-        logging.info("   %d missing timestamp", num_missing_time)
-        logging.info("   %d wrong timestamp", num_wrong_time)
+        logging.info("   %d missing obs", counters["missing_obs"])
+        logging.info("   %d missing metadata", counters["missing_metadata"])
+        logging.info("   %d missing timestamp", counters["missing_time"])
         if not re:
             extra = " (not removed)"
         else:
             extra = ""
-        logging.debug("   %d missing elev%s", num_missing_elev, extra)
+        logging.debug("   %d missing elev%s", counters["missing_elev"], extra)
+
+        ObservationSet.__init__(self, label=label, sigmao=sigmao, columns=columns)
 
-        ObservationSet.__init__(self, observations, label=label, sigmao=sigmao)
+    @staticmethod
+    def records(filename, chunk_size=1048576):
+        """Read the station records in a netatmo file.
+
+        The files are concatenated json arrays or objects, e.g. [...][...] or {...}{...},
+        which are not valid json. The records are decoded one by one from the text.
+
+        Args:
+            filename (str): Filename
+            chunk_size (int, optional): Characters to read at once. Defaults to 1048576.
+
+        Yields:
+            dict: Station record
+
+        """
+        decoder = json.JSONDecoder()
+        with open(filename, mode="r", encoding="utf-8") as ifile:
+            text = ""
+            pos = 0
+            eof = False
+            while True:
+                # Skip delimiters between the records
+                while pos < len(text) and text[pos] in " \t\r\n,[]":
+                    pos += 1
+                if pos == len(text) or (not eof and len(text) - pos < chunk_size):
+                    if eof:
+                        if pos < len(text):
+                            logging.error("Could not parse the end of %s.", filename)
+                        break
+                    chunk = ifile.read(chunk_size)
+                    eof = len(chunk) < chunk_size
+                    text = text[pos:] + chunk
+                    pos = 0
+                    continue
+                try:
+                    record, pos = decoder.raw_decode(text, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        logging.error("Could not parse %s.", filename)
+                        break
+                    chunk = ifile.read(chunk_size)
+                    eof = len(chunk) < chunk_size
+                    text = text[pos:] + chunk
+                    pos = 0
+                    continue
+                yield record
+
+    @staticmethod
+    def variable_columns(readings, variable, target_time, dt):
+        """Create the columns for a variable from the readings.
+
+        Args:
+            readings (dict): Readings of the variable as from read_file
+            variable (str): Variable
+            target_time (as_datetime): Target time. No observations if None.
+            dt (int): Maximum time difference in seconds from the target time
+
+        Returns:
+            dict: Columns with the reading closest to the target time for each station
+
+        """
+        columns = {
+            "obstimes": np.zeros(0, dtype="datetime64[s]"),
+            "lons": np.zeros(0),
+            "lats": np.zeros(0),
+            "elevs": np.zeros(0),
+            "values": np.zeros(0),
+        }
+        if target_time is not None:
+            best, diff = NetatmoObservationSet.best_times(
+                readings["ids"],
+                np.asarray(readings["times"], dtype="float64"),
+                target_time.timestamp(),
+            )
+            first, elevs = NetatmoObservationSet.station_metadata(
+                readings["ids"], np.asarray(readings["elevs"], dtype="float64")
+            )
+            valid = diff < dt
+            best = best[valid]
+            first = first[valid]
+            elevs = elevs[valid]
+            columns.update(
+                {
+                    "obstimes": np.asarray(readings["times"], dtype="float64")[best]
+                    .astype("int64")
+                    .astype("datetime64[s]"),
+                    "lons": np.asarray(readings["lons"], dtype="float64")[first],
+                    "lats": np.asarray(readings["lats"], dtype="float64")[first],
+                    "elevs": elevs,
+                    "values": np.asarray(readings["values"], dtype="float64")[best],
+                }
+            )
+        columns.update(
+            {"varnames": np.full(columns["values"].size, variable, dtype=object)}
+        )
+        return columns
+
+    @staticmethod
+    def read_file(filename, variables, lonrange, latrange, re=True):
+        """Read the readings of variables from a netatmo file.
+
+        Args:
+            filename (str): Filename
+            variables (list): Variables
+            lonrange (list): Allowed range of longitudes [min, max]
+            latrange (list): Allowed range of latitides [min, max]
+            re (bool, optional): Remove stations without altitude. Defaults to True.
+
+        Returns:
+            tuple: Readings for each variable as lists of ids, lons, lats, elevs, times
+                   and values, and counters for the skipped records
+
+        """
+        if isinstance(variables, str):
+            variables = [variables]
+        readings = {
+            variable: {
+                "ids": [],
+                "lons": [],
+                "lats": [],
+                "elevs": [],
+                "times": [],
+                "values": [],
+            }
+            for variable in variables
+        }
+        counters = {
+            "missing_metadata": 0,
+            "missing_obs": 0,
+            "missing_time": 0,
+            "missing_elev": 0,
+        }
+        nrecords = 0
+        for line in NetatmoObservationSet.records(filename):
+            nrecords += 1
+            if "data" not in line or "_id" not in line or "location" not in line:
+                counters["missing_metadata"] += 1
+                continue
+            curr_data = line["data"]
+            # Time and altitude belong to the record and are counted once
+            if "time_utc" not in curr_data:
+                counters["missing_time"] += 1
+                continue
+            if "altitude" not in line:
+                counters["missing_elev"] += 1
+                if re:
+                    continue
+            for variable in variables:
+                if variable not in curr_data:
+                    counters["missing_obs"] += 1
+                    continue
+                lon = line["location"][0]
+                lat = line["location"][1]
+                if (
+                    lonrange[0] <= lon <= lonrange[1]
+                    and latrange[0] <= lat <= latrange[1]
+                ):
+                    value = curr_data[variable]
+                    if variable == "Temperature":
+                        value = value + 273.15
+                    if variable == "Humidity":
+                        value = value * 0.01
+                    var_readings = readings[variable]
+                    var_readings["ids"].append(line["_id"])
+                    var_readings["lons"].append(lon)
+                    var_readings["lats"].append(lat)
+                    var_readings["elevs"].append(line.get("altitude", np.nan))
+                    var_readings["times"].append(curr_data["time_utc"])
+                    var_readings["values"].append(value)
+        if nrecords == 0:
+            logging.info("Empty file: %s", filename)
+        logging.debug("Parsed %d stations in %s", nrecords, filename)
+        return readings, counters
+
+    @staticmethod
+    def best_times(ids, times, target_time):
+        """Find the reading closest to the target time for each station.
+
+        Args:
+            ids (list): Station id of each reading
+            times (np.ndarray): Time of each reading in seconds since epoch
+            target_time (float): Target time in seconds since epoch
+
+        Returns:
+            tuple: Index of the best reading and its time difference for each station
+                   in the order the stations were found
+
+        """
+        __, first, group = np.unique(ids, return_index=True, return_inverse=True)
+        diff = np.abs(times - target_time)
+        # Sort on station, time difference and reading order. The first is the best.
+        order = np.lexsort((np.arange(diff.size), diff, group))
+        starts = np.ones(order.size, dtype=bool)
+        starts[1:] = group[order][1:] != group[order][:-1]
+        best = order[starts]
+        # Stations in the order they were found
+        station_order = np.argsort(first, kind="stable")
+        best = best[station_order]
+        return best, diff[best]
+
+    @staticmethod
+    def station_metadata(ids, elevs):
+        """Find the first reading and the first defined elevation for each station.
+
+        Args:
+            ids (list): Station id of each reading
+            elevs (np.ndarray): Elevation of each reading
+
+        Returns:
+            tuple: Index of the first reading and the elevation for each station in the
+                   order the stations were found
+
+        """
+        __, first, group = np.unique(ids, return_index=True, return_inverse=True)
+        order = np.lexsort((np.arange(elevs.size), np.isnan(elevs), group))
+        starts = np.ones(order.size, dtype=bool)
+        starts[1:] = group[order][1:] != group[order][:-1]
+        station_order = np.argsort(first, kind="stable")
+        return first[station_order], elevs[order[starts]][station_order]
 
 
 class MetFrostObservations(ObservationSet):
@@ -589,7 +873,15 @@ class MetFrostObservations(ObservationSet):
         #
         ids_obs_dict = {}  # declare outside loop, since may be more than one request
         # check how long the list of stations is and potentially break it up to shorten
-        observations = []
+        columns = {
+            "obstimes": [],
+            "lons": [],
+            "lats": [],
+            "stids": [],
+            "elevs": [],
+            "values": [],
+            "varnames": varname,
+        }
         it_ids = len(ids)
         dt = as_timedelta(seconds=dt)
         while it_ids > 0:
@@ -737,22 +1029,14 @@ class MetFrostObservations(ObservationSet):
                 value = float(station_id)
                 id_info = station_dict[station]
                 stid = str(station)[2:]
-                lat = id_info[0]
-                lon = id_info[1]
-                elev = id_info[2]
-                observations.append(
-                    Observation(
-                        validtime,
-                        lon,
-                        lat,
-                        value,
-                        stid=str(stid),
-                        elev=elev,
-                        varname=varname,
-                    )
-                )
+                columns["obstimes"].append(validtime)
+                columns["lons"].append(id_info[1])
+                columns["lats"].append(id_info[0])
+                columns["stids"].append(str(stid))
+                columns["elevs"].append(id_info[2])
+                columns["values"].append(value)
 
-        ObservationSet.__init__(self, observations, label=label)
+        ObservationSet.__init__(self, label=label, columns=columns)
 
 
 class JsonObservationSet(ObservationSet):
@@ -762,7 +1046,8 @@ class JsonObservationSet(ObservationSet):
         """Construct an observation data set from a json file.
 
         Args:
-            filename (str): Filename
+            filename (str): Filename. Columnar if the file name has the columnar
+                            extension.
             label (str, optional): Label of set. Defaults to "json".
             var (str, optional): Variable name. Defaults to None.
             sigmao (float, optional): Observation error relative to normal background error. Defaults to None.
@@ -771,17 +1056,32 @@ class JsonObservationSet(ObservationSet):
             RuntimeError: Varname is not found
 
         """
+        if is_columnar_file(filename):
+            columns = read_columns(filename)
+            size = columns["obstimes"].size
+            varnames = columns.get("varnames", np.full(size, ""))
+            if var is not None:
+                if np.any(varnames == ""):
+                    raise RuntimeError("Varname is not found ")
+                keep = varnames == var
+                columns = {name: values[keep] for name, values in columns.items()}
+            ObservationSet.__init__(self, label=label, sigmao=sigmao, columns=columns)
+            return
+
         with open(filename, mode="r", encoding="utf-8") as file_handler:
             obs = json.load(file_handler)
-        observations = []
+        columns = {
+            "obstimes": [],
+            "lons": [],
+            "lats": [],
+            "stids": [],
+            "elevs": [],
+            "values": [],
+            "varnames": [],
+            "sigmaos": [],
+        }
         for i in range(0, len(obs)):
             ind = str(i)
-            obstime = as_datetime(obs[ind]["obstime"])
-            lon = obs[ind]["lon"]
-            lat = obs[ind]["lat"]
-            elev = obs[ind]["elev"]
-            value = obs[ind]["value"]
-            stid = obs[ind]["stid"]
             if sigmao is not None:
                 lsigmao = sigmao
             else:
@@ -797,20 +1097,16 @@ class JsonObservationSet(ObservationSet):
                 raise RuntimeError("Varname is not found " + varname)
 
             if var is None or var == varname:
-                observations.append(
-                    Observation(
-                        obstime,
-                        lon,
-                        lat,
-                        value,
-                        stid=stid,
-                        elev=elev,
-                        varname=varname,
-                        sigmao=lsigmao,
-                    )
-                )
+                columns["obstimes"].append(as_datetime(obs[ind]["obstime"]))
+                columns["lons"].append(obs[ind]["lon"])
+                columns["lats"].append(obs[ind]["lat"])
+                columns["stids"].append(obs[ind]["stid"])
+                columns["elevs"].append(obs[ind]["elev"])
+                columns["values"].append(obs[ind]["value"])
+                columns["varnames"].append(varname)
+                columns["sigmaos"].append(lsigmao)
 
-        ObservationSet.__init__(self, observations, label=label, sigmao=sigmao)
+        ObservationSet.__init__(self, label=label, sigmao=sigmao, columns=columns)
 
 
 class ObservationFromTitanJsonFile(ObservationSet):
@@ -827,17 +1123,14 @@ class ObservationFromTitanJsonFile(ObservationSet):
 
         """
         qc_obs = dataset_from_file(an_time, filename)
-        observations = []
-        for i in range(0, len(qc_obs)):
-            observations.append(
-                Observation(
-                    qc_obs.obstimes[i],
-                    qc_obs.lons[i],
-                    qc_obs.lats[i],
-                    qc_obs.elevs[i],
-                    qc_obs.values[i],
-                    sigmao=qc_obs.epsilons[i],
-                )
-            )
-
-        ObservationSet.__init__(self, observations, label=label, sigmao=sigmao)
+        columns = {
+            "obstimes": qc_obs.obstimes,
+            "lons": qc_obs.lons,
+            "lats": qc_obs.lats,
+            "stids": qc_obs.stids,
+            "elevs": qc_obs.elevs,
+            "values": qc_obs.values,
+            "varnames": qc_obs.varnames,
+            "sigmaos": qc_obs.epsilons,
+        }
+        ObservationSet.__init__(self, label=label, sigmao=sigmao, columns=columns)
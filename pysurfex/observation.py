@@ -3,6 +3,8 @@ import json
 
 import numpy as np
 
+from .interpolation import Interpolation
+
 
 class Observation(object):
     """Observation class."""
@@ -146,21 +148,190 @@ class Observation(object):
             list: Station IDs
 
         """
-        index_pos = {}
         with open(stationlist, mode="r", encoding="utf-8") as file_handler:
             ids_from_file = json.load(file_handler)
-        for stid in ids_from_file:
-            lon = ids_from_file[stid]["lon"]
-            lat = ids_from_file[stid]["lat"]
-            pos = Observation.format_lon(lon) + ":" + Observation.format_lat(lat)
-            index_pos.update({pos: stid})
+        list_stids = list(ids_from_file)
+        list_lons = [ids_from_file[stid]["lon"] for stid in list_stids]
+        list_lats = [ids_from_file[stid]["lat"] for stid in list_stids]
+        indices = PositionIndex(list_lons, list_lats).lookup(lons, lats)
 
         stids = []
-        for i, lon in enumerate(lons):
-            lat = lats[i]
-            pos = Observation.format_lon(lon) + ":" + Observation.format_lat(lat)
-            if pos in index_pos:
-                stids.append(index_pos[pos])
+        for ind in indices.tolist():
+            if ind >= 0:
+                stids.append(list_stids[ind])
             else:
                 stids.append("NA")
         return stids
+
+
+class PositionIndex(object):
+    """Index of positions.
+
+    The positions are quantized to the five decimals used when formatting positions
+    and packed in int64 keys. Lookups, duplicate detection and merging are done with
+    sorting instead of a dict with a string per position.
+
+    """
+
+    resolution = 100000
+    lon_bits = 28
+
+    def __init__(self, lons, lats):
+        """Construct a position index.
+
+        Args:
+            lons (list): Longitudes
+            lats (list): Latitudes
+
+        """
+        self.lons = np.asarray(lons, dtype="float64").reshape(-1)
+        self.lats = np.asarray(lats, dtype="float64").reshape(-1)
+        self.keys = self.position_keys(self.lons, self.lats)
+        # The last occurence of a position is found, like for a dict updated in order
+        reversed_keys, first = np.unique(self.keys[::-1], return_index=True)
+        self.sorted_keys = reversed_keys
+        self.sorted_index = self.keys.size - 1 - first
+
+    @staticmethod
+    def position_keys(lons, lats):
+        """Get the int64 key for positions.
+
+        Args:
+            lons (np.ndarray): Longitudes
+            lats (np.ndarray): Latitudes
+
+        Returns:
+            np.ndarray: Keys. -1 for undefined positions.
+
+        """
+        lons = np.asarray(lons, dtype="float64").reshape(-1)
+        lats = np.asarray(lats, dtype="float64").reshape(-1)
+        keys = np.full(lons.size, -1, dtype="int64")
+        valid = np.isfinite(lons) & np.isfinite(lats)
+        lon_keys = np.rint(lons[valid] * PositionIndex.resolution).astype("int64")
+        lat_keys = np.rint(lats[valid] * PositionIndex.resolution).astype("int64")
+        keys[valid] = ((lat_keys + (1 << 27)) << PositionIndex.lon_bits) + (
+            lon_keys + (1 << (PositionIndex.lon_bits - 1))
+        )
+        return keys
+
+    def lookup(self, lons, lats):
+        """Find positions in the index.
+
+        Args:
+            lons (list): Longitudes
+            lats (list): Latitudes
+
+        Returns:
+            np.ndarray: Index of the last occurence of each position. -1 if not found.
+
+        """
+        keys = self.position_keys(lons, lats)
+        if self.sorted_keys.size == 0:
+            return np.full(keys.size, -1, dtype="int64")
+        pos = np.searchsorted(self.sorted_keys, keys)
+        pos[pos == self.sorted_keys.size] = 0
+        found = (self.sorted_keys[pos] == keys) & (keys >= 0)
+        return np.where(found, self.sorted_index[pos], -1)
+
+    def first(self):
+        """Get the first occurence of each position.
+
+        Returns:
+            np.ndarray: Indices of the unique positions in the original order
+
+        """
+        __, first = np.unique(self.keys, return_index=True)
+        return np.sort(first)
+
+    def duplicated(self):
+        """Get the positions occuring earlier in the index.
+
+        Returns:
+            np.ndarray: True if the position is a duplicate.
+
+        """
+        duplicated = np.ones(self.keys.size, dtype=bool)
+        duplicated[self.first()] = False
+        return duplicated
+
+    def nearest(self, lons, lats, window=32):
+        """Find the nearest position in the index.
+
+        The keys are sorted on latitude first. Candidates are taken in windows of the
+        sorted keys moving away from the latitude of each point, until the latitude
+        difference alone is longer than the nearest distance found. Positions
+        sharing a key are represented by the first of them.
+
+        Args:
+            lons (list): Longitudes
+            lats (list): Latitudes
+            window (int, optional): Candidates on each side per step. Defaults to 32.
+
+        Returns:
+            tuple: Index of the nearest position and the distance in meters. -1 and
+                   nan for undefined points or an empty index.
+
+        """
+        lons = np.asarray(lons, dtype="float64").reshape(-1)
+        lats = np.asarray(lats, dtype="float64").reshape(-1)
+        indices = np.full(lons.size, -1, dtype="int64")
+        distances = np.full(lons.size, np.inf)
+
+        keys, first = np.unique(self.keys, return_index=True)
+        candidates = first[keys >= 0]
+        ncandidates = candidates.size
+        candidate_lats = self.lats[candidates]
+        # Latitudes are only sorted to the resolution of the keys
+        slack = 0.5 / self.resolution
+
+        active = np.flatnonzero(np.isfinite(lons) & np.isfinite(lats))
+        if ncandidates == 0:
+            active = active[:0]
+        low = np.searchsorted(candidate_lats, lats[active])
+        high = low.copy()
+        offsets = np.arange(window)
+        while active.size > 0:
+            cand = np.concatenate(
+                [low[:, np.newaxis] - 1 - offsets, high[:, np.newaxis] + offsets], axis=1
+            )
+            inside = (cand >= 0) & (cand < ncandidates)
+            cand = candidates[np.clip(cand, 0, ncandidates - 1)]
+            dist = Interpolation.distance(
+                lons[active, np.newaxis],
+                lats[active, np.newaxis],
+                self.lons[cand],
+                self.lats[cand],
+            )
+            dist[~inside] = np.inf
+            # The first position wins ties like for a search in the original order
+            dist_order = np.lexsort((cand, dist), axis=1)[:, 0]
+            rows = np.arange(active.size)
+            best = dist[rows, dist_order]
+            best_index = cand[rows, dist_order]
+            better = (best < distances[active]) | (
+                (best == distances[active]) & (best_index < indices[active])
+            )
+            distances[active[better]] = best[better]
+            indices[active[better]] = best_index[better]
+
+            # Lower bound of the distance to the remaining candidates
+            low = low - window
+            high = high + window
+            bound = np.full(active.size, np.inf)
+            for remaining, position in [(low > 0, low - 1), (high < ncandidates, high)]:
+                dlat = np.abs(
+                    candidate_lats[position[remaining]] - lats[active[remaining]]
+                )
+                bound[remaining] = np.minimum(
+                    bound[remaining],
+                    Interpolation.distance(0.0, 0.0, 0.0, np.maximum(dlat - slack, 0.0))
+                    * (1.0 - 1e-9),
+                )
+            keep = bound <= distances[active]
+            active = active[keep]
+            low = low[keep]
+            high = high[keep]
+
+        distances[np.isinf(distances)] = np.nan
+        return indices, distances
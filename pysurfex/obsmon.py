@@ -10,6 +10,7 @@ except ImportWarning:
     logging.warning("Could not import sqlite3 modules")
 
 
+from .cache import Cache
 from .datetime_utils import as_datetime
 from .netcdf import read_first_guess_netcdf_file
 from .obs import Observation
@@ -463,10 +464,13 @@ def write_obsmon_sqlite_file(**kwargs):
     geo_in, __, an_field, __, __ = read_first_guess_netcdf_file(an_file, an_var)
     geo_in, __, fg_field, __, __ = read_first_guess_netcdf_file(fg_file, fg_var)
 
+    cache = Cache(-1)
     fg_dep = Departure(
-        operator, geo_in, obs_titan, fg_field, "first_guess"
+        operator, geo_in, obs_titan, fg_field, "first_guess", cache=cache
+    ).get_departure()
+    an_dep = Departure(
+        operator, geo_in, obs_titan, an_field, "analysis", cache=cache
     ).get_departure()
-    an_dep = Departure(operator, geo_in, obs_titan, an_field, "analysis").get_departure()
 
     obs_titan = dataset_from_file(
         an_time, q_c, skip_flags=[150, 199], fg_dep=fg_dep, an_dep=an_dep
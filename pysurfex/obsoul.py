@@ -3,9 +3,8 @@ import logging
 
 import numpy as np
 
-from .datetime_utils import as_datetime, as_timedelta
+from .datetime_utils import as_datetime64, datetime64_from_dates
 from .obs import ObservationSet
-from .observation import Observation
 
 
 class ObservationDataSetFromObsoul(ObservationSet):
@@ -37,103 +36,202 @@ class ObservationDataSetFromObsoul(ObservationSet):
             sigmao (float, optional): Observation error relative to normal background error. Defaults to None.
 
         """
-        observations = []
-        lineno = 0
-        first_line = True
-        lines = content.split("\n")
-        logging.debug("Found %s lines", lines)
-        while lineno < len(lines) - 1:
-            line = lines[lineno]
-            if line.strip() == "":
-                lineno += 1
-            if first_line:
-                line = lines[lineno]
-                parts = line.split()
-                logging.debug("First row parts %s", parts)
-                first_line = False
-                lineno += 1
-
-            # Header
-            line = lines[lineno]
-            logging.debug("Header %s", line)
-            obt = int(line[4:7])
-            subt = int(line[7:17])
-            lon = float(line[17:27])
-            lat = float(line[27:38])
-            stid = line[38:50].replace("'", "").strip()
-            elev = np.nan
-            date = line[50:60].strip()
-            time = int(line[60:67].strip())
-            yyyymmdhhmm = f"{date}{time:06d}"
-            logging.debug("Date=%s Time=%s", date, time)
-            obtime = as_datetime(yyyymmdhhmm)
-            records = int(line[80:86])
-            lineno += 1
-
-            for __ in range(0, records):
-                line = lines[lineno]
-                parts = line.split()
-                logging.debug("Data parts %s", parts)
-                obn = int(parts[0])
-                add_obs = True
-                logging.debug("obtypes=%s obn=%s", obtypes, obn)
-                if obtypes is not None:
-                    if obt in obtypes:
-                        if subtypes is not None:
-                            if subt in subtypes:
-                                pass
-                            else:
-                                logging.debug("Wrong subtype %s %s", subt, subtypes)
-                                add_obs = False
-                    else:
-                        logging.debug("Wrong obtype %s %s", obt, obtypes)
-                        add_obs = False
-
-                if obnumber is not None:
-                    if obn != obnumber:
-                        logging.debug("Wrong obnumber %s %s", obn, obnumber)
-                        add_obs = False
-
-                # Remove if outside window
-                if an_time is not None:
-                    if neg_dt is not None and pos_dt is not None:
-                        n_dt = as_timedelta(seconds=neg_dt)
-                        p_dt = as_timedelta(seconds=pos_dt)
-                        if (an_time - n_dt) <= obtime <= (an_time + p_dt):
-                            pass
-                        else:
-                            logging.debug(
-                                "Outside time window %s %s %s %s",
-                                obtime,
-                                an_time,
-                                n_dt,
-                                p_dt,
-                            )
-                            add_obs = False
-                    else:
-                        logging.debug(
-                            "Not checking time window. neg_dt=%s and/or pos_dt=%s are None",
-                            neg_dt,
-                            pos_dt,
-                        )
-                value = parts[3]
-                logging.debug("Obs %s %s %s %s", lineno, obn, obnumber, add_obs)
-                if add_obs:
-                    observations.append(
-                        Observation(
-                            obtime,
-                            lon,
-                            lat,
-                            value,
-                            elev=elev,
-                            stid=stid,
-                            varname=str(obnumber),
-                            sigmao=sigmao,
-                        )
-                    )
-                lineno += 1
-        logging.debug("nObs %s", len(observations))
-        ObservationSet.__init__(self, observations, label=label)
+        buffer = np.frombuffer(content.encode("utf8"), dtype=np.uint8)
+        starts, ends = self.line_boundaries(buffer)
+        logging.debug("Found %s lines", starts.size)
+
+        # First line is the date of the file
+        if starts.size > 0:
+            logging.debug("First row %s", bytes(buffer[starts[0] : ends[0]]))
+        header_rows = self.header_rows(buffer, starts)
+        logging.debug("Found %s headers", header_rows.size)
+
+        header = self.fixed_width_lines(
+            buffer, starts[header_rows], ends[header_rows], 86
+        )
+        obt = self.fixed_width_field(header, 4, 7).astype("int64")
+        subt = self.fixed_width_field(header, 7, 17).astype("int64")
+        lons = self.fixed_width_field(header, 17, 27).astype("float64")
+        lats = self.fixed_width_field(header, 27, 38).astype("float64")
+        stids = np.char.strip(
+            np.char.replace(self.fixed_width_field(header, 38, 50), b"'", b"")
+        ).astype(str)
+        obtimes = datetime64_from_dates(
+            self.fixed_width_field(header, 50, 60).astype("int64"),
+            self.fixed_width_field(header, 60, 67).astype("int64"),
+        )
+        records = self.fixed_width_field(header, 80, 86).astype("int64")
+
+        # Data records belonging to each header
+        record_header = np.repeat(np.arange(header_rows.size), records)
+        record_rows = np.repeat(
+            header_rows + 1 - (np.cumsum(records) - records), records
+        ) + np.arange(record_header.size)
+        obns, values = self.record_fields(buffer, starts[record_rows], ends[record_rows])
+
+        keep = np.ones(record_header.size, dtype=bool)
+        if obtypes is not None:
+            keep_header = np.isin(obt, obtypes)
+            if subtypes is not None:
+                keep_header &= np.isin(subt, subtypes)
+            keep &= keep_header[record_header]
+        if obnumber is not None:
+            keep &= obns == int(obnumber)
+
+        # Remove if outside window
+        if an_time is not None:
+            if neg_dt is not None and pos_dt is not None:
+                an_time64 = as_datetime64([an_time])[0]
+                obs_times = obtimes[record_header]
+                keep &= (an_time64 - np.timedelta64(int(neg_dt), "s") <= obs_times) & (
+                    obs_times <= an_time64 + np.timedelta64(int(pos_dt), "s")
+                )
+            else:
+                logging.debug(
+                    "Not checking time window. neg_dt=%s and/or pos_dt=%s are None",
+                    neg_dt,
+                    pos_dt,
+                )
+
+        record_header = record_header[keep]
+        columns = {
+            "obstimes": obtimes[record_header],
+            "lons": lons[record_header],
+            "lats": lats[record_header],
+            "stids": stids[record_header],
+            "values": values[keep],
+            "varnames": str(obnumber),
+        }
+        logging.debug("nObs %s", record_header.size)
+        ObservationSet.__init__(self, label=label, sigmao=sigmao, columns=columns)
+
+    @staticmethod
+    def line_boundaries(buffer):
+        """Get the start and end of the non-empty lines in a buffer.
+
+        Args:
+            buffer (np.ndarray): Content as bytes
+
+        Returns:
+            tuple: Start and end positions of the lines
+
+        """
+        newlines = np.flatnonzero(buffer == ord("\n"))
+        starts = np.concatenate(([0], newlines + 1))
+        ends = np.concatenate((newlines, [buffer.size]))
+        non_empty = np.flatnonzero(ends > starts)
+        printable = np.zeros(starts.size, dtype=bool)
+        if non_empty.size > 0:
+            printable[non_empty] = np.logical_or.reduceat(
+                buffer > ord(" "), starts[non_empty]
+            )
+        return starts[printable], ends[printable]
+
+    @staticmethod
+    def header_rows(buffer, starts):
+        """Find the header lines from the number of records in each header.
+
+        Args:
+            buffer (np.ndarray): Content as bytes
+            starts (np.ndarray): Start positions of the lines
+
+        Raises:
+            RuntimeError: If the last header has too few records
+
+        Returns:
+            np.ndarray: Line numbers of the headers
+
+        """
+        header_rows = []
+        row = 1
+        while row < starts.size:
+            header_rows.append(row)
+            position = starts[row]
+            row += 1 + int(bytes(buffer[position + 80 : position + 86]))
+        if len(header_rows) > 0 and row > starts.size:
+            raise RuntimeError("Missing data records in OBSOUL content")
+        return np.array(header_rows, dtype="int64")
+
+    @staticmethod
+    def fixed_width_lines(buffer, starts, ends, width):
+        """Get lines as a matrix of bytes padded with blanks.
+
+        Args:
+            buffer (np.ndarray): Content as bytes
+            starts (np.ndarray): Start positions of the lines
+            ends (np.ndarray): End positions of the lines
+            width (int): Width of the matrix
+
+        Returns:
+            np.ndarray: Lines as bytes with shape (lines, width)
+
+        """
+        positions = starts[:, None] + np.arange(width)
+        inside = positions < ends[:, None]
+        positions = np.where(inside, positions, 0)
+        return np.where(inside, buffer[positions], ord(" ")).astype(np.uint8)
+
+    @staticmethod
+    def fixed_width_field(lines, first, last):
+        """Get a fixed width field from lines as bytes.
+
+        Args:
+            lines (np.ndarray): Lines as bytes with shape (lines, width)
+            first (int): First column of the field
+            last (int): Column after the field
+
+        Returns:
+            np.ndarray: Field as byte strings
+
+        """
+        field = np.ascontiguousarray(lines[:, first:last])
+        return field.view(f"S{last - first}").reshape(lines.shape[0])
+
+    @staticmethod
+    def record_fields(buffer, starts, ends):
+        """Get observation numbers and values from the data records.
+
+        The records are whitespace separated with the observation number as
+        the first and the value as the fourth field.
+
+        Args:
+            buffer (np.ndarray): Content as bytes
+            starts (np.ndarray): Start positions of the records
+            ends (np.ndarray): End positions of the records
+
+        Raises:
+            RuntimeError: If a record has less than four fields
+
+        Returns:
+            tuple: Observation numbers and values
+
+        """
+        blank = np.concatenate(([True], buffer <= ord(" "), [True]))
+        token_starts = np.flatnonzero(~blank[1:-1] & blank[:-2])
+        token_ends = np.flatnonzero(~blank[1:-1] & blank[2:]) + 1
+
+        first_token = np.searchsorted(token_starts, starts)
+        fourth_token = np.minimum(first_token + 3, token_starts.size - 1)
+        if token_starts.size == 0 or np.any(token_starts[fourth_token] >= ends):
+            if starts.size > 0:
+                raise RuntimeError("Data records in OBSOUL content must have four fields")
+            return np.zeros(0, dtype="int64"), np.zeros(0, dtype="float64")
+
+        # Keep only the selected fields and a separator and parse them at once
+        selected = np.zeros(buffer.size + 1, dtype=np.int8)
+        for token in (first_token, fourth_token):
+            selected[token_starts[token]] += 1
+            selected[token_ends[token]] -= 1
+        selected = np.cumsum(selected, dtype=np.int8).astype(bool)
+        selected[token_ends[first_token]] = True
+        selected[token_ends[fourth_token]] = True
+        fields = np.fromstring(
+            np.append(buffer, np.uint8(ord(" ")))[selected].tobytes(), sep=" "
+        )
+        if fields.size != 2 * starts.size:
+            raise RuntimeError("Could not decode data records in OBSOUL content")
+        fields = fields.reshape(starts.size, 2)
+        return fields[:, 0].astype("int64"), fields[:, 1]
 
 
 class ObservationDataSetFromObsoulFile(ObservationDataSetFromObsoul):
@@ -3,6 +3,7 @@ import copy
 import logging
 from abc import ABCMeta, abstractmethod
 
+import numexpr as ne
 import numpy as np
 
 from .interpolation import fill_field
@@ -34,6 +35,40 @@ class ReadData(object):
             "users must define read_time_step to use this base class"
         )
 
+    def set_schedule(self, validtimes):
+        """Precompute what to read for the valid times. Nothing to do by default.
+
+        Args:
+            validtimes (list): Valid times
+
+        """
+
+    def prefetch(self, validtime, cache):
+        """Open input needed for a valid time ahead of reading. Nothing by default.
+
+        Args:
+            validtime (as_datetime): Valid time
+            cache (Cache): Cache
+
+        """
+
+    def get_state(self):
+        """Get the state needed to continue reading. No state by default.
+
+        Returns:
+            dict: State
+
+        """
+        return {}
+
+    def set_state(self, state):
+        """Set the state from a previous run. Nothing to do by default.
+
+        Args:
+            state (dict): State as from get_state
+
+        """
+
 
 # Direct data can be ead with this class with converter = None
 class ConvertedInput(ReadData):
@@ -81,6 +116,43 @@ class ConvertedInput(ReadData):
         """Print info."""
         return self.converter.print_info()
 
+    def set_schedule(self, validtimes):
+        """Precompute basetimes and file names for the valid times.
+
+        Args:
+            validtimes (list): Valid times
+
+        """
+        self.converter.set_schedule(validtimes)
+
+    def prefetch(self, validtime, cache):
+        """Open the input files for a valid time ahead of reading.
+
+        Args:
+            validtime (as_datetime): Valid time
+            cache (Cache): Cache
+
+        """
+        self.converter.prefetch(validtime, cache)
+
+    def get_state(self):
+        """Get the state needed to continue reading.
+
+        Returns:
+            dict: State of the variables in the converter
+
+        """
+        return self.converter.get_state()
+
+    def set_state(self, state):
+        """Set the state from a previous run.
+
+        Args:
+            state (dict): State as from get_state
+
+        """
+        self.converter.set_state(self.geo, state)
+
 
 class ConstantValue(ReadData):
     """Constant value converter."""
@@ -153,6 +225,7 @@ class Converter(object):
         """
         self.name = name
         self.initial_time = initial_time
+        self.variables = []
 
         logging.debug("Converter name: %s", self.name)
         logging.debug("Converter config: %s", conf)
@@ -268,8 +341,55 @@ class Converter(object):
         var = Variable(fileformat, merged_dict, self.initial_time)
 
         logging.debug(var.print_variable_info())
+        self.variables.append(var)
         return var
 
+    def set_schedule(self, validtimes):
+        """Precompute basetimes and file names for all variables in the converter.
+
+        Args:
+            validtimes (list): Valid times
+
+        """
+        for var in self.variables:
+            var.set_schedule(validtimes)
+
+    def prefetch(self, validtime, cache):
+        """Open the files for all variables in the converter ahead of reading.
+
+        Args:
+            validtime (as_datetime): Valid time
+            cache (Cache): Cache
+
+        """
+        for var in self.variables:
+            var.prefetch(validtime, cache)
+
+    def get_state(self):
+        """Get the state of the variables in the converter.
+
+        Returns:
+            dict: State for each variable index with a state
+
+        """
+        state = {}
+        for index, var in enumerate(self.variables):
+            var_state = var.get_state()
+            if var_state is not None:
+                state.update({index: var_state})
+        return state
+
+    def set_state(self, geo, state):
+        """Set the state of the variables in the converter.
+
+        Args:
+            geo (surfex.Geometry): Geometry the variables are read for
+            state (dict): State as from get_state
+
+        """
+        for index, var_state in state.items():
+            self.variables[index].set_state(geo, var_state)
+
     @staticmethod
     def mslp2ps(mslp, altitude, temp):
         """Calcaulate ps from mslp.
@@ -286,15 +406,98 @@ class Converter(object):
         gravity = 9.81
         dry_air = 287.0
 
-        pres = np.multiply(
-            mslp,
-            np.exp(
-                np.divide(np.multiply(-altitude, gravity), np.multiply(dry_air, temp))
-            ),
+        pres = ne.evaluate(
+            "mslp * exp((-altitude * gravity) / (dry_air * temp))",
+            local_dict={
+                "mslp": mslp,
+                "altitude": altitude,
+                "temp": temp,
+                "gravity": gravity,
+                "dry_air": dry_air,
+            },
         )
-
         return pres
 
+    @staticmethod
+    def rh2q(r_h, temp, pres):
+        """Calculate specific humidity from relative humidity.
+
+        ZES = 6.112 * exp((17.67 * (ZT - 273.15)) / ((ZT - 273.15) + 243.5))
+        ZE = ZRH * ZES
+        ZRATIO = 0.622 * ZE / (ZPRES / 100.)
+        RH2Q = 1. / (1. / ZRATIO + 1.)
+
+        Args:
+            r_h (np.ndarray): Relative humidity in %
+            temp (np.ndarray): Temperature in K
+            pres (np.ndarray): Surface pressure in Pa
+
+        Returns:
+            np.ndarray: Specific humidity
+
+        """
+        return ne.evaluate(
+            "0.622 * (r_h / 100.0) * (6.112 * exp((17.67 * (temp - 273.15)) "
+            "/ ((temp - 273.15) + 243.5))) / (pres / 100.0)",
+            local_dict={"r_h": r_h, "temp": temp, "pres": pres},
+        )
+
+    @staticmethod
+    def windspeed(x_wind, y_wind):
+        """Calculate wind speed from wind components.
+
+        Args:
+            x_wind (np.ndarray): Wind component in x direction
+            y_wind (np.ndarray): Wind component in y direction
+
+        Returns:
+            np.ndarray: Wind speed
+
+        """
+        return ne.evaluate(
+            "sqrt(x_wind ** 2 + y_wind ** 2)",
+            local_dict={"x_wind": x_wind, "y_wind": y_wind},
+        )
+
+    @staticmethod
+    def winddir(x_wind, y_wind):
+        """Calculate meteorological wind direction from wind components.
+
+        Args:
+            x_wind (np.ndarray): Wind component in x direction
+            y_wind (np.ndarray): Wind component in y direction
+
+        Returns:
+            np.ndarray: Wind direction in degrees [0, 360)
+
+        """
+        field = ne.evaluate(
+            "90 - arctan2(y_wind, x_wind) * rad2deg",
+            local_dict={"x_wind": x_wind, "y_wind": y_wind, "rad2deg": 180.0 / np.pi},
+        )
+        np.mod(field, 360, out=field)
+        return field
+
+    @staticmethod
+    def totalprec2rain(totalprec, snow):
+        """Calculate rain as total precipitation minus snow.
+
+        Args:
+            totalprec (np.ndarray): Total precipitation
+            snow (np.ndarray): Snow
+
+        Returns:
+            np.ndarray: Rain with negative values set to zero
+
+        """
+        field = ne.evaluate(
+            "totalprec - snow", local_dict={"totalprec": totalprec, "snow": snow}
+        )
+        if np.nanmin(field, initial=0.0) < 0.0:
+            logging.info("Set negative rain values to zero")
+            np.maximum(field, 0.0, out=field)
+        return field
+
     def read_time_step(self, geo, validtime, cache):
         """Read time step.
 
@@ -320,18 +523,11 @@ class Converter(object):
             field_x = self.x_wind.read_variable(geo, validtime, cache)
             field_y = self.y_wind.read_variable(geo, validtime, cache)
             if self.name == "windspeed":
-                field = np.sqrt(np.square(field_x) + np.square(field_y))
-                np.where(field < 0.005, field, 0)
+                field = self.windspeed(field_x, field_y)
             elif self.name == "winddir":
-                field = np.mod(90 - np.rad2deg(np.arctan2(field_y, field_x)), 360)
+                field = self.winddir(field_x, field_y)
 
         elif self.name == "rh2q" or self.name == "rh2q_mslp":
-            """
-            ZES = 6.112 * exp((17.67 * (ZT - 273.15)) / ((ZT - 273.15) + 243.5))
-            ZE = ZRH * ZES
-            ZRATIO = 0.622 * ZE / (ZPRES / 100.)
-            RH2Q = 1. / (1. / ZRATIO + 1.)
-            """
             field_r_h = self.r_h.read_variable(geo, validtime, cache)  # %
             field_temp = self.temp.read_variable(geo, validtime, cache)  # In K
             field_pres = self.pres.read_variable(geo, validtime, cache)  # In Pa
@@ -340,13 +536,7 @@ class Converter(object):
                     geo, validtime, cache
                 )  # In m
                 field_pres = self.mslp2ps(field_pres, field_altitude, field_temp)
-
-            field_p_mb = np.divide(field_pres, 100.0)
-            field_t_c = np.subtract(field_temp, 273.15)
-
-            exp = np.divide(np.multiply(17.67, field_t_c), np.add(field_t_c, 243.5))
-            esat = np.multiply(6.112, np.exp(exp))
-            field = np.divide(np.multiply(0.622, field_r_h / 100.0) * esat, field_p_mb)
+            field = self.rh2q(field_r_h, field_temp, field_pres)
 
         elif self.name == "mslp2ps":
             field_pres = self.pres.read_variable(geo, validtime, cache)  # In Pa
@@ -356,28 +546,35 @@ class Converter(object):
         elif self.name == "totalprec":
             field_totalprec = self.totalprec.read_variable(geo, validtime, cache)
             field_snow = self.snow.read_variable(geo, validtime, cache)
-            field = np.subtract(field_totalprec, field_snow)
-            if any(field[field < 0.0]):
-                logging.info("Set negative rain values to zero")
-                field[field < 0.0] = 0
+            field = self.totalprec2rain(field_totalprec, field_snow)
 
         elif self.name == "calcrain":
             field_totalprec = self.totalprec.read_variable(geo, validtime, cache)
             field_t = self.temp.read_variable(geo, validtime, cache)
-            field = field_totalprec
-            field[field_t <= 274.16] = 0
+            field = ne.evaluate(
+                "where(field_t <= 274.16, 0, field_totalprec)",
+                local_dict={"field_t": field_t, "field_totalprec": field_totalprec},
+            )
         elif self.name == "calcsnow":
             field_totalprec = self.totalprec.read_variable(geo, validtime, cache)
             field_t = self.temp.read_variable(geo, validtime, cache)  # In K
-            field = field_totalprec
-            field[field_t > 274.16] = 0
+            field = ne.evaluate(
+                "where(field_t > 274.16, 0, field_totalprec)",
+                local_dict={"field_t": field_t, "field_totalprec": field_totalprec},
+            )
         elif self.name == "snowplusgraupel":
-            field = self.snow.read_variable(geo, validtime, cache)
-            field += self.graupel.read_variable(geo, validtime, cache)
+            field_snow = self.snow.read_variable(geo, validtime, cache)
+            field_graupel = self.graupel.read_variable(geo, validtime, cache)
+            field = ne.evaluate(
+                "field_snow + field_graupel",
+                local_dict={"field_snow": field_snow, "field_graupel": field_graupel},
+            )
         elif self.name == "phi2m":
             field = self.phi.read_variable(geo, validtime, cache)
-            field = np.divide(field, gravity)
-            field[(field < 0)] = 0.0
+            field = ne.evaluate(
+                "where(field < 0, 0.0, field / gravity)",
+                local_dict={"field": field, "gravity": gravity},
+            )
         elif self.name == "swe2sd":
             field = self.swe.read_variable(geo, validtime, cache)
             rho = self.swe.read_variable(geo, validtime, cache)
@@ -407,7 +604,7 @@ class Converter(object):
                 )
         elif self.name == "sea2land":
             field = self.sea.read_variable(geo, validtime, cache)
-            field = np.subtract(1, field)
+            field = ne.evaluate("1 - field", local_dict={"field": field})
         elif self.name == "tap":
             tap1 = self.tap1.read_variable(geo, validtime, cache)
             tap2 = self.tap2.read_variable(geo, validtime, cache)
@@ -427,8 +624,10 @@ class Converter(object):
         elif self.name == "nature_town":
             nature = self.nature_fraction.read_variable(geo, validtime, cache)
             town = self.town_fraction.read_variable(geo, validtime, cache)
-            field = np.add(nature, town)
-            field[field > 1] = 1.0
+            field = ne.evaluate(
+                "where(nature + town > 1, 1.0, nature + town)",
+                local_dict={"nature": nature, "town": town},
+            )
         elif self.name == "cloud_base":
             logging.info("Converter cloud_base")
 
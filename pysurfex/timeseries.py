@@ -3,7 +3,7 @@ import json
 import logging
 
 from .datetime_utils import as_timedelta
-from .obs import Observation
+from .observation import Observation
 
 
 class TimeSeries(object):
@@ -28,12 +28,6 @@ class TimeSeries(object):
         self.lats = lats
         self.stids = stids
         self.varname = varname
-        self.index_pos = {}
-
-        for i, lon in enumerate(self.lons):
-            lat = self.lats[i]
-            pos = Observation.format_lon(lon) + ":" + Observation.format_lat(lat)
-            self.index_pos.update({pos: i})
 
     def write_json(self, filename, indent=None):
         """Write json file.
@@ -2,7 +2,9 @@
 import abc
 import json
 import logging
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 
@@ -11,10 +13,12 @@ try:
 except ImportError:
     tit = None
 
-from .datetime_utils import as_datetime, as_datetime_string
+from .cache import Cache
+from .columnar import is_columnar_file, read_columns, write_columns
+from .datetime_utils import as_datetime, as_datetime64, dtgs_as_datetime64
 from .interpolation import ObsOperator, inside_grid
 from .netcdf import read_first_guess_netcdf_file
-from .observation import Observation
+from .observation import PositionIndex
 
 
 class QualityControl(object):
@@ -54,19 +58,21 @@ class QualityControl(object):
     def set_flags(global_flags, flags, mask, code):
         """Set flags.
 
+        Observations not flagged before which the test flagged are set to code.
+
         Args:
-            global_flags (list): Global flags
-            flags (list): Test flags
-            mask (list): Active data
+            global_flags (np.ndarray): Global flags
+            flags (list): Test flags for the active data
+            mask (list): Active data as indices in the global flags
             code (int): Code to use for flagging.
 
         Returns:
-            list: Updated global flags.
+            np.ndarray: Updated global flags.
         """
-        imask = np.where((np.array(global_flags) == 0) & (np.array(list(flags)) == 1))[0]
-        imask = np.intersect1d(imask, np.array(mask))
-        if len(imask) > 0:
-            global_flags[imask] = code
+        mask = np.asarray(mask, dtype=int)
+        flagged = mask[(np.asarray(flags) == 1) & (global_flags[mask] == 0)]
+        if flagged.size > 0:
+            global_flags[flagged] = code
 
         return global_flags
 
@@ -82,8 +88,8 @@ class Plausibility(QualityControl):
             maxval (float, optional): Default maximum value. Defaults to None.
 
         """
-        self.minvals = []
-        self.maxvals = []
+        self.minvals = np.zeros(0)
+        self.maxvals = np.zeros(0)
         self.def_min = minval
         self.def_max = maxval
         QualityControl.__init__(self, "plausibility")
@@ -113,14 +119,8 @@ class Plausibility(QualityControl):
         logging.debug("minval: %s", used_min)
         logging.debug("maxval: %s", used_max)
 
-        minvals = []
-        maxvals = []
-        for __ in range(0, size):
-            minvals.append(used_min)
-            maxvals.append(used_max)
-
-        self.minvals = self.minvals + minvals
-        self.maxvals = self.maxvals + maxvals
+        self.minvals = np.concatenate([self.minvals, np.full(size, float(used_min))])
+        self.maxvals = np.concatenate([self.maxvals, np.full(size, float(used_max))])
 
     def test(self, dataset, mask, code=102):
         """Do the test.
@@ -130,31 +130,23 @@ class Plausibility(QualityControl):
             mask (list): Active data.
             code (int, optional): Code to use for flagging. Defaults to 102.
 
-        Raises:
-            ModuleNotFoundError: titanlib was not loaded properly
-
         Returns:
             global_flags(list): Global flags.
 
         """
-        if tit is None:
-            raise ModuleNotFoundError("titanlib was not loaded properly")
-
-        minvals = []
-        maxvals = []
-        values = []
-        for i, mask_ind in enumerate(mask):
-            minvals.append(self.minvals[i])
-            maxvals.append(self.maxvals[i])
-            values.append(dataset.values[mask_ind])
+        mask = np.asarray(mask, dtype=int)
+        minvals = self.minvals[: mask.size]
+        maxvals = self.maxvals[: mask.size]
+        values = dataset.values[mask]
 
+        # Same as titanlib.range_check. Missing values are flagged.
         global_flags = dataset.flags
-        flags = tit.range_check(values, minvals, maxvals)
+        flags = (~((values >= minvals) & (values <= maxvals))).astype(int)
 
-        for i, mask_ind in enumerate(mask):
-            if global_flags[mask_ind] == 0 and flags[i] == 1:
-                global_flags[mask_ind] = code
+        global_flags = self.set_flags(global_flags, flags, mask, code)
 
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return global_flags
         for i, mask_ind in enumerate(mask):
             logging.debug(
                 "test=%s i=%s m_i=%s value(m_i)=%s flag(i)=%s global_flag(m_i)=%s",
@@ -180,6 +172,7 @@ class FirstGuess(QualityControl):
         posdiff=None,
         max_distance=5000,
         operator="bilinear",
+        cache=None,
     ):
         """Construct first guess QC check.
 
@@ -190,6 +183,8 @@ class FirstGuess(QualityControl):
             posdiff (float, optional): Positive difference. Defaults to None.
             max_distance (int, optional): Max distance from grid border. Defaults to 5000.
             operator (str, optional): Interpolation operator. Defaults to "bilinear".
+            cache (surfex.Cache, optional): Cache for observation operators.
+                                            Defaults to None.
 
         """
         self.geo_in = geo_in
@@ -200,6 +195,7 @@ class FirstGuess(QualityControl):
         self.posdiff = []
         self.operator = operator
         self.max_distance = max_distance
+        self.cache = cache
         QualityControl.__init__(self, "firstguess")
 
     def set_input(self, size, posdiff=None, negdiff=None):
@@ -262,6 +258,7 @@ class FirstGuess(QualityControl):
             dataset,
             self.fg_field,
             max_distance=self.max_distance,
+            cache=self.cache,
         )
         fg_vals = fg_operator.get_obs_value()
         minvals = []
@@ -277,12 +274,11 @@ class FirstGuess(QualityControl):
         flags = tit.range_check(values, minvals, maxvals)
 
         global_flags = dataset.flags
-        for i, mask_ind in enumerate(mask):
-            if fg_operator.is_in_grid(mask[i]):
-                if int(global_flags[mask_ind]) == 0 and int(flags[i]) == 1:
-                    global_flags[mask_ind] = code
-            else:
-                global_flags[mask[i]] = 199
+        in_grid = np.array([fg_operator.is_in_grid(ind) for ind in mask], dtype=bool)
+        global_flags = self.set_flags(
+            global_flags, np.where(in_grid, flags, 0), mask, code
+        )
+        global_flags[np.asarray(mask, dtype=int)[~in_grid]] = 199
         for i, mask_ind in enumerate(mask):
             logging.debug(
                 "test=%s i=%s m_i=%s lon(m_i)=%s lat(m_i)=%s min_val(i)=%s value(i)=%s "
@@ -314,6 +310,7 @@ class Fraction(QualityControl):
         maxval=None,
         max_distance=5000,
         operator="bilinear",
+        cache=None,
     ):
         """Construct fraction test.
 
@@ -324,6 +321,8 @@ class Fraction(QualityControl):
             maxval (float, optional): Defualt maximum value. Defaults to None.
             max_distance (int, optional): Max distance from grid border. Defaults to 5000.
             operator (str, optional): Interpolation operator. Defaults to "bilinear".
+            cache (surfex.Cache, optional): Cache for observation operators.
+                                            Defaults to None.
 
         """
         self.geo_in = geo_in
@@ -334,6 +333,7 @@ class Fraction(QualityControl):
         self.max = []
         self.operator = operator
         self.max_distance = max_distance
+        self.cache = cache
         QualityControl.__init__(self, "fraction")
 
     def set_input(self, size, minval=None, maxval=None):
@@ -397,6 +397,7 @@ class Fraction(QualityControl):
             dataset,
             self.fraction_field,
             max_distance=self.max_distance,
+            cache=self.cache,
         )
 
         logging.debug("get_obs_value")
@@ -421,12 +422,11 @@ class Fraction(QualityControl):
         logging.info("Done test")
 
         global_flags = dataset.flags
-        for i, mask_ind in enumerate(mask):
-            if fraction.is_in_grid(mask_ind):
-                if int(global_flags[mask_ind]) == 0 and int(flags[i]) == 1:
-                    global_flags[mask_ind] = code
-            else:
-                global_flags[mask[i]] = 199
+        in_grid = np.array([fraction.is_in_grid(ind) for ind in mask], dtype=bool)
+        global_flags = self.set_flags(
+            global_flags, np.where(in_grid, flags, 0), mask, code
+        )
+        global_flags[np.asarray(mask, dtype=int)[~in_grid]] = 199
 
         for i, mask_ind in enumerate(mask):
             logging.debug(
@@ -449,7 +449,15 @@ class Fraction(QualityControl):
 
 
 class Sct(QualityControl):
-    """Spatial consistency check."""
+    """Spatial consistency check.
+
+    Large observation sets can be split in tiles which are checked in parallel
+    processes. Each tile is extended with a halo of at least outer_radius and only
+    the flags of the observations inside the tile are used.
+
+    """
+
+    earth_radius = 6.37e6
 
     def __init__(
         self,
@@ -468,6 +476,8 @@ class Sct(QualityControl):
         cmin=0.9,
         cmax=1.1,
         missing_elev_to_zero=False,
+        tile_size=None,
+        workers=None,
     ):
         """Construct SCT test.
 
@@ -487,6 +497,10 @@ class Sct(QualityControl):
             cmin (float, optional): cmin. Defaults to 0.9.
             cmax (float, optional): cmax. Defaults to 1.1.
             missing_elev_to_zero (bool, optional): Set missing elevtions to zero. Defaults to False.
+            tile_size (float, optional): Tile size in meters. Defaults to None which
+                                         means no tiling.
+            workers (int, optional): Number of processes checking tiles. Defaults to
+                                     None.
 
         """
         self.num_min = int(num_min)
@@ -503,10 +517,14 @@ class Sct(QualityControl):
         self.def_eps2 = float(eps2)
         self.cmin = cmin
         self.cmax = cmax
-        self.pos = []
-        self.neg = []
-        self.eps2 = []
+        self.pos = np.zeros(0)
+        self.neg = np.zeros(0)
+        self.eps2 = np.zeros(0)
         self.missing_elev_to_zero = missing_elev_to_zero
+        self.tile_size = None
+        if tile_size is not None:
+            self.tile_size = float(tile_size)
+        self.workers = workers
         QualityControl.__init__(self, "sct")
 
     def set_input(self, size, neg=None, pos=None, eps2=None):
@@ -535,17 +553,9 @@ class Sct(QualityControl):
         logging.debug("neg: %s", used_neg)
         logging.debug("eps2: %s", used_eps2)
 
-        pos = []
-        neg = []
-        eps2 = []
-        for __ in range(0, size):
-            pos.append(used_pos)
-            neg.append(used_neg)
-            eps2.append(used_eps2)
-
-        self.pos = self.pos + pos
-        self.neg = self.neg + neg
-        self.eps2 = self.eps2 + eps2
+        self.pos = np.concatenate([self.pos, np.full(size, float(used_pos))])
+        self.neg = np.concatenate([self.neg, np.full(size, float(used_neg))])
+        self.eps2 = np.concatenate([self.eps2, np.full(size, float(used_eps2))])
 
     def test(self, dataset, mask, code=105):
         """Do the test.
@@ -569,48 +579,30 @@ class Sct(QualityControl):
             raise ModuleNotFoundError("titanlib was not loaded properly")
 
         global_flags = dataset.flags
-        lons = []
-        lats = []
-        elevs = []
-        values = []
-
-        old_mask = mask
-        mask = []
-        nmissing_elev = 0
-        for i, old_mask_ind in enumerate(old_mask):
-            if np.isnan(dataset.elevs[old_mask_ind]):
-                if not self.missing_elev_to_zero:
-                    ind = i - nmissing_elev
-                    self.pos.pop(ind)
-                    self.neg.pop(ind)
-                    self.eps2.pop(ind)
-                else:
-                    mask.append(old_mask_ind)
-                nmissing_elev = nmissing_elev + 1
-            else:
-                mask.append(old_mask_ind)
-
-        for i, mask_ind in enumerate(mask):
-            lons.append(dataset.lons[mask_ind])
-            lats.append(dataset.lats[mask_ind])
-            if np.isnan(dataset.elevs[mask_ind] and self.missing_elev_to_zero):
-                elevs.append(0)
-            else:
-                elevs.append(dataset.elevs[mask_ind])
-            values.append(dataset.values[mask_ind])
-
-            # DEBUG
-            if np.isnan(dataset.lons[mask_ind]):
-                logging.error(i, "lon")
-                raise RuntimeError("Longitude is not defined!")
-
-            if np.isnan(dataset.lats[mask_ind]):
-                logging.error(i, "lat")
-                raise RuntimeError("Latitude is not defined!")
-
-            if np.isnan(dataset.values[mask_ind]):
-                logging.error(i, "value")
-                raise RuntimeError("Value is not defined!")
+        old_mask = np.asarray(mask, dtype=int)
+        pos = self.pos[: old_mask.size]
+        neg = self.neg[: old_mask.size]
+        eps2 = self.eps2[: old_mask.size]
+
+        missing_elev = np.isnan(dataset.elevs[old_mask])
+        nmissing_elev = int(np.count_nonzero(missing_elev))
+        mask = old_mask
+        if not self.missing_elev_to_zero:
+            mask = old_mask[~missing_elev]
+            pos = pos[~missing_elev]
+            neg = neg[~missing_elev]
+            eps2 = eps2[~missing_elev]
+
+        values = dataset.values[mask]
+        for name, column in [
+            ("Longitude", dataset.lons[mask]),
+            ("Latitude", dataset.lats[mask]),
+            ("Value", values),
+        ]:
+            undefined = np.flatnonzero(np.isnan(column))
+            if undefined.size > 0:
+                logging.error("%s is not defined for %s", name, mask[undefined[0]])
+                raise RuntimeError(f"{name} is not defined!")
 
         if nmissing_elev > 0:
             if self.missing_elev_to_zero:
@@ -629,35 +621,26 @@ class Sct(QualityControl):
 
         logging.info("Running sct")
         if len(values) > 0:
-            lats = np.asarray(lats)
-            lons = np.asarray(lons)
-            elevs = np.asarray(elevs)
-            values = np.asarray(values)
-            points = tit.Points(lats, lons, elevs)
-            answer = tit.sct(
-                points,
-                values,
-                self.num_min,
-                self.num_max,
-                self.inner_radius,
-                self.outer_radius,
-                self.num_iterations,
-                self.num_min_prof,
-                self.min_elev_diff,
-                self.min_horizonal_scale,
-                self.vertical_scale,
-                self.pos,
-                self.neg,
-                self.eps2,
-            )
+            if self.tile_size is None:
+                points = dataset.titan_points(
+                    mask, missing_elev_to_zero=self.missing_elev_to_zero
+                )
+                answer = tit.sct(points, values, *self.settings(), pos, neg, eps2)
+            else:
+                elevs = dataset.elevs[mask]
+                if self.missing_elev_to_zero:
+                    elevs = np.where(np.isnan(elevs), 0, elevs)
+                answer = self.tiled_sct(
+                    dataset.lons[mask], dataset.lats[mask], elevs, values, pos, neg, eps2
+                )
 
             flags = answer[0]
             sct = answer[1]
             rep = answer[2]
-            for i, mask_ind in enumerate(mask):
-                if int(global_flags[mask_ind]) == 0 and flags[i] == 1:
-                    global_flags[mask_ind] = code
+            global_flags = self.set_flags(global_flags, flags, mask, code)
 
+            if not logging.getLogger().isEnabledFor(logging.DEBUG):
+                return global_flags
             for i, mask_ind in enumerate(mask):
                 logging.debug(
                     "test=%s i=%s m_i=%s value(m_i)=%s sct(i)=%s rep(i)=%s flag(i)=%s "
@@ -676,6 +659,149 @@ class Sct(QualityControl):
 
         return global_flags
 
+    def settings(self):
+        """Get the titanlib.sct settings between the values and pos.
+
+        Returns:
+            tuple: Settings
+        """
+        return (
+            self.num_min,
+            self.num_max,
+            self.inner_radius,
+            self.outer_radius,
+            self.num_iterations,
+            self.num_min_prof,
+            self.min_elev_diff,
+            self.min_horizonal_scale,
+            self.vertical_scale,
+        )
+
+    @staticmethod
+    def tiles(lons, lats, tile_size, halo):
+        """Split positions in overlapping tiles.
+
+        The positions are projected on a plane with the longitudes scaled for the
+        highest latitude. The distance in the plane is never longer than on the
+        sphere, so a neighbour within the outer radius of an observation inside a
+        tile is also within the outer radius in the plane. A halo of at least the
+        outer radius therefore contains all the neighbours. Longitudes are not
+        wrapped.
+
+        Args:
+            lons (np.ndarray): Longitudes
+            lats (np.ndarray): Latitudes
+            tile_size (float): Tile size in meters.
+            halo (float): Halo in meters.
+
+        Returns:
+            list: Tuples with the index of the positions inside each tile and the
+                  index of the positions in the tile including the halo.
+
+        """
+        coslat = max(np.cos(np.radians(np.max(np.abs(lats)))), 0.01)
+        xvals = Sct.earth_radius * np.radians(lons) * coslat
+        yvals = Sct.earth_radius * np.radians(lats)
+        xvals = xvals - xvals.min()
+        yvals = yvals - yvals.min()
+        ix_tile = np.floor(xvals / tile_size).astype(int)
+        iy_tile = np.floor(yvals / tile_size).astype(int)
+
+        x_order = np.argsort(xvals, kind="stable")
+        sorted_x = xvals[x_order]
+        tiles = []
+        for ix_val in np.unique(ix_tile):
+            first, last = np.searchsorted(
+                sorted_x, [ix_val * tile_size - halo, (ix_val + 1) * tile_size + halo]
+            )
+            band = np.sort(x_order[first:last])
+            band_interior = ix_tile[band] == ix_val
+            for iy_val in np.unique(iy_tile[band[band_interior]]):
+                in_tile = (yvals[band] >= iy_val * tile_size - halo) & (
+                    yvals[band] < (iy_val + 1) * tile_size + halo
+                )
+                interior = band_interior & (iy_tile[band] == iy_val)
+                tiles.append((band[interior], band[in_tile]))
+        return tiles
+
+    def tiled_sct(self, lons, lats, elevs, values, pos, neg, eps2):
+        """Run SCT in tiles.
+
+        Args:
+            lons (np.ndarray): Longitudes
+            lats (np.ndarray): Latitudes
+            elevs (np.ndarray): Elevations
+            values (np.ndarray): Values
+            pos (np.ndarray): pos
+            neg (np.ndarray): neg
+            eps2 (np.ndarray): eps2
+
+        Returns:
+            tuple: Flags, sct and rep like titanlib.sct
+
+        """
+        tiles = self.tiles(lons, lats, self.tile_size, self.outer_radius)
+        logging.info(
+            "Running sct in %s tiles of %s m with workers=%s",
+            len(tiles),
+            self.tile_size,
+            self.workers,
+        )
+        args = [
+            (
+                lats[tile],
+                lons[tile],
+                elevs[tile],
+                values[tile],
+                self.settings(),
+                pos[tile],
+                neg[tile],
+                eps2[tile],
+            )
+            for __, tile in tiles
+        ]
+        if self.workers == 1 or len(tiles) == 1:
+            results = [sct_tile(*tile_args) for tile_args in args]
+        else:
+            # Spawn the processes as HDF5 is not fork safe once netCDF files are opened
+            with ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                results = list(executor.map(sct_tile, *zip(*args)))
+
+        flags = np.zeros(values.size, dtype=int)
+        sct = np.full(values.size, np.nan)
+        rep = np.full(values.size, np.nan)
+        for (interior, tile), result in zip(tiles, results):
+            # Only observations inside the tile take the result from the tile
+            in_tile = np.searchsorted(tile, interior)
+            flags[interior] = result[0][in_tile]
+            sct[interior] = result[1][in_tile]
+            rep[interior] = result[2][in_tile]
+        return flags, sct, rep
+
+
+def sct_tile(lats, lons, elevs, values, settings, pos, neg, eps2):
+    """Run titanlib.sct for a tile.
+
+    Args:
+        lats (np.ndarray): Latitudes
+        lons (np.ndarray): Longitudes
+        elevs (np.ndarray): Elevations
+        values (np.ndarray): Values
+        settings (tuple): Sct settings between values and pos
+        pos (np.ndarray): pos
+        neg (np.ndarray): neg
+        eps2 (np.ndarray): eps2
+
+    Returns:
+        tuple: Flags, sct and rep as arrays
+
+    """
+    points = tit.Points(lats, lons, elevs)
+    answer = tit.sct(points, values, *settings, pos, neg, eps2)
+    return np.asarray(answer[0]), np.asarray(answer[1]), np.asarray(answer[2])
+
 
 class Buddy(QualityControl):
     """Buddy test."""
@@ -799,18 +925,9 @@ class Buddy(QualityControl):
         global_flags = dataset.flags
         # Buddy does not work properly for dataset.
         # Also without data set the values must be set without subscripts
-
-        lons = []
-        lats = []
-        elevs = []
-        values = []
-        for i in range(0, len(mask)):
-            lons.append(dataset.lons[i])
-            lats.append(dataset.lats[i])
-            elevs.append(dataset.elevs[i])
-            values.append(dataset.values[i])
-
-        points = tit.Points(lats, lons, elevs)
+        mask = np.asarray(mask, dtype=int)
+        values = dataset.values[mask]
+        points = dataset.titan_points(mask)
         status, flags = tit.buddy_check(
             points,
             values,
@@ -825,18 +942,18 @@ class Buddy(QualityControl):
         if not status:
             raise RuntimeError("Buddy check failed!")
 
-        for i, mask_ind in enumerate(mask):
-            if global_flags[mask_ind] == 0 and flags[i] == 1:
-                global_flags[mask_ind] = code
+        global_flags = self.set_flags(global_flags, flags, mask, code)
 
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return global_flags
         for i, mask_ind in enumerate(mask):
             logging.debug(
                 "test=%s i=%s m_i=%s value=%s flag(i)=%s global_flag(m_i)=%s",
                 self.name,
                 i,
                 mask_ind,
-                dataset.values[i],
-                dataset.flags[i],
+                values[i],
+                flags[i],
                 global_flags[mask_ind],
             )
 
@@ -862,9 +979,9 @@ class Climatology(QualityControl):
         self.def_min = minval
         self.def_max = maxval
         self.def_offset = offset
-        self.offset = []
-        self.minvals = []
-        self.maxvals = []
+        self.offset = np.zeros(0)
+        self.minvals = np.zeros(0)
+        self.maxvals = np.zeros(0)
         QualityControl.__init__(self, "climatology")
 
     def set_input(self, size, minval=None, maxval=None, offset=None):
@@ -892,16 +1009,9 @@ class Climatology(QualityControl):
         if used_min is None or used_max is None:
             raise RuntimeError("You must set min and max values!")
 
-        minvals = []
-        maxvals = []
-        offset = []
-        for __ in range(0, size):
-            minvals.append(used_min)
-            maxvals.append(used_max)
-            offset.append(used_offset)
-        self.minvals = self.minvals + minvals
-        self.maxvals = self.maxvals + maxvals
-        self.offset = self.offset + offset
+        self.minvals = np.concatenate([self.minvals, np.full(size, float(used_min))])
+        self.maxvals = np.concatenate([self.maxvals, np.full(size, float(used_max))])
+        self.offset = np.concatenate([self.offset, np.full(size, float(used_offset))])
 
     def test(self, dataset, mask, code=103):
         """Do the test.
@@ -915,27 +1025,26 @@ class Climatology(QualityControl):
             global_flags(list): Global flags.
 
         """
-        lons = []
-        lats = []
-        elevs = []
-        values = []
-        for obs, mask_ind in enumerate(mask):
-            lons.append(dataset.lons[mask_ind])
-            lats.append(dataset.lats[mask_ind])
-            elevs.append(dataset.elevs[mask_ind])
-            val = dataset.values[mask_ind] + self.offset[obs]
-            values.append(val)
+        mask = np.asarray(mask, dtype=int)
+        lons = dataset.lons[mask]
+        lats = dataset.lats[mask]
+        elevs = dataset.elevs[mask]
+        values = dataset.values[mask] + self.offset[: mask.size]
 
         points = tit.Points(lats, lons, elevs)
         flags = tit.range_check_climatology(
-            points, values, self.unixtime, self.maxvals, self.minvals
+            points,
+            values,
+            self.unixtime,
+            self.maxvals[: mask.size],
+            self.minvals[: mask.size],
         )
 
         global_flags = dataset.flags
-        for i, mask_ind in enumerate(mask):
-            if int(global_flags[mask_ind]) == 0 and int(flags[i]) == 1:
-                global_flags[mask_ind] = code
+        global_flags = self.set_flags(global_flags, flags, mask, code)
 
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return global_flags
         for i, mask_ind in enumerate(mask):
             logging.debug(
                 "test=%s i=%s m_i=%s lon(i)=%s lat(i)=%s elev(i)=%s min_val(i)=%s "
@@ -983,40 +1092,25 @@ class Redundancy(QualityControl):
             flags(list): Flags.
 
         """
-        data = {}
         flags = dataset.flags
-        for i, lon_val in enumerate(dataset.lons):
-            if i in mask:
-                lon1 = f"{float(lon_val):10.5f}"
-                lat1 = f"{float(dataset.lats[i]):10.5f}"
-                obstime1 = dataset.obstimes[i]
-                pos = str(lon1) + ":" + str(lat1)
-
-                if pos in data:
-                    obstime = data[pos]["obstime"]
-                    logging.debug(
-                        "Found a redundant observation %s %s %s %s",
-                        i,
-                        pos,
-                        dataset.stids[i],
-                        obstime1,
-                    )
-                    # New best position in time. Flag the previous
-                    if abs(self.an_time - obstime1) < abs(self.an_time - obstime):
-                        logging.debug(
-                            "Found a better redundant observation %s %s %s",
-                            pos,
-                            obstime1,
-                            obstime,
-                        )
-                        ind = data[pos]["index"]
-                        flags[ind] = code
-                        data.update({pos: {"obstime": obstime, "index": i}})
-                    else:
-                        flags[i] = code
-                else:
-                    data.update({pos: {"obstime": obstime1, "index": i}})
-
+        mask = np.asarray(mask, dtype=int)
+        keys = PositionIndex.position_keys(dataset.lons[mask], dataset.lats[mask])
+        an_time = as_datetime64([self.an_time])[0]
+        time_diff = np.abs((dataset.obstimes[mask] - an_time).astype("int64"))
+
+        # Group on position and keep the observation closest in time. The first
+        # observation is kept if several are equally close.
+        order = np.lexsort((mask, time_diff, keys))
+        sorted_keys = keys[order]
+        redundant = np.ones(mask.size, dtype=bool)
+        redundant[0:1] = False
+        redundant[1:] = sorted_keys[1:] == sorted_keys[:-1]
+        redundant = mask[order[redundant]]
+        logging.debug("Found %s redundant observations", redundant.size)
+        flags[redundant] = code
+
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return flags
         for i, mask_ind in enumerate(mask):
             logging.debug(
                 "test=%s i=%s m_i=%s time(m_i)=%s value(m_i)=%s flags(i)=%s ",
@@ -1048,30 +1142,24 @@ class Blacklist(QualityControl):
         if blacklist is None or not isinstance(blacklist, dict):
             raise RuntimeError("You must set blacklist as a dict")
 
-        blacklist_pos = {}
-        blacklist_stid = {}
+        lons = []
+        lats = []
         if "lons" in blacklist and "lats" in blacklist:
-            for i in range(0, len(blacklist["lons"])):
-
-                if len(blacklist["lons"]) != len(blacklist["lats"]):
-                    raise RuntimeError(
-                        "Blacklist must have the same length for both lons and lats"
-                    )
-
-                lon = Observation.format_lon(float(blacklist["lons"][i]))
-                lat = Observation.format_lat(float(blacklist["lats"][i]))
-                pos = str(lon) + ":" + str(lat)
-                blacklist_pos.update({pos: 1})
+            if len(blacklist["lons"]) != len(blacklist["lats"]):
+                raise RuntimeError(
+                    "Blacklist must have the same length for both lons and lats"
+                )
+            lons = blacklist["lons"]
+            lats = blacklist["lats"]
 
+        stids = []
         if "stids" in blacklist:
-            for i in range(0, len(blacklist["stids"])):
-                stid = str(blacklist["stids"][i])
+            stids = [str(stid) for stid in blacklist["stids"] if str(stid) != "NA"]
 
-                if stid != "NA":
-                    blacklist_stid.update({str(stid): 1})
-
-        self.blacklist_pos = blacklist_pos
-        self.blacklist_stid = blacklist_stid
+        self.blacklist_pos = PositionIndex(
+            np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)
+        )
+        self.blacklist_stid = np.unique(np.asarray(stids, dtype=str))
         QualityControl.__init__(self, "blacklist")
 
     def set_input(self, __):
@@ -1090,22 +1178,16 @@ class Blacklist(QualityControl):
 
         """
         flags = dataset.flags
-        for i, lon_val in enumerate(dataset.lons):
-            if i in mask:
-
-                lon = Observation.format_lon(lon_val)
-                lat = Observation.format_lat(dataset.lats[i])
-                stid = dataset.stids[i]
-                pos = lon + ":" + lat
-
-                logging.debug("lon=%s lat=%s stid=%s pos=%s", lon, lat, stid, pos)
-                if pos in self.blacklist_pos:
-                    logging.debug("Found blacklisted position: %s", pos)
-                    flags[i] = code
-                if str(stid) in self.blacklist_stid:
-                    logging.debug("Found blacklisted stid: %s", str(stid))
-                    flags[i] = code
+        mask = np.asarray(mask, dtype=int)
+        blacklisted = (
+            self.blacklist_pos.lookup(dataset.lons[mask], dataset.lats[mask]) >= 0
+        )
+        blacklisted |= np.isin(dataset.stids[mask].astype(str), self.blacklist_stid)
+        logging.debug("Found %s blacklisted observations", np.count_nonzero(blacklisted))
+        flags[mask[blacklisted]] = code
 
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return flags
         for i, mask_ind in enumerate(mask):
             logging.debug(
                 "test=%s i=%s m_i=%s lon(m_i)=%s lat(m_i)=%s stid(m_i)=%s flag(m_i)=%s",
@@ -1204,9 +1286,11 @@ class NoMeta(QualityControl):
 
         """
         flags = dataset.flags
-        for mask_ind in mask:
-            if np.isnan(dataset.elevs[mask_ind]):
-                flags[mask_ind] = code
+        mask = np.asarray(mask, dtype=int)
+        flags[mask[np.isnan(dataset.elevs[mask])]] = code
+
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return flags
 
         for i, mask_ind in enumerate(mask):
             logging.debug(
@@ -1223,15 +1307,47 @@ class NoMeta(QualityControl):
         return flags
 
 
-def define_quality_control(test_list, settings, an_time, domain_geo=None, blacklist=None):
+def read_first_guess_field(filename, var, cache=None):
+    """Read a first guess field, re-using fields already read into the cache.
+
+    Args:
+        filename (str): NetCDF first guess file.
+        var (str): Variable name.
+        cache (surfex.Cache, optional): Cache. Defaults to None.
+
+    Returns:
+        tuple:  geo, validtime, background, glafs, gelevs
+
+    """
+    if cache is None:
+        return read_first_guess_netcdf_file(filename, var)
+
+    field_id = (os.path.abspath(filename), var)
+    with cache.lock:
+        if field_id in cache.first_guess_fields:
+            logging.info("Using cached field %s from %s", var, filename)
+        else:
+            cache.first_guess_fields[field_id] = read_first_guess_netcdf_file(
+                filename, var
+            )
+        return cache.first_guess_fields[field_id]
+
+
+def define_quality_control(
+    test_list, settings, an_time, domain_geo=None, blacklist=None, cache=None
+):
     """Define different QC test from a dict.
 
+    The first guess and fraction fields and the observation operators are shared
+    between the tests in a cache.
+
     Parameters:
         test_list(list): List of tests
         settings(dict): Test settings
         an_time(datetime.datetime): Analysis time
         domain_geo(surfex.Geo): Geo object
         blacklist(dict): Optional blacklist. Needd for blacklist test
+        cache(surfex.Cache): Cache to use. A new cache is created if not set.
 
     Raises:
         NotImplementedError: Test not implemented
@@ -1244,6 +1360,8 @@ def define_quality_control(test_list, settings, an_time, domain_geo=None, blackl
         tests(list): List of QualityControl objects
 
     """
+    if cache is None:
+        cache = Cache(-1)
     tests = []
     for qct in test_list:
         logging.info("Set up test: %s", qct)
@@ -1281,13 +1399,13 @@ def define_quality_control(test_list, settings, an_time, domain_geo=None, blackl
             if fg_geo is None and fg_field is None:
                 if fg_file is None or fg_var is None:
                     raise RuntimeError("You must set the name of fg file and variable")
-                fg_geo, __, fg_field, __, __ = read_first_guess_netcdf_file(
-                    fg_file, fg_var
+                fg_geo, __, fg_field, __, __ = read_first_guess_field(
+                    fg_file, fg_var, cache=cache
                 )
             else:
                 if fg_geo is None or fg_field is None:
                     raise RuntimeError("You must set both fg_field and fg_geo")
-            tests.append(FirstGuess(fg_geo, fg_field, **kwargs))
+            tests.append(FirstGuess(fg_geo, fg_field, cache=cache, **kwargs))
 
         elif qct.lower() == "fraction":
             kwargs.update({"minval": 0.99, "maxval": 1.01})
@@ -1315,15 +1433,15 @@ def define_quality_control(test_list, settings, an_time, domain_geo=None, blackl
                         "You must set the name of fraction file and variable"
                     )
 
-                fraction_geo, __, fraction_field, __, __ = read_first_guess_netcdf_file(
-                    fraction_file, fraction_var
+                fraction_geo, __, fraction_field, __, __ = read_first_guess_field(
+                    fraction_file, fraction_var, cache=cache
                 )
             else:
                 if fraction_field is None or fraction_geo is None:
                     raise RuntimeError(
                         "You must set both fraction_field and fraction_geo"
                     )
-            tests.append(Fraction(fraction_geo, fraction_field, **kwargs))
+            tests.append(Fraction(fraction_geo, fraction_field, cache=cache, **kwargs))
 
         elif qct.lower() == "buddy":
             if test_options is not None:
@@ -1367,6 +1485,8 @@ def define_quality_control(test_list, settings, an_time, domain_geo=None, blackl
                     "eps2",
                     "cmin",
                     "cmax",
+                    "tile_size",
+                    "workers",
                 ]
                 for opt in opts:
                     if opt in test_options:
@@ -1412,7 +1532,25 @@ def define_quality_control(test_list, settings, an_time, domain_geo=None, blackl
 
 
 class QCDataSet(object):
-    """QC data set."""
+    """QC data set.
+
+    Passed tests are stored as a bitmask per observation with one bit for each
+    test in test_names.
+
+    """
+
+    test_names = [
+        "domain",
+        "blacklist",
+        "nometa",
+        "plausibility",
+        "redundancy",
+        "firstguess",
+        "fraction",
+        "buddy",
+        "climatology",
+        "sct",
+    ]
 
     def __init__(
         self,
@@ -1425,87 +1563,208 @@ class QCDataSet(object):
         fg_dep=None,
         an_dep=None,
         remove_invalid_elevs=False,
+        columns=None,
     ):
         """Construct QC data set.
 
         Args:
             analysis_time (datetime.datetime): Analysis time
-            observations (list): Observation objects.
+            observations (list): Observation objects. Not used if columns are set.
             flags (list): Flags
             lafs (list): Land area fraction
             providers (list): Providers.
-            passed_tests (list, optional): Tests which have been passed. Defaults to None.
+            passed_tests (list, optional): Tests which have been passed as a bitmask
+                                           or test names per observation.
+                                           Defaults to None.
             fg_dep (list, optional): First guess departures. Defaults to None.
             an_dep (list, optional): Analysis depatures. Defaults to None.
             remove_invalid_elevs (bool, optional): Remove invalid elevations. Defaults to False.
+            columns (dict, optional): Columns with obstimes, lons, lats, stids, elevs,
+                                      values, varnames and epsilons. Used instead of
+                                      observations. Defaults to None.
 
         """
         self.analysis_time = analysis_time
-        self.index_pos = {}
-        self.index_stid = {}
-        obstimes = []
-        lons = []
-        lats = []
-        elevs = []
-        stids = []
-        values = []
-        varnames = []
-        epsilons = []
-        for i, observation in enumerate(observations):
-            obstimes.append(observation.obstime)
-            lons.append(observation.lon)
-            lats.append(observation.lat)
-            stids.append(observation.stid)
-            elevs.append(observation.elev)
-            values.append(observation.value)
-            varnames.append(observation.varname)
-            epsilons.append(observation.sigmao)
-
-            lon = f"{float(observation.lon):10.5f}"
-            lat = f"{float(observation.lat):10.5f}"
-            stid = str(observation.stid)
-
-            pos = lon + ":" + lat
-            self.index_pos.update({pos: i})
-            if stid != "NA":
-                self.index_stid.update({stid: i})
-
-        self.obstimes = obstimes
-        self.lons = lons
-        self.lats = lats
-        self.elevs = elevs
-        self.stids = stids
-        self.values = values
-        self.varnames = varnames
-        self.epsilons = epsilons
-
-        self.flags = flags
-
-        metadata = 0
-        for i in range(0, len(flags)):
-            if remove_invalid_elevs and np.isnan(elevs[i]):
-                self.flags[i] = 101
-                metadata = metadata + 1
-        self.metadata = metadata
-        self.lafs = lafs
-        self.providers = providers
+        if columns is None:
+            columns = self.observations2columns(observations)
+
+        self.obstimes = as_datetime64(columns["obstimes"])
+        size = self.obstimes.size
+        self.lons = np.asarray(columns["lons"], dtype="float64").reshape(size)
+        self.lats = np.asarray(columns["lats"], dtype="float64").reshape(size)
+        self.elevs = np.asarray(columns["elevs"], dtype="float64").reshape(size)
+        self.stids = np.array(columns["stids"], dtype=str).reshape(size)
+        self.values = np.asarray(columns["values"], dtype="float64").reshape(size)
+        self.varnames = np.full(size, None, dtype=object)
+        if columns.get("varnames") is not None:
+            self.varnames[:] = list(columns["varnames"])
+        self.epsilons = np.array(columns["epsilons"], dtype="float64").reshape(size)
+
+        self.position_index = PositionIndex(self.lons, self.lats)
+        defined_stids = np.flatnonzero(self.stids != "NA")
+        self.index_stid = dict(
+            zip(self.stids[defined_stids].tolist(), defined_stids.tolist())
+        )
+
+        self.flags = np.array(flags, dtype="float64").reshape(size)
+        self.metadata = 0
+        if remove_invalid_elevs:
+            invalid_elevs = np.isnan(self.elevs)
+            self.flags[invalid_elevs] = 101
+            self.metadata = int(np.count_nonzero(invalid_elevs))
+        self.lafs = np.asarray(lafs, dtype="float64").reshape(size)
+        self.providers = np.array(providers, dtype=str).reshape(size)
         if passed_tests is None:
-            passed_tests = []
-            for __ in range(0, len(observations)):
-                passed_tests.append([])
-            self.passed_tests = passed_tests
-        else:
-            self.passed_tests = passed_tests
+            passed_tests = np.zeros(size, dtype="int64")
+        self.passed_tests = self.passed_tests_bitmask(passed_tests)
         if fg_dep is None:
-            fg_dep = []
-            for __ in range(0, len(observations)):
-                fg_dep.append(np.nan)
-        self.fg_dep = fg_dep
+            fg_dep = np.full(size, np.nan)
+        self.fg_dep = np.asarray(fg_dep, dtype="float64").reshape(size)
         if an_dep is None:
-            an_dep = []
-            for __ in range(0, len(observations)):
-                an_dep.append(np.nan)
-        self.an_dep = an_dep
+            an_dep = np.full(size, np.nan)
+        self.an_dep = np.asarray(an_dep, dtype="float64").reshape(size)
+
+        # Spatial points for the last active mask shared between tests
+        self.points_mask = None
+        self.points = None
+        self.points_built = 0
+        self.points_reused = 0
+
+    def titan_points(self, mask, missing_elev_to_zero=False):
+        """Get titanlib points for the active observations.
+
+        The points and the spatial index titanlib builds for them are reused as long
+        as the active observations are the same.
+
+        Args:
+            mask (np.ndarray): Active data.
+            missing_elev_to_zero (bool, optional): Set missing elevations to zero.
+                                                   Defaults to False.
+
+        Raises:
+            ModuleNotFoundError: titanlib was not loaded properly
+
+        Returns:
+            titanlib.Points: Points for the active observations.
+
+        """
+        if tit is None:
+            raise ModuleNotFoundError("titanlib was not loaded properly")
+
+        mask = np.asarray(mask, dtype=int)
+        elevs = self.elevs[mask]
+        missing_elevs = np.isnan(elevs)
+        missing_elev_to_zero = missing_elev_to_zero and bool(missing_elevs.any())
+        if (
+            self.points is not None
+            and self.points_mask[1] == missing_elev_to_zero
+            and np.array_equal(self.points_mask[0], mask)
+        ):
+            self.points_reused = self.points_reused + 1
+            return self.points
+
+        if missing_elev_to_zero:
+            elevs[missing_elevs] = 0
+        logging.debug("Build points for %s observations", mask.size)
+        self.points = tit.Points(self.lats[mask], self.lons[mask], elevs)
+        self.points_mask = (mask, missing_elev_to_zero)
+        self.points_built = self.points_built + 1
+        return self.points
+
+    @staticmethod
+    def test_bit(name):
+        """Get the bit for a test in the passed tests bitmask.
+
+        Args:
+            name (str): Test name
+
+        Raises:
+            NotImplementedError: Test is not known
+
+        Returns:
+            int: Bit
+
+        """
+        if name not in QCDataSet.test_names:
+            raise NotImplementedError(f"Test {name} is not implemented")
+        return 1 << QCDataSet.test_names.index(name)
+
+    @staticmethod
+    def passed_tests_bitmask(passed_tests):
+        """Convert passed tests to a bitmask per observation.
+
+        Args:
+            passed_tests (list): Integer bitmask array or test names per observation
+                                 as lists or comma separated strings.
+
+        Returns:
+            np.ndarray: Bitmask
+
+        """
+        if isinstance(passed_tests, np.ndarray) and passed_tests.dtype.kind in "iu":
+            return passed_tests.astype("int64")
+        bitmasks = {}
+        bitmask = np.zeros(len(passed_tests), dtype="int64")
+        for i, tests in enumerate(passed_tests):
+            if isinstance(tests, str):
+                tests = tests.split(",") if tests != "" else []
+            tests = tuple(tests)
+            if tests not in bitmasks:
+                bitmasks[tests] = sum(QCDataSet.test_bit(name) for name in tests)
+            bitmask[i] = bitmasks[tests]
+        return bitmask
+
+    @staticmethod
+    def passed_tests_names(bitmask):
+        """Convert a passed tests bitmask to test names per observation.
+
+        Args:
+            bitmask (np.ndarray): Bitmask
+
+        Returns:
+            list: Passed test names per observation in test order.
+
+        """
+        values, inverse = np.unique(
+            np.asarray(bitmask, dtype="int64"), return_inverse=True
+        )
+        names = [
+            [name for name in QCDataSet.test_names if value & QCDataSet.test_bit(name)]
+            for value in values.tolist()
+        ]
+        return [names[ind] for ind in inverse.tolist()]
+
+    @staticmethod
+    def observations2columns(observations):
+        """Convert a list of observations to columns.
+
+        Args:
+            observations (list): Observation objects.
+
+        Returns:
+            dict: Columns
+
+        """
+        columns = {
+            "obstimes": [],
+            "lons": [],
+            "lats": [],
+            "stids": [],
+            "elevs": [],
+            "values": [],
+            "varnames": [],
+            "epsilons": [],
+        }
+        for observation in observations:
+            columns["obstimes"].append(observation.obstime)
+            columns["lons"].append(observation.lon)
+            columns["lats"].append(observation.lat)
+            columns["stids"].append(observation.stid)
+            columns["elevs"].append(observation.elev)
+            columns["values"].append(observation.value)
+            columns["varnames"].append(observation.varname)
+            columns["epsilons"].append(observation.sigmao)
+        return columns
 
     def get_stid_index(self, stid):
         """Get station ID index.
@@ -1531,11 +1790,9 @@ class QCDataSet(object):
         Returns:
             int: Index position if found, else None.
         """
-        lon = f"{float(lon):10.5f}"
-        lat = f"{float(lat):10.5f}"
-        pos = lon + ":" + lat
-        if pos in self.index_pos:
-            return self.index_pos[pos]
+        ind = int(self.position_index.lookup([lon], [lat])[0])
+        if ind >= 0:
+            return ind
         return None
 
     @abc.abstractmethod
@@ -1547,36 +1804,87 @@ class QCDataSet(object):
         """
         raise NotImplementedError("You must implement this method")
 
+    def columns(self):
+        """Get the QC data as columns.
+
+        Returns:
+            dict: Columns
+
+        """
+        return {
+            "varnames": self.varnames,
+            "obstimes": self.obstimes,
+            "lons": self.lons,
+            "lats": self.lats,
+            "stids": self.stids,
+            "elevs": self.elevs,
+            "values": self.values,
+            "flags": self.flags,
+            "epsilons": self.epsilons,
+            "lafs": self.lafs,
+            "providers": self.providers,
+            "fg_dep": self.fg_dep,
+            "an_dep": self.an_dep,
+            "passed_tests": self.passed_tests,
+        }
+
     def write_output(self, filename, indent=None):
         """Dump QC data to a json file.
 
+        A columnar file is written if the file name has the columnar extension.
+
         Args:
             filename (str): Filename
             indent (int, optional): Indentation in file. Defaults to None.
         """
-        data = {}
-        for i, lon_val in enumerate(self.lons):
-            data.update(
-                {
-                    i: {
-                        "varname": self.varnames[i],
-                        "obstime": as_datetime_string(self.obstimes[i]),
-                        "lon": lon_val,
-                        "lat": self.lats[i],
-                        "stid": self.stids[i],
-                        "elev": self.elevs[i],
-                        "value": self.values[i],
-                        "flag": self.flags[i],
-                        "epsilon": self.epsilons[i],
-                        "laf": self.lafs[i],
-                        "provider": self.providers[i],
-                        "fg_dep": self.fg_dep[i],
-                        "an_dep": self.an_dep[i],
-                        "passed_tests": self.passed_tests[i],
-                    }
-                }
-            )
-        json.dump(data, open(filename, mode="w", encoding="utf-8"), indent=indent)
+        if is_columnar_file(filename):
+            write_columns(filename, self.columns())
+            return
+
+        obstimes = np.char.replace(
+            np.char.replace(
+                np.char.replace(np.datetime_as_string(self.obstimes, unit="s"), "-", ""),
+                "T",
+                "",
+            ),
+            ":",
+            "",
+        )
+        names = [
+            "varname",
+            "obstime",
+            "lon",
+            "lat",
+            "stid",
+            "elev",
+            "value",
+            "flag",
+            "epsilon",
+            "laf",
+            "provider",
+            "fg_dep",
+            "an_dep",
+            "passed_tests",
+        ]
+        rows = zip(
+            self.varnames.tolist(),
+            obstimes.tolist(),
+            self.lons.tolist(),
+            self.lats.tolist(),
+            self.stids.tolist(),
+            self.elevs.tolist(),
+            self.values.tolist(),
+            self.flags.tolist(),
+            self.epsilons.tolist(),
+            self.lafs.tolist(),
+            self.providers.tolist(),
+            self.fg_dep.tolist(),
+            self.an_dep.tolist(),
+            self.passed_tests_names(self.passed_tests),
+        )
+        data = {i: dict(zip(names, row)) for i, row in enumerate(rows)}
+        with open(filename, mode="w", encoding="utf-8") as file_handler:
+            file_handler.write(json.dumps(data, indent=indent))
 
 
 class TitanDataSet(QCDataSet):
@@ -1604,79 +1912,43 @@ class TitanDataSet(QCDataSet):
         self.tests = tests
         self.settings = settings
         self.test_flags = test_flags
-        obstimes = []
-        lons = []
-        lats = []
-        stids = []
-        elevs = []
-        values = []
-        varnames = []
-        sigmaos = []
-        providers = []
-        passed_tests = []
         self.datasources = datasources
 
         # Get global data
-        for obs_set in self.datasources:
-            (
-                lobstimes,
-                llons,
-                llats,
-                lstids,
-                lelevs,
-                lvalues,
-                lvarnames,
-                lsigmaos,
-            ) = obs_set.get_obs()
-            obstimes = obstimes + lobstimes
-            lons = lons + llons
-            lats = lats + llats
-            stids = stids + lstids
-            elevs = elevs + lelevs
-            values = values + lvalues
-            varnames = varnames + lvarnames
-            sigmaos = sigmaos + lsigmaos
-            for __ in range(0, len(llons)):
-                providers.append(obs_set.label)
-
-        for __ in range(0, len(lons)):
-            passed_tests.append([])
-        flags = np.zeros(len(lons))
-        lafs = np.ones(len(lons))
-
-        observations = []
-        for i, lon_val in enumerate(lons):
-            observations.append(
-                Observation(
-                    obstimes[i],
-                    lon_val,
-                    lats[i],
-                    values[i],
-                    elev=elevs[i],
-                    stid=stids[i],
-                    varname=varnames[i],
-                    sigmao=sigmaos[i],
+        set_columns = [obs_set.columns() for obs_set in self.datasources]
+        columns = {}
+        for name in ["obstimes", "lons", "lats", "stids", "elevs", "values", "varnames"]:
+            columns[name] = []
+            if len(set_columns) > 0:
+                columns[name] = np.concatenate(
+                    [obs_columns[name] for obs_columns in set_columns]
                 )
+        columns["epsilons"] = []
+        if len(set_columns) > 0:
+            columns["epsilons"] = np.concatenate(
+                [obs_columns["sigmaos"] for obs_columns in set_columns]
             )
-        points = tit.Points(lats, lons, elevs)
-        self.titan_dataset = tit.Dataset(points, values)
-        if passed_tests is None:
-            passed_tests = []
-            for __ in range(0, len(lons)):
-                passed_tests.append([])
-            self.passed_tests = passed_tests
-        else:
-            self.passed_tests = passed_tests
+        providers = np.repeat(
+            [obs_set.label for obs_set in self.datasources],
+            [obs_set.size for obs_set in self.datasources],
+        )
+        size = len(columns["lons"])
+        flags = np.zeros(size)
+        lafs = np.ones(size)
+
+        points = tit.Points(columns["lats"], columns["lons"], columns["elevs"])
+        self.titan_dataset = tit.Dataset(points, columns["values"])
 
         QCDataSet.__init__(
             self,
             an_time,
-            observations,
+            None,
             flags,
             lafs,
             providers,
             passed_tests=None,
             remove_invalid_elevs=False,
+            columns=columns,
         )
 
     def perform_tests(self):
@@ -1684,7 +1956,7 @@ class TitanDataSet(QCDataSet):
         summary = {}
         for test in self.tests:
             print("Test: ", test.name)
-            mask = []
+            masks = []
             findex = 0
             for obs_set in self.datasources:
 
@@ -1719,17 +1991,15 @@ class TitanDataSet(QCDataSet):
                 if do_test:
                     del test_settings["do_test"]
                     logging.debug("findex %s size %s", findex, size)
-                    lmask = np.where(np.asarray(self.flags[findex : findex + size]) == 0)[
-                        0
-                    ].tolist()
-
-                    for lmask_ind in lmask:
-                        lmask_ind = lmask_ind + findex
-                        mask.append(lmask_ind)
+                    lmask = np.flatnonzero(self.flags[findex : findex + size] == 0)
+                    masks.append(lmask + findex)
 
                     # Set input for this set
                     logging.info(
-                        "Test %s size=%s settings=%s", test.name, len(mask), test_settings
+                        "Test %s size=%s settings=%s",
+                        test.name,
+                        len(lmask),
+                        test_settings,
                     )
                     test.set_input(len(lmask), **test_settings)
 
@@ -1743,25 +2013,23 @@ class TitanDataSet(QCDataSet):
                 findex = findex + size
 
             # Tests on active observations
+            mask = np.concatenate(masks) if len(masks) > 0 else np.zeros(0, dtype=int)
             ok_obs = 0
             bad = 0
             outside = 0
-            if len(mask) > 0:
+            if mask.size > 0:
                 kwargs = {}
                 if self.test_flags is not None:
                     if test.name in self.test_flags:
                         kwargs.update({"code": self.test_flags[test.name]})
 
                 self.flags = test.test(self, mask, **kwargs)
-                for mask_ind in mask:
-                    if self.flags[mask_ind] == 0:
-                        self.passed_tests[mask_ind].append(test.name)
-                        ok_obs = ok_obs + 1
-                    else:
-                        self.titan_dataset.flags[mask_ind] = 1
-                        bad = bad + 1
-                        if self.flags[mask_ind] == 199:
-                            outside = outside + 1
+                mask_flags = self.flags[mask]
+                passed = mask[mask_flags == 0]
+                self.passed_tests[passed] |= self.test_bit(test.name)
+                ok_obs = passed.size
+                bad = mask.size - ok_obs
+                outside = int(np.count_nonzero(mask_flags == 199))
 
             summary.update(
                 {
@@ -1774,13 +2042,9 @@ class TitanDataSet(QCDataSet):
                 }
             )
 
-        kept = 0
-        flagged = 0
-        for flag in self.flags:
-            if flag == 0:
-                kept = kept + 1
-            else:
-                flagged = flagged + 1
+        self.titan_dataset.flags = tit.IntVector((self.flags != 0).astype(int).tolist())
+        kept = int(np.count_nonzero(self.flags == 0))
+        flagged = self.flags.size - kept
 
         # Print summary
         logging.info("\n")
@@ -1801,12 +2065,22 @@ class TitanDataSet(QCDataSet):
             logging.info("      ok: %s", summary[test.name]["ok"])
             logging.info("     bad: %s %s", summary[test.name]["bad"], outside)
             logging.info("\n")
+        used = self.points_built + self.points_reused
+        if used > 0:
+            logging.info(
+                "Spatial points: built %s reused %s (reuse rate %.1f %%)",
+                self.points_built,
+                self.points_reused,
+                100.0 * self.points_reused / used,
+            )
 
 
 class Departure(object):
     """Departure. Difference between an observation and a value."""
 
-    def __init__(self, operator, geo, dataset, grid_values, mode, max_distance=5000):
+    def __init__(
+        self, operator, geo, dataset, grid_values, mode, max_distance=5000, cache=None
+    ):
         """Construct a departure object.
 
         Args:
@@ -1817,13 +2091,15 @@ class Departure(object):
             mode (str): What kind of departure (analysis/first_guess)
             max_distance (int, optional): Max allowed deviation in meters from grid borders.
                                           Defaults to 5000.
+            cache (surfex.Cache, optional): Cache for observation operators.
+                                            Defaults to None.
 
         Raises:
             NotImplementedError: Mode not implemented
 
         """
         self.obs_operator = ObsOperator(
-            operator, geo, dataset, grid_values, max_distance=max_distance
+            operator, geo, dataset, grid_values, max_distance=max_distance, cache=cache
         )
         obs_values = self.obs_operator.get_obs_value()
 
@@ -1876,11 +2152,12 @@ class Departure(object):
 def dataset_from_file(
     an_time, filename, qc_flag=None, skip_flags=None, fg_dep=None, an_dep=None
 ):
-    """Get a QCDataSet from a json file.
+    """Get a QCDataSet from a json or a columnar file.
 
     Args:
         an_time (datetime.datetime): Analysis time.
-        filename (str): List of filenames.
+        filename (str): File name. Columnar if the file name has the columnar
+                        extension.
         qc_flag (int, optional): QC code to merge. Defaults to None.
         skip_flags (list, optional): List of QC flags to skip. Defaults to None.
         fg_dep (dict, optional): First guess departures. Defaults to None.
@@ -1890,6 +2167,15 @@ def dataset_from_file(
         QCDataSet: QCDataSet
 
     """
+    if is_columnar_file(filename):
+        return dataset_from_columns(
+            an_time,
+            read_columns(filename),
+            qc_flag=qc_flag,
+            skip_flags=skip_flags,
+            fg_dep=fg_dep,
+            an_dep=an_dep,
+        )
     data = json.load(open(filename, mode="r", encoding="utf-8"))
     return dataset_from_json(
         an_time,
@@ -1911,84 +2197,180 @@ def dataset_from_json(
         data (dict): data read from the file
         qc_flag (int, optional): QC code to merge. Defaults to None.
         skip_flags (list, optional): List of QC flags to skip. Defaults to None.
-        fg_dep (dict, optional): First guess departures. Defaults to None.
-        an_dep (dict, optional): Analysis departures. Defaults to None.
+        fg_dep (list, optional): First guess departures for the keys in data.
+                                 Defaults to None.
+        an_dep (list, optional): Analysis departures for the keys in data.
+                                 Defaults to None.
 
     Returns:
         QCDataSet: QCDataSet
     """
-    observations = []
-    providers = []
-    flags = []
-    lafs = []
-    fg_deps = []
-    an_deps = []
-    passed_tests = []
-    for i in data:
-        add = False
-        if qc_flag is not None:
-            if data[i]["flag"] == qc_flag:
-                add = True
-        else:
-            add = True
-
-        if skip_flags is not None:
-            for sfl in skip_flags:
-                if int(data[i]["flag"]) == int(sfl):
-                    add = False
-
-        if add:
-            obstime = as_datetime(data[i]["obstime"])
-            lon = data[i]["lon"]
-            lat = data[i]["lat"]
-            stid = data[i]["stid"]
-            elev = data[i]["elev"]
-            value = data[i]["value"]
-            sigmao = data[i]["epsilon"]
-            observations.append(
-                Observation(obstime, lon, lat, value, stid=stid, elev=elev, sigmao=sigmao)
-            )
-            if "provider" in data[i]:
-                providers.append(data[i]["provider"])
-            else:
-                providers.append("NA")
-            flag = data[i]["flag"]
-            flags.append(flag)
-            lafs.append(data[i]["laf"])
-            if fg_dep is not None:
-                fg_deps.append(fg_dep[int(i)])
-            else:
-                if "fg_dep" in data[i]:
-                    fg_deps.append(data[i]["fg_dep"])
-                else:
-                    fg_deps.append(np.nan)
-            if an_dep is not None:
-                an_deps.append(an_dep[int(i)])
-            else:
-                if "an_dep" in data[i]:
-                    an_deps.append(data[i]["an_dep"])
-                else:
-                    an_deps.append(np.nan)
-            if "passed_tests" in data[i]:
-                passed_tests.append(data[i]["passed_tests"])
+    keys = np.array([int(i) for i in data], dtype="int64")
+    if fg_dep is not None:
+        fg_dep = np.asarray(fg_dep, dtype="float64")[keys]
+    if an_dep is not None:
+        an_dep = np.asarray(an_dep, dtype="float64")[keys]
+    return dataset_from_columns(
+        an_time,
+        json2columns(data),
+        qc_flag=qc_flag,
+        skip_flags=skip_flags,
+        fg_dep=fg_dep,
+        an_dep=an_dep,
+    )
+
+
+def json2columns(data):
+    """Convert QC data read from a json file to columns.
+
+    Args:
+        data (dict): data read from the file
+
+    Returns:
+        dict: Columns as written by QCDataSet.columns
 
-    if len(passed_tests) == 0:
-        passed_tests = None
+    """
+    entries = list(data.values())
+
+    def column(name, default=None, dtype=None):
+        values = [entry.get(name, default) for entry in entries]
+        if dtype is None:
+            return values
+        return np.array(values, dtype=dtype)
+
+    return {
+        "varnames": column("varname"),
+        "obstimes": dtgs_as_datetime64(column("obstime", dtype=str)),
+        "lons": column("lon", dtype="float64"),
+        "lats": column("lat", dtype="float64"),
+        "stids": column("stid", dtype=str),
+        "elevs": column("elev", dtype="float64"),
+        "values": column("value", dtype="float64"),
+        "flags": column("flag", dtype="float64"),
+        "epsilons": column("epsilon", dtype="float64"),
+        "lafs": column("laf", dtype="float64"),
+        "providers": column("provider", default="NA", dtype=str),
+        "fg_dep": column("fg_dep", default=np.nan, dtype="float64"),
+        "an_dep": column("an_dep", default=np.nan, dtype="float64"),
+        "passed_tests": QCDataSet.passed_tests_bitmask(
+            column("passed_tests", default=[])
+        ),
+    }
+
+
+def dataset_from_columns(
+    an_time, columns, qc_flag=None, skip_flags=None, fg_dep=None, an_dep=None
+):
+    """Create a QCDataSet data set from columns.
+
+    Args:
+        an_time (datetime.datetime): Analysis time.
+        columns (dict): Columns as written by QCDataSet.columns
+        qc_flag (int, optional): QC code to merge. Defaults to None.
+        skip_flags (list, optional): List of QC flags to skip. Defaults to None.
+        fg_dep (list, optional): First guess departures for the rows in columns.
+                                 Defaults to None.
+        an_dep (list, optional): Analysis departures for the rows in columns.
+                                 Defaults to None.
+
+    Returns:
+        QCDataSet: QCDataSet
+    """
+    flags = np.asarray(columns["flags"])
+    keep = np.ones(flags.size, dtype=bool)
+    if qc_flag is not None:
+        keep &= flags == qc_flag
+    if skip_flags is not None:
+        keep &= ~np.isin(flags.astype("int64"), [int(sfl) for sfl in skip_flags])
+    indices = np.flatnonzero(keep)
+    kept = {name: np.asarray(values)[indices] for name, values in columns.items()}
+
+    if fg_dep is not None:
+        kept["fg_dep"] = np.asarray(fg_dep, dtype="float64")[indices]
+    if an_dep is not None:
+        kept["an_dep"] = np.asarray(an_dep, dtype="float64")[indices]
+    providers = kept.get("providers", np.full(indices.size, "NA"))
 
     return QCDataSet(
         an_time,
-        observations,
-        flags,
-        lafs,
+        None,
+        kept["flags"],
+        kept["lafs"],
         providers,
-        passed_tests=passed_tests,
-        fg_dep=fg_deps,
-        an_dep=an_deps,
+        passed_tests=kept.get("passed_tests"),
+        fg_dep=kept.get("fg_dep"),
+        an_dep=kept.get("an_dep"),
+        columns=kept,
     )
 
 
+def qc_columns_from_file(filename):
+    """Read QC data from a json or columnar file as columns.
+
+    Args:
+        filename (str): File name. Columnar if the file name has the columnar
+                        extension.
+
+    Returns:
+        dict: Columns as written by QCDataSet.columns
+
+    """
+    if is_columnar_file(filename):
+        columns = read_columns(filename)
+        if "passed_tests" in columns and columns["passed_tests"].dtype.kind == "U":
+            columns["passed_tests"] = QCDataSet.passed_tests_bitmask(
+                columns["passed_tests"]
+            )
+        return columns
+    with open(filename, mode="r", encoding="utf-8") as file_handler:
+        return json2columns(json.load(file_handler))
+
+
+def merge_qc_columns(filenames):
+    """Merge QC data files keeping the first observation found for each position.
+
+    The files are read one at a time. Only the sorted position keys and the
+    columns of the observations kept so far are held in memory.
+
+    Args:
+        filenames (list): List of filenames.
+
+    Returns:
+        dict: Merged columns as written by QCDataSet.columns
+
+    """
+    merged = []
+    seen = np.zeros(0, dtype="int64")
+    for filename in filenames:
+
+        if os.path.exists(filename):
+            columns = qc_columns_from_file(filename)
+            keys = PositionIndex.position_keys(columns["lons"], columns["lats"])
+            # First occurence in this file ordered by key
+            __, first = np.unique(keys, return_index=True)
+            if seen.size > 0:
+                pos = np.minimum(np.searchsorted(seen, keys[first]), seen.size - 1)
+                first = first[seen[pos] != keys[first]]
+            seen = np.insert(seen, np.searchsorted(seen, keys[first]), keys[first])
+            first = np.sort(first)
+            merged.append(
+                {name: np.asarray(values)[first] for name, values in columns.items()}
+            )
+            logging.info(
+                "Kept %s of %s observations from %s", first.size, keys.size, filename
+            )
+        else:
+            logging.warning("File name does not exist: %s", filename)
+
+    if len(merged) == 0:
+        return json2columns({})
+    return {
+        name: np.concatenate([columns[name] for columns in merged]) for name in merged[0]
+    }
+
+
 def merge_json_qc_data_sets(an_time, filenames, qc_flag=None, skip_flags=None):
-    """Merge QC data sets from json files.
+    """Merge QC data sets from json or columnar files.
 
     Args:
         an_time (datetime.datetime): Analysis time.
@@ -1999,24 +2381,61 @@ def merge_json_qc_data_sets(an_time, filenames, qc_flag=None, skip_flags=None):
     Returns:
         QCDataSet: QCDataSet
     """
-    ind = 0
-    index_pos = {}
-    data = {}
-    for filename in filenames:
+    columns = merge_qc_columns(filenames)
+    logging.info("Merged %s observations", str(len(columns["lons"])))
+    return dataset_from_columns(an_time, columns, qc_flag=qc_flag, skip_flags=skip_flags)
+
+
+def titan_variable(
+    var,
+    settings,
+    test_list,
+    datasources,
+    an_time,
+    domain_geo=None,
+    blacklist=None,
+    output_file=None,
+    indent=None,
+):
+    """Run the quality control for one variable.
 
-        if os.path.exists(filename):
-            with open(filename, mode="r", encoding="utf-8") as file_handler:
-                data1 = json.load(file_handler)
-            for dd1 in data1:
-                lon1 = data1[dd1]["lon"]
-                lat1 = data1[dd1]["lat"]
-                pos1 = f"{Observation.format_lon(lon1)}:{Observation.format_lat(lat1)}"
-                if pos1 not in index_pos:
-                    index_pos.update({pos1: ind})
-                    data.update({str(ind): data1[dd1]})
-                    ind = ind + 1
-        else:
-            logging.warning("File name does not exist: %s", filename)
+    Args:
+        var (str): Variable name.
+        settings (dict): Titan test/configuration settings for the variable.
+        test_list (list): Tests to perform in order.
+        datasources (list): List of observations sets.
+        an_time (datetime.datetime): Analysis time
+        domain_geo (surfex.Geo, optional): Domain geometry. Defaults to None.
+        blacklist (dict, optional): Blacklist. Defaults to None.
+        output_file (str, optional): Output file. Defaults to None.
+        indent (int, optional): Indentation in json output. Defaults to None.
+
+    """
+    tests = define_quality_control(
+        test_list, settings, an_time, domain_geo=domain_geo, blacklist=blacklist
+    )
+    data_set = TitanDataSet(var, settings, tests, datasources, an_time)
+    data_set.perform_tests()
 
-    logging.info("Merged %s observations", str(ind))
-    return dataset_from_json(an_time, data, qc_flag=qc_flag, skip_flags=skip_flags)
+    if output_file is not None:
+        data_set.write_output(output_file, indent=indent)
+
+
+def variable_output_file(output_file, var):
+    """Get the output file for a variable.
+
+    @VAR@ in the file name is replaced with the variable. Otherwise the variable is
+    added before the file extension.
+
+    Args:
+        output_file (str): Output file
+        var (str): Variable name
+
+    Returns:
+        str: Output file for the variable
+
+    """
+    if "@VAR@" in output_file:
+        return output_file.replace("@VAR@", var)
+    root, ext = os.path.splitext(output_file)
+    return f"{root}_{var}{ext}"
@@ -43,6 +43,8 @@ class Variable(object):
         except KeyError:
             raise RuntimeError("No filepattern provided") from KeyError
         self.initial_basetime = initial_basetime
+        self.schedule = {}
+        self.last_accumulated = None
         try:
             self.fcint = int(self.var_dict["fcint"])
         except KeyError:
@@ -69,6 +71,54 @@ class Variable(object):
         self.accumulated = accumulated
         logging.debug("Constructed variable for %s", str(self.var_dict))
 
+    def set_schedule(self, validtimes):
+        """Precompute basetimes and file names for a series of valid times.
+
+        The schedule maps each valid time to a tuple of basetime, file name and
+        the file name for the previous time step (validtime - interval) used to
+        deaccumulate. get_basetime and get_filename use the schedule if the valid
+        time is found in it.
+
+        Args:
+            validtimes (list): Valid times (datetime.datetime)
+
+        """
+        self.schedule = {}
+        interval = as_timedelta(seconds=self.interval)
+        schedule = {}
+        for validtime in validtimes:
+            if validtime in schedule:
+                continue
+            basetime = self.get_basetime(validtime)
+            filename = parse_filepattern(self.filepattern, basetime, validtime)
+            previous_filename = parse_filepattern(
+                self.filepattern, basetime, validtime - interval
+            )
+            schedule[validtime] = (basetime, filename, previous_filename)
+        self.schedule = schedule
+        logging.debug("Precomputed schedule for %s valid times", len(self.schedule))
+
+    def prefetch(self, validtime, cache):
+        """Open the files needed for a valid time ahead of reading.
+
+        Args:
+            validtime (datetime.datetime): Valid time.
+            cache (surfex.Cache): Cache to store the file handlers in.
+
+        """
+        if cache is None:
+            return
+        previoustimes = [None]
+        if self.accumulated:
+            previoustime = validtime - as_timedelta(seconds=self.interval)
+            if previoustime >= self.initial_basetime:
+                previoustimes.append(previoustime)
+        for previoustime in previoustimes:
+            try:
+                self.get_filehandler(validtime, cache=cache, previoustime=previoustime)
+            except OSError as exc:
+                logging.warning("Could not prefetch file for %s: %s", validtime, exc)
+
     def get_filename(self, validtime, previoustime=None):
         """Get the filename.
 
@@ -80,6 +130,13 @@ class Variable(object):
             str: Parsed filename
 
         """
+        if validtime in self.schedule:
+            __, filename, previous_filename = self.schedule[validtime]
+            if previoustime is None:
+                return filename
+            if previoustime == validtime - as_timedelta(seconds=self.interval):
+                return previous_filename
+
         logging.debug("Set basename for filename")
         basetime = None
         if validtime is not None:
@@ -104,49 +161,69 @@ class Variable(object):
 
         """
         filename = self.get_filename(validtime, previoustime=previoustime)
-        if cache is not None and cache.file_open(filename):
-            file_handler = cache.get_file_handler(filename)
+        if cache is None:
+            file_handler = self.open_file_handler(filename, validtime)
         else:
-            if self.var_type == "netcdf":
-                file_handler = Netcdf(filename)
-            elif self.var_type == "grib1" or self.var_type == "grib2":
-                file_handler = Grib(filename)
-            elif self.var_type == "fa":
-                file_handler = Fa(filename)
-            elif self.var_type == "surfex":
-                try:
-                    fileformat = self.var_dict["fileformat"]
-                except KeyError:
-                    fileformat = None
-                try:
-                    filetype = self.var_dict["filetype"]
-                except KeyError:
-                    filetype = None
-                geo_in = None
-                if "geo_input" in self.var_dict:
-                    geo_in = self.var_dict["geo_input"]
-                elif "geo_input_file" in self.var_dict:
-                    geo_in_file = self.var_dict["geo_input_file"]
-                    geo_in = get_geo_object(open(geo_in_file, "r", encoding="utf-8"))
-
-                file_handler = get_surfex_io_object(
-                    filename, fileformat=fileformat, filetype=filetype, geo=geo_in
-                )
-            elif self.var_type == "obs":
-                var_dict = self.var_dict
-                var_dict = {"set": var_dict}
-                basetime = self.get_basetime(validtime)
-                file_handler = get_datasources(basetime, var_dict)[0]
-            else:
-                raise NotImplementedError
-
-            if cache is not None:
-                cache.set_file_handler(filename, file_handler)
+            # Open files only once if variables are read concurrently
+            with cache.lock:
+                if cache.file_open(filename):
+                    file_handler = cache.get_file_handler(filename)
+                else:
+                    file_handler = self.open_file_handler(filename, validtime)
+                    cache.set_file_handler(filename, file_handler)
 
         logging.debug("var_type: %s", self.var_type)
         logging.debug("filename: %s", filename)
         return file_handler, filename
 
+    def open_file_handler(self, filename, validtime):
+        """Open a file handler.
+
+        Args:
+            filename (str): File name
+            validtime (datetime.datetime): Valid time.
+
+        Raises:
+            NotImplementedError: Variable type not implemented
+
+        Returns:
+            object: File handler
+
+        """
+        if self.var_type == "netcdf":
+            file_handler = Netcdf(filename)
+        elif self.var_type == "grib1" or self.var_type == "grib2":
+            file_handler = Grib(filename)
+        elif self.var_type == "fa":
+            file_handler = Fa(filename)
+        elif self.var_type == "surfex":
+            try:
+                fileformat = self.var_dict["fileformat"]
+            except KeyError:
+                fileformat = None
+            try:
+                filetype = self.var_dict["filetype"]
+            except KeyError:
+                filetype = None
+            geo_in = None
+            if "geo_input" in self.var_dict:
+                geo_in = self.var_dict["geo_input"]
+            elif "geo_input_file" in self.var_dict:
+                geo_in_file = self.var_dict["geo_input_file"]
+                geo_in = get_geo_object(open(geo_in_file, "r", encoding="utf-8"))
+
+            file_handler = get_surfex_io_object(
+                filename, fileformat=fileformat, filetype=filetype, geo=geo_in
+            )
+        elif self.var_type == "obs":
+            var_dict = self.var_dict
+            var_dict = {"set": var_dict}
+            basetime = self.get_basetime(validtime)
+            file_handler = get_datasources(basetime, var_dict)[0]
+        else:
+            raise NotImplementedError
+        return file_handler
+
     def read_var_field(self, validtime, cache=None):
         """Read points for a variable.
 
@@ -385,28 +462,31 @@ class Variable(object):
             validtime (datetime.datetime): Valid time.
             cache (surfex.cache): Cache. Defaults to None
 
-        Raises:
-            RuntimeError: Negative accumulated value found
-
         Returns:
             np.darray: Field read and interpolated.
 
         """
         # Set variable info
         previous_field = None
+        basetime = None
         if self.accumulated:
-            # Re-read field
+            basetime = self.get_basetime(validtime)
             previoustime = validtime - as_timedelta(seconds=self.interval)
             # Don't read if previous time is older than the very first basetime
             if previoustime >= self.initial_basetime:
-                logging.debug("Re-read %s", previoustime)
-                previous_field = self.read_var_points(
-                    self.file_var,
-                    geo,
-                    validtime=validtime,
-                    previoustime=previoustime,
-                    cache=cache,
-                )
+                previous_field = self.get_last_accumulated(geo, basetime, previoustime)
+                if previous_field is None:
+                    # Re-read field
+                    logging.debug("Re-read %s", previoustime)
+                    previous_field = self.read_var_points(
+                        self.file_var,
+                        geo,
+                        validtime=validtime,
+                        previoustime=previoustime,
+                        cache=cache,
+                    )
+                else:
+                    logging.debug("Using previous accumulated field %s", previoustime)
             else:
                 previous_field = np.zeros([geo.npoints])
         elif self.instant > 0:
@@ -416,13 +496,54 @@ class Variable(object):
 
         # Deaccumulate if either two files are read or if instant is > 0.
         if self.accumulated or self.instant > 0:
+            if self.accumulated:
+                self.last_accumulated = (geo, basetime, validtime, field)
             field = self.deaccumulate(field, previous_field, self.instant)
-            if any(field[field < 0.0]):
-                raise RuntimeError(
-                    "Negative accumulated value found for " + self.file_var
-                )
         return field
 
+    def get_last_accumulated(self, geo, basetime, validtime):
+        """Get the last read accumulated field if it matches.
+
+        Args:
+            geo (surfex.Geometry): Geometry the field was interpolated to
+            basetime (datetime.datetime): Base time of the field
+            validtime (datetime.datetime): Valid time of the field
+
+        Returns:
+            np.darray: The accumulated field or None if not the last one read.
+
+        """
+        if self.last_accumulated is None:
+            return None
+        last_geo, last_basetime, last_validtime, last_field = self.last_accumulated
+        if last_geo is geo and last_basetime == basetime and last_validtime == validtime:
+            return last_field
+        return None
+
+    def get_state(self):
+        """Get the state needed to continue reading the variable.
+
+        Returns:
+            tuple: Base time, valid time and field of the last accumulated field read.
+                   None if no accumulated field is read.
+
+        """
+        if self.last_accumulated is None:
+            return None
+        __, basetime, validtime, field = self.last_accumulated
+        return basetime, validtime, field
+
+    def set_state(self, geo, state):
+        """Set the state from a previous run.
+
+        Args:
+            geo (surfex.Geometry): Geometry the field was interpolated to
+            state (tuple): Base time, valid time and field as from get_state
+
+        """
+        basetime, validtime, field = state
+        self.last_accumulated = (geo, basetime, validtime, field)
+
     def print_variable_info(self):
         """Print variable."""
         logging.debug(":%s:", str(self.var_dict))
@@ -435,9 +556,6 @@ class Variable(object):
             previous_field (_type_): _description_
             instant (_type_): _description_
 
-        Raises:
-            RuntimeError: "Should not be negative values"
-
         Returns:
             _type_: _description_
 
@@ -448,23 +566,19 @@ class Variable(object):
             return None
         else:
             field = np.subtract(field, previous_field)
-            if any(field[field < 0.0]):
-                neg = []
-                for i in range(0, field.shape[0]):
-                    if field[i] < 0.0:
-                        neg.append(field[i])
-                neg = np.asarray(neg)
+            negative = field < 0.0
+            if negative.any():
+                neg = field[negative]
                 logging.warning(
                     "Deaccumulated field has %s negative values. lowest: %s mean: %s",
                     str(neg.shape[0]),
                     str(np.nanmin(neg)),
                     str(np.nanmean(neg)),
                 )
-            field[field < 0.0] = 0
-            if any(field[field < 0.0]):
-                raise RuntimeError("Should not be negative values")
+                field[negative] = 0
             if float(instant) != 0.0:
-                field = np.divide(field, float(instant))
+                out = field if field.dtype.kind == "f" else None
+                field = np.divide(field, float(instant), out=out)
 
             return field
 
@@ -488,6 +602,11 @@ class Variable(object):
         if self.offset < 0:
             raise RuntimeError("Negative offset does not make sense here")
 
+        if validtime in self.schedule:
+            if previoustime is not None and allow_different_basetime:
+                raise NotImplementedError
+            return self.schedule[validtime][0]
+
         # Take offset into account
         first = False
         offset = self.offset
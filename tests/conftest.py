@@ -10,6 +10,21 @@ from pysurfex.datetime_utils import as_datetime
 from pysurfex.geo import ConfProj
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark", action="store_true", default=False, help="Run benchmark tests"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="Benchmark. Run with --benchmark")
+    for item in items:
+        if item.get_closest_marker("benchmark") is not None:
+            item.add_marker(skip_benchmark)
+
+
 @pytest.fixture(scope="module")
 def config_exp_surfex_toml():
     fname = f"{os.path.abspath(os.path.dirname(__file__))}/../pysurfex//cfg/config_exp_surfex.toml"
@@ -424,6 +439,7 @@ def regular_ll_t1_grib2(tmp_path_factory):
 @pytest.fixture(scope="module")
 def bufr_file(tmp_path_factory):
     keys = {
+        "numberOfSubsets": 1,
         "latitude": 60.0,
         "localLatitude": 60.0,
         "longitude": 10.0,
@@ -447,9 +463,73 @@ def bufr_file(tmp_path_factory):
     return fname
 
 
+@pytest.fixture(scope="module")
+def bufr_multi_subset_file(tmp_path_factory):
+    keys = {
+        "numberOfSubsets": 4,
+        "latitude": [60.0, 60.0, 70.0, None],
+        "localLatitude": [None, None, None, 61.0],
+        "longitude": [10.0, 10.0, 10.0, None],
+        "localLongitude": [None, None, None, 11.0],
+        "year": [2020],
+        "month": [2],
+        "day": [20],
+        "hour": [6, 6, 6, 7],
+        "minute": [2, 10, 0, 0],
+        "heightOfStationGroundAboveMeanSeaLevel": [230, 230, 10, 100],
+        "stationNumber": [479, 479, 1, 2],
+        "blockNumber": [10, 10, 1, None],
+        "airTemperatureAt2M": [273.15, 274.15, 270.0, None],
+        "/heightOfSensorAboveLocalGroundOrDeckOfMarinePlatform=2/airTemperature": [
+            None,
+            None,
+            None,
+            280.0,
+        ],
+    }
+    fname = f"{tmp_path_factory.getbasetemp().as_posix()}/obs_multi_subset.bufr"
+    with open(fname, mode="w", encoding="utf-8") as fhandler:
+        json.dump(keys, fhandler, indent=2)
+    return fname
+
+
+@pytest.fixture(scope="module")
+def bufr_messages_file(tmp_path_factory):
+    messages = []
+    for lon, minute, value in [
+        (10.0, 2, 273.15),
+        (11.0, 2, 274.15),
+        (10.0, 10, 275.15),
+        (12.0, 20, 276.15),
+        (11.0, 0, 277.15),
+    ]:
+        keys = {
+            "numberOfSubsets": 1,
+            "latitude": 60.0,
+            "longitude": lon,
+            "year": 2020,
+            "month": 2,
+            "day": 20,
+            "hour": 6,
+            "minute": minute,
+            "heightOfStationGroundAboveMeanSeaLevel": 230,
+            "stationNumber": 479,
+            "blockNumber": 10,
+            "airTemperatureAt2M": value,
+        }
+        body = json.dumps(keys).encode("utf-8")
+        length = len(body) + 12
+        messages.append(b"BUFR" + length.to_bytes(3, "big") + b"\x04" + body + b"7777")
+    fname = f"{tmp_path_factory.getbasetemp().as_posix()}/obs_messages.bufr"
+    with open(fname, mode="wb") as fhandler:
+        fhandler.write(b"".join(messages))
+    return fname
+
+
 @pytest.fixture(scope="module")
 def bufr_bad_file(tmp_path_factory):
     keys = {
+        "numberOfSubsets": 1,
         "latitude": 60.0,
         "localLatitude": 60.0,
         "longitude": 10.0,
@@ -1084,6 +1164,13 @@ def _mockers(session_mocker):
 
     def my_codes_bufr_new_from_file(file_handler):
         try:
+            # Messages with a JSON body between the BUFR and 7777 markers
+            start = file_handler.tell()
+            if file_handler.read(4) == b"BUFR":
+                length = int.from_bytes(file_handler.read(4)[:3], "big")
+                gid = json.loads(file_handler.read(length - 8)[:-4])
+                return gid
+            file_handler.seek(start)
             gid = json.load(file_handler)
             file_handler.close()
         except ValueError:
@@ -1098,6 +1185,15 @@ def _mockers(session_mocker):
         else:
             return gid[key]
 
+    def my_codes_get_array(gid, key):
+        from pysurfex.bufr import eccodes
+
+        try:
+            values = gid[key]
+        except KeyError as exc:
+            raise eccodes.KeyValueNotFoundError(key) from exc
+        return np.array(values, dtype=object).reshape(-1)
+
     def my_codes_get_size(gid, key):
         print("codes_get_size", key)
         try:
@@ -1133,4 +1229,10 @@ def _mockers(session_mocker):
         "pysurfex.bufr.eccodes.codes_bufr_new_from_file", new=my_codes_bufr_new_from_file
     )
     session_mocker.patch("pysurfex.bufr.eccodes.codes_set")
+    session_mocker.patch(
+        "pysurfex.bufr.eccodes.codes_get_double_array", new=my_codes_get_array
+    )
+    session_mocker.patch(
+        "pysurfex.bufr.eccodes.codes_get_string_array", new=my_codes_get_array
+    )
     session_mocker.patch("pysurfex.fa.resource", new=MyFaResource)
@@ -14,6 +14,8 @@ from pysurfex.cli import (
     qc2obsmon,
     titan,
 )
+from pysurfex.datetime_utils import as_datetime
+from pysurfex.titan import dataset_from_file
 
 an_time = "2020022006"
 
@@ -528,6 +530,10 @@ def _qc_gridpp_obsmon(
         f"{qc_fname}-merged",
     ]
     cli_merge_qc_data(argv=argv)
+    argv[-1] = f"{qc_fname}-merged.npz"
+    cli_merge_qc_data(argv=argv)
+    merged = dataset_from_file(as_datetime(an_time), f"{qc_fname}-merged.npz")
+    assert merged.epsilons[0] == 0.5
 
     # gridpp
     with pytest.raises(SystemExit):
@@ -610,6 +616,58 @@ def obsmon_test(var, qc_fname, first_guess_file, analysis_file, db_file):
     qc2obsmon(argv=argv)
 
 
+def test_titan_several_variables(
+    tmp_path_factory, conf_proj_domain_file, firstguess4gridpp
+):
+    tmpdir = tmp_path_factory.getbasetemp().as_posix()
+    obs_data = {}
+    for var in ["t2m", "rh2m"]:
+        create_obs_data(var, f"{tmpdir}/obs_several_{var}.json")
+        var_data = json.load(open(f"{tmpdir}/obs_several_{var}.json", "r"))
+        for obs in var_data.values():
+            obs_data.update({str(len(obs_data)): obs})
+    obs_fname = f"{tmpdir}/obs_several.json"
+    json.dump(obs_data, open(obs_fname, mode="w", encoding="utf-8"))
+
+    qc_settings_fname = f"{tmpdir}/qc_settings_several.json"
+    blacklist_fname = f"{tmpdir}/blacklist_several.json"
+    create_titan_settings(
+        qc_settings_fname, firstguess4gridpp, blacklist_fname, obs_fname
+    )
+    argv = [
+        "-i",
+        qc_settings_fname,
+        "-v",
+        "t2m",
+        "rh2m",
+        "--workers",
+        "2",
+        "-dtg",
+        an_time,
+        "--blacklist",
+        blacklist_fname,
+        "--domain",
+        conf_proj_domain_file,
+        "-o",
+        f"{tmpdir}/qc_several_@VAR@.json",
+        "domain",
+        "blacklist",
+        "nometa",
+        "plausibility",
+        "redundancy",
+        "firstguess",
+        "fraction",
+        "sct",
+    ]
+    titan(argv=argv)
+
+    for var, varname in [("t2m", "airTemperatureAt2M"), ("rh2m", "relativeHumidityAt2M")]:
+        qc_titan_obs = json.load(open(f"{tmpdir}/qc_several_{var}.json", "r"))
+        assert len(qc_titan_obs) == 3
+        assert qc_titan_obs["0"]["varname"] == varname
+        assert qc_titan_obs["0"]["epsilon"] == 0.5
+
+
 @pytest.mark.usefixtures("_qc_gridpp_obsmon")
 @pytest.mark.parametrize("hm", ["no-harmonie", "harmonie"])
 def test_qc_gridpp_obsmon():
@@ -4,9 +4,12 @@ import os
 import shutil
 from pathlib import Path
 
+import numpy as np
 import pytest
+from netCDF4 import Dataset
 
 from pysurfex.cli import cli_modify_forcing, create_forcing
+from pysurfex.forcing import NetCDFOutput
 
 
 @contextlib.contextmanager
@@ -20,6 +23,27 @@ def working_directory(path):
         os.chdir(prev_cwd)
 
 
+@pytest.fixture()
+def unrotated_wind_config(tmp_path_factory):
+    """Configuration reading the wind direction without rotating the wind."""
+    fname = f"{tmp_path_factory.getbasetemp().as_posix()}/unrotated_wind.yml"
+    with open(fname, mode="w", encoding="utf-8") as fhandler:
+        fhandler.write(
+            """
+WIND_DIR:
+  ml:
+    netcdf:
+      converter:
+        winddir:
+          x:
+            rotate_to_geographic: False
+          y:
+            rotate_to_geographic: False
+"""
+        )
+    return fname
+
+
 @pytest.mark.usefixtures("_mockers")
 def test_forcing_nc(conf_proj_domain_file, tmp_path_factory, data_thredds_nc_file):
     """Test forcing from netcdf files."""
@@ -61,3 +85,210 @@ def test_forcing_nc(conf_proj_domain_file, tmp_path_factory, data_thredds_nc_fil
     shutil.copy(input_file, output_file)
     argv = ["-i", input_file, "-o", output_file, "DIR_SWdown"]
     cli_modify_forcing(argv=argv)
+
+    # Copy the last time step for a subset of the points
+    argv = [
+        "-i",
+        input_file,
+        "-o",
+        output_file,
+        "-t",
+        "1",
+        "-n",
+        "1",
+        "--output_time_step",
+        "0",
+        "--points",
+        "0:3",
+        "7",
+        "--",
+        "Tair",
+        "Wind",
+    ]
+    cli_modify_forcing(argv=argv)
+    with Dataset(input_file) as ifile, Dataset(output_file) as ofile:
+        npoints = len(ifile.dimensions["Number_of_points"])
+        points = np.array([0, 1, 2, 7])
+        others = np.setdiff1d(np.arange(npoints), points)
+        for var in ["Tair", "Wind"]:
+            assert np.array_equal(ofile[var][0, points], ifile[var][1, points])
+            assert np.array_equal(ofile[var][0, others], ifile[var][0, others])
+            assert np.array_equal(ofile[var][1, :], ifile[var][1, :])
+
+
+@pytest.mark.parametrize(
+    "parallel",
+    [
+        ["--parallel", "thread"],
+        ["--parallel", "process"],
+        ["--chunks", "2"],
+        ["--buffer_steps", "2", "-o", "nc4", "--zlib", "--shuffle"],
+        ["-o", "nc4"],
+        ["--buffer_steps", "1", "-o", "nc4", "--zlib"],
+        ["--write_queue", "2", "--parallel", "thread"],
+    ],
+)
+def test_forcing_nc_parallel(
+    conf_proj_domain_file,
+    tmp_path_factory,
+    data_thredds_nc_file,
+    unrotated_wind_config,
+    parallel,
+):
+    """Test that parallel forcing generation gives the same forcing as serial."""
+    outputs = {}
+    for mode, parallel_args in [("serial", []), ("parallel", parallel)]:
+        output = f"{tmp_path_factory.getbasetemp().as_posix()}/FORCING_{mode}.nc"
+        argv = [
+            "2020022006",
+            "2020022007",
+            "-d",
+            conf_proj_domain_file,
+            "-p",
+            data_thredds_nc_file,
+            "-i",
+            "netcdf",
+            "--co2",
+            "constant",
+            "--sca_sw",
+            "constant",
+            "--zval",
+            "constant",
+            "--zsoro_converter",
+            "phi2m",
+            "--uval",
+            "constant",
+            "--workers",
+            "2",
+            "-c",
+            unrotated_wind_config,
+            "-of",
+            output,
+        ] + parallel_args
+        create_forcing(argv=argv)
+        outputs[mode] = output
+
+    with Dataset(outputs["serial"]) as serial, Dataset(outputs["parallel"]) as concurrent:
+        if "nc4" in parallel:
+            # Time chunks cover all the time steps and not only the write buffer
+            assert concurrent["Tair"].chunking()[0] == len(serial.dimensions["time"])
+        for var in serial.variables:
+            assert np.array_equal(
+                np.ma.filled(serial[var][:], np.nan),
+                np.ma.filled(concurrent[var][:], np.nan),
+                equal_nan=True,
+            )
+
+
+def test_forcing_ascii(conf_proj_domain_file, tmp_path_factory, data_thredds_nc_file):
+    """Test ASCII forcing from netcdf files."""
+    tmpdir = tmp_path_factory.mktemp("ascii_forcing")
+    output = f"{tmpdir.as_posix()}/Params_config.txt"
+    argv = [
+        "2020022006",
+        "2020022007",
+        "-d",
+        conf_proj_domain_file,
+        "-p",
+        data_thredds_nc_file,
+        "-i",
+        "netcdf",
+        "--co2",
+        "constant",
+        "--sca_sw",
+        "constant",
+        "--zval",
+        "constant",
+        "--zsoro_converter",
+        "phi2m",
+        "--uval",
+        "constant",
+        "-o",
+        "ascii",
+        "-of",
+        output,
+    ]
+    with working_directory(tmpdir):
+        create_forcing(argv=argv)
+
+    with open(output, mode="r", encoding="utf-8") as fhandler:
+        npoints = int(fhandler.readline())
+    with open(f"{tmpdir.as_posix()}/Forc_TA.txt", mode="r", encoding="utf-8") as fhandler:
+        lines = fhandler.read().splitlines()
+    values = np.array([float(val) for line in lines for val in line.split()])
+    assert values.size == 2 * npoints
+    assert all(len(line) % 20 == 0 for line in lines)
+
+
+@pytest.mark.parametrize("parallel", [[], ["--parallel", "process", "--workers", "2"]])
+def test_forcing_nc_resume(
+    conf_proj_domain_file,
+    tmp_path,
+    data_thredds_nc_file,
+    unrotated_wind_config,
+    monkeypatch,
+    parallel,
+):
+    """Test that an interrupted forcing can be resumed from the checkpoint."""
+    outputs = {}
+    for mode in ["reference", "resumed"]:
+        outputs[mode] = f"{tmp_path.as_posix()}/FORCING_{mode}.nc"
+    argv = (
+        [
+            "2020022006",
+            "2020022007",
+            "-d",
+            conf_proj_domain_file,
+            "-p",
+            data_thredds_nc_file,
+            "-i",
+            "netcdf",
+            "--co2",
+            "constant",
+            "--sca_sw",
+            "constant",
+            "--zval",
+            "constant",
+            "--zsoro_converter",
+            "phi2m",
+            "--uval",
+            "constant",
+        ]
+        + parallel
+        + ["-c", unrotated_wind_config, "--buffer_steps", "1", "-of"]
+    )
+    create_forcing(argv=argv + [outputs["reference"]])
+
+    write_fields = NetCDFOutput.write_fields
+
+    def interrupted_write_fields(self, fields, time_step, *args):
+        if time_step == 1:
+            raise OSError("Interrupted")
+        write_fields(self, fields, time_step, *args)
+
+    checkpoint = outputs["resumed"] + ".tmp.checkpoint.npz"
+    with monkeypatch.context() as mpatch:
+        mpatch.setattr(NetCDFOutput, "write_fields", interrupted_write_fields)
+        # No checkpoint if they are disabled and the forcing can not be resumed
+        with pytest.raises(OSError):
+            create_forcing(argv=argv + [outputs["resumed"], "--checkpoint_steps", "0"])
+        assert not os.path.exists(checkpoint)
+        with pytest.raises(RuntimeError):
+            create_forcing(argv=argv + [outputs["resumed"], "--resume"])
+        with pytest.raises(OSError):
+            create_forcing(argv=argv + [outputs["resumed"], "--checkpoint_steps", "1"])
+    assert os.path.exists(checkpoint)
+    # The state of the accumulated variables is also saved from worker processes
+    assert any(NetCDFOutput.load_checkpoint(checkpoint)["states"])
+
+    create_forcing(argv=argv + [outputs["resumed"], "--resume"])
+    assert not os.path.exists(checkpoint)
+    with Dataset(outputs["reference"]) as reference, Dataset(
+        outputs["resumed"]
+    ) as resumed:
+        for var in reference.variables:
+            assert np.array_equal(
+                np.ma.filled(reference[var][:], np.nan),
+                np.ma.filled(resumed[var][:], np.nan),
+                equal_nan=True,
+            )
@@ -4,7 +4,7 @@ import json
 import pytest
 
 from pysurfex.cli import bufr2json, obs2json
-from pysurfex.obs import ObservationSet
+from pysurfex.obs import JsonObservationSet
 
 
 @pytest.mark.usefixtures("_mockers")
@@ -28,8 +28,9 @@ def test_bufr2json(tmp_path_factory, obstime_str, bufr_file):
     bufr2json(argv=argv)
     with open(output, mode="r", encoding="utf-8") as fhandler:
         data = json.load(fhandler)
-    obsset = ObservationSet(data)
-    assert obsset.observations["0"]["sigmao"] == 0.30
+    assert data["0"]["sigmao"] == 0.30
+    obsset = JsonObservationSet(output)
+    assert obsset.sigmaos[0] == 0.30
 
 
 @pytest.mark.usefixtures("_mockers")
@@ -72,7 +73,10 @@ def test_obs2json_obsoul(obstime_str, obsoul_cryoclim_cy43, tmp_path_factory):
 
     with open(output, mode="r", encoding="utf-8") as fhandler:
         data = json.load(fhandler)
-    obsset = ObservationSet(data)
+    assert len(data) == 4
+    assert data["2"]["value"] == 0.1
+    assert data["2"]["sigmao"] == 0.25
+    obsset = JsonObservationSet(output)
     assert len(obsset.observations) == 4
-    assert obsset.observations["2"]["value"] == 0.1
-    assert obsset.observations["2"]["sigmao"] == 0.25
+    assert obsset.values[2] == 0.1
+    assert obsset.sigmaos[2] == 0.25
@@ -1,4 +1,5 @@
 """Bufr testing."""
+import numpy as np
 import pytest
 
 from pysurfex.bufr import BufrObservationSet
@@ -12,7 +13,7 @@ def settings(bufr_file):
         "label": {
             "filetype": "bufr",
             "filepattern": bufr_file,
-            "varname": "airTemperatureAt2m",
+            "varname": "airTemperatureAt2M",
             "lonrange": [0, 20],
             "latrange": [55, 65],
             "dt": 1800,
@@ -32,3 +33,78 @@ def test_read_bufr(bufr_file, obstime):
         bufr_file, variables, obstime, as_timedelta(seconds=1800)
     )
     assert len(bufr_set.observations) == 1
+
+
+@pytest.mark.usefixtures("_mockers")
+@pytest.mark.parametrize("use_first", [False, True])
+def test_read_bufr_multi_subset(bufr_multi_subset_file, obstime, use_first):
+    variables = ["airTemperatureAt2M"]
+    bufr_set = BufrObservationSet(
+        bufr_multi_subset_file,
+        variables,
+        obstime,
+        as_timedelta(seconds=3600),
+        lonrange=[0, 20],
+        latrange=[55, 65],
+        use_first=use_first,
+    )
+    values = [obs.value for obs in bufr_set.observations]
+    stids = [obs.stid for obs in bufr_set.observations]
+    if use_first:
+        assert values == [273.15, 280.0]
+        assert stids == ["10479", "NA"]
+    else:
+        assert values == [273.15, 274.15, 280.0]
+        assert stids == ["10479", "10479", "NA"]
+    assert bufr_set.observations[-1].lon == 11.0
+    assert bufr_set.observations[-1].elev == 100.0
+
+
+@pytest.mark.usefixtures("_mockers")
+def test_decode_key_missing_subsets():
+    bufr = {
+        "airTemperature": [270.0, 271.0, 272.0, 273.0, 274.0],
+        "/subsetNumber=1/airTemperature": [270.0, 271.0],
+        "/subsetNumber=2/airTemperature": [272.0, 273.0, 274.0],
+        "stationOrSiteName": ["A", "B", "C", "D"],
+        "/subsetNumber=1/stationOrSiteName": ["A", "B"],
+        "/subsetNumber=3/stationOrSiteName": ["C", "D"],
+        "heightOfStation": [],
+    }
+    values = BufrObservationSet.decode_key(bufr, "airTemperature", 3)
+    np.testing.assert_array_equal(values, [270.0, 272.0, np.nan])
+    values = BufrObservationSet.decode_key(bufr, "stationOrSiteName", 3)
+    assert values.tolist() == ["A", "NA", "C"]
+    values = BufrObservationSet.decode_key(bufr, "heightOfStation", 3)
+    assert np.all(np.isnan(values))
+    assert BufrObservationSet.decode_key(bufr, "airPressure", 3) is None
+
+
+def test_bufr_message_ranges(bufr_messages_file):
+    ranges = BufrObservationSet.message_ranges(bufr_messages_file)
+    assert len(ranges) == 5
+    assert ranges[0][0] == 0
+    for (__, end), (start, __) in zip(ranges[:-1], ranges[1:]):
+        assert end == start
+
+
+@pytest.mark.usefixtures("_mockers")
+@pytest.mark.parametrize("use_first", [False, True])
+def test_read_bufr_parallel(bufr_messages_file, obstime, use_first):
+    variables = ["airTemperatureAt2M"]
+    observations = []
+    for workers in [None, 2]:
+        bufr_set = BufrObservationSet(
+            bufr_messages_file,
+            variables,
+            obstime,
+            as_timedelta(seconds=3600),
+            use_first=use_first,
+            workers=workers,
+        )
+        observations.append([(obs.lon, obs.value) for obs in bufr_set.observations])
+    assert observations[0] == observations[1]
+    if use_first:
+        assert observations[1] == [(10.0, 273.15), (11.0, 274.15), (12.0, 276.15)]
+    else:
+        assert len(observations[1]) == 5
@@ -1,5 +1,9 @@
 """Test converter."""
+import logging
+import time
+
 import numpy as np
+import pytest
 
 from pysurfex.cache import Cache
 from pysurfex.datetime_utils import as_datetime
@@ -37,3 +41,79 @@ def test_converter_meps_nc(conf_proj_2x3_dict, data_thredds_nc_file):
     field = ConvertedInput(my_geo, var, converter).read_time_step(validtime, cache)
     field = np.reshape(field, [my_geo.nlons, my_geo.nlats])
     assert field.shape == (2, 3)
+
+
+def _numpy_mslp2ps(mslp, altitude, temp):
+    return np.multiply(
+        mslp, np.exp(np.divide(np.multiply(-altitude, 9.81), np.multiply(287.0, temp)))
+    )
+
+
+def _numpy_rh2q(r_h, temp, pres):
+    field_p_mb = np.divide(pres, 100.0)
+    field_t_c = np.subtract(temp, 273.15)
+    exp = np.divide(np.multiply(17.67, field_t_c), np.add(field_t_c, 243.5))
+    esat = np.multiply(6.112, np.exp(exp))
+    return np.divide(np.multiply(0.622, r_h / 100.0) * esat, field_p_mb)
+
+
+def _numpy_windspeed(x_wind, y_wind):
+    return np.sqrt(np.square(x_wind) + np.square(y_wind))
+
+
+def _numpy_winddir(x_wind, y_wind):
+    return np.mod(90 - np.rad2deg(np.arctan2(y_wind, x_wind)), 360)
+
+
+def _numpy_totalprec2rain(totalprec, snow):
+    field = np.subtract(totalprec, snow)
+    field[field < 0.0] = 0
+    return field
+
+
+_KERNELS = [
+    ("mslp2ps", _numpy_mslp2ps, 3),
+    ("rh2q", _numpy_rh2q, 3),
+    ("windspeed", _numpy_windspeed, 2),
+    ("winddir", _numpy_winddir, 2),
+    ("totalprec2rain", _numpy_totalprec2rain, 2),
+]
+
+
+def _kernel_args(name, nargs, npoints):
+    rng = np.random.default_rng(1)
+    return {
+        "mslp2ps": [
+            rng.uniform(95000.0, 105000.0, npoints),
+            rng.uniform(0.0, 2000.0, npoints),
+            rng.uniform(240.0, 310.0, npoints),
+        ],
+        "rh2q": [
+            rng.uniform(0.0, 100.0, npoints),
+            rng.uniform(240.0, 310.0, npoints),
+            rng.uniform(80000.0, 105000.0, npoints),
+        ],
+    }.get(name, [rng.uniform(-20.0, 20.0, npoints) for __ in range(nargs)])
+
+
+@pytest.mark.parametrize(("name", "reference", "nargs"), _KERNELS)
+def test_converter_kernels(name, reference, nargs):
+    """Test the converter kernels against the plain numpy formulas."""
+    args = _kernel_args(name, nargs, 1000)
+    field = getattr(Converter, name)(*args)
+    np.testing.assert_allclose(field, reference(*args), rtol=1e-10, atol=1e-10)
+
+
+@pytest.mark.benchmark()
+@pytest.mark.parametrize(("name", "reference", "nargs"), _KERNELS)
+def test_converter_kernel_benchmark(name, reference, nargs):
+    """Benchmark the converter kernels against the plain numpy formulas."""
+    args = _kernel_args(name, nargs, 1000000)
+    tic = time.perf_counter()
+    expected = reference(*args)
+    t_numpy = time.perf_counter() - tic
+    tic = time.perf_counter()
+    field = getattr(Converter, name)(*args)
+    t_numexpr = time.perf_counter() - tic
+    logging.info("Converter %s: numpy %.4f s numexpr %.4f s", name, t_numpy, t_numexpr)
+    np.testing.assert_allclose(field, expected, rtol=1e-10, atol=1e-10)
@@ -0,0 +1,73 @@
+"""Test forcing."""
+import io
+
+import numpy as np
+import pytest
+
+from pysurfex.forcing import WriteBehind, get_point_indices, write_formatted_array
+
+
+@pytest.mark.parametrize("fileformat", ["%20.8f", "%15.8f", "%12.3f", "%6.0f"])
+@pytest.mark.parametrize("size", [0, 1, 49, 50, 51, 1234])
+def test_write_formatted_array(fileformat, size):
+    rng = np.random.default_rng(size)
+    values = np.concatenate(
+        [
+            rng.standard_normal(size // 2) * 10.0 ** rng.integers(-3, 3, size // 2),
+            (rng.standard_normal(size - size // 2) * 300).astype("f4"),
+        ]
+    )
+    special = [-1.0e-10, -0.0, 0.5e-8, 2.5e-8, -2.5e-8, 2**-9, 999.9995, np.nan, np.inf]
+    values[: len(special)] = special[: values.size]
+
+    columns = 50
+    expected = ""
+    for row in range(0, values.size - values.size % columns, columns):
+        expected += "".join([fileformat % val for val in values[row : row + columns]])
+        expected += "\n"
+    tail = values[values.size - values.size % columns :]
+    expected += "".join([fileformat % val for val in tail]) + "\n"
+
+    output = io.StringIO()
+    write_formatted_array(output, values, columns, fileformat)
+    assert output.getvalue() == expected
+
+
+class _FailingOutput:
+    def __init__(self):
+        self.written = []
+
+    def write_fields(self, fields, time_step, time_step_value, state=None):
+        if time_step == 1:
+            raise OSError("Disk full")
+        self.written.append((fields, time_step, time_step_value))
+
+
+def test_write_behind():
+    output = _FailingOutput()
+    writer = WriteBehind(output, 1)
+    writer.put([np.zeros(2)], 0, 0)
+    writer.close()
+    assert len(output.written) == 1
+    assert output.written[0][1:] == (0, 0)
+
+    writer = WriteBehind(output, 1)
+    for time_step in range(4):
+        try:
+            writer.put([np.zeros(2)], time_step, time_step)
+        except RuntimeError:
+            break
+    with pytest.raises(RuntimeError):
+        writer.close()
+
+
+def test_get_point_indices():
+    assert get_point_indices(None, 10) is None
+    assert get_point_indices([], 10) is None
+    assert get_point_indices(["0:3", "7", "2"], 10).tolist() == [0, 1, 2, 7]
+    assert get_point_indices([":2", "8:"], 10).tolist() == [0, 1, 8, 9]
+    for points in [["5:5"], ["10:3"], ["3:1", "8:8"]]:
+        with pytest.raises(RuntimeError, match="No points selected"):
+            get_point_indices(points, 10)
+    with pytest.raises(RuntimeError):
+        get_point_indices(["8:11"], 10)
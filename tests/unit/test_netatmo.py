@@ -1,8 +1,12 @@
 """Test netatmo data."""
+import json
+
+import numpy as np
 import pytest
 
 from pysurfex.datetime_utils import as_datetime
-from pysurfex.input_methods import get_datasources
+from pysurfex.input_methods import get_datasources, get_datasources_for_variables
+from pysurfex.obs import NetatmoObservationSet
 
 
 @pytest.fixture()
@@ -84,3 +88,112 @@ def test_get_netatmo_datasource(netatmo_obs_time, settings):
     assert len(dataset) == 1
     print(dataset[0])
     assert len(dataset[0].observations) == 2
+
+
+def test_netatmo_several_variables(netatmo_obs_time, settings, monkeypatch):
+    nfiles = []
+    read_file = NetatmoObservationSet.read_file
+
+    def counted_read_file(*args):
+        nfiles.append(args[0])
+        return read_file(*args)
+
+    monkeypatch.setattr(
+        NetatmoObservationSet, "read_file", staticmethod(counted_read_file)
+    )
+    humidity = {"label": dict(settings["label"], varname="Humidity", sigmao=0.5)}
+    datasources = get_datasources_for_variables(
+        netatmo_obs_time, {"t2m": settings, "rh2m": humidity}
+    )
+    assert len(nfiles) == 1
+    t2m = datasources["t2m"][0]
+    rh2m = datasources["rh2m"][0]
+    assert list(t2m.varnames) == ["Temperature", "Temperature"]
+    assert t2m.values == pytest.approx([278.25, 277.75])
+    assert list(rh2m.varnames) == ["Humidity", "Humidity"]
+    assert rh2m.values == pytest.approx([0.93, 0.9])
+    assert rh2m.sigmaos == pytest.approx([0.5, 0.5])
+
+
+def test_netatmo_counters(tmp_path_factory):
+    records = [
+        {"location": [10.0, 60.0], "_id": "a", "data": {"Temperature": 1.0}},
+        {
+            "location": [10.0, 60.0],
+            "_id": "b",
+            "data": {"Temperature": 1.0, "Humidity": 80, "time_utc": 1582178400},
+        },
+        {
+            "location": [10.0, 60.0],
+            "_id": "c",
+            "data": {"Humidity": 80, "time_utc": 1582178400},
+            "altitude": 100,
+        },
+        {"_id": "d", "data": {"Temperature": 1.0, "time_utc": 1582178400}},
+    ]
+    fname = tmp_path_factory.getbasetemp() / "netatmo_counters.json"
+    with open(fname, mode="w", encoding="utf-8") as fhandler:
+        json.dump(records, fhandler)
+
+    variables = ["Temperature", "Humidity"]
+    readings, counters = NetatmoObservationSet.read_file(
+        fname, variables, [-10, 20], [-10, 70]
+    )
+    assert counters == {
+        "missing_metadata": 1,
+        "missing_obs": 1,
+        "missing_time": 1,
+        "missing_elev": 1,
+    }
+    assert readings["Temperature"]["ids"] == []
+    assert readings["Humidity"]["ids"] == ["c"]
+
+    readings, counters = NetatmoObservationSet.read_file(
+        fname, variables, [-10, 20], [-10, 70], re=False
+    )
+    assert counters["missing_elev"] == 1
+    assert readings["Temperature"]["ids"] == ["b"]
+    assert readings["Humidity"]["ids"] == ["b", "c"]
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_netatmo_concatenated_files(tmp_path_factory, netatmo_obs_time, workers):
+    records = [
+        {
+            "location": [10.0, 60.0],
+            "_id": "station1",
+            "data": {"Temperature": 1.0, "time_utc": 1582178400 - 600},
+        },
+        {
+            "location": [10.0, 60.0],
+            "_id": "station1",
+            "data": {"Temperature": 2.0, "time_utc": 1582178400 + 300},
+            "altitude": 100,
+        },
+        {
+            "location": [11.0, 61.0],
+            "_id": "station2",
+            "data": {"Temperature": 3.0, "time_utc": 1582178400 - 3000},
+            "altitude": 200,
+        },
+        {"location": [12.0, 62.0], "_id": "station3", "data": {"Humidity": 90}},
+    ]
+    filenames = []
+    for ifile, text in enumerate(
+        [
+            json.dumps(records[:2]) + "\n" + json.dumps(records[2:]),
+            "".join([json.dumps(record) for record in records]),
+        ]
+    ):
+        fname = f"{tmp_path_factory.getbasetemp().as_posix()}/netatmo_{ifile}.json"
+        with open(fname, mode="w", encoding="utf-8") as fhandler:
+            fhandler.write(text)
+        filenames.append(fname)
+
+    obsset = NetatmoObservationSet(
+        filenames, "Temperature", netatmo_obs_time, dt=1800, re=False, workers=workers
+    )
+    assert obsset.size == 1
+    assert obsset.values[0] == pytest.approx(275.15)
+    assert obsset.elevs[0] == 100
+    assert obsset.obstimes[0] == np.datetime64(1582178400 + 300, "s")
@@ -1,6 +1,8 @@
 """Obsoul unit testing."""
+import numpy as np
 import pytest
 
+from pysurfex.datetime_utils import as_datetime
 from pysurfex.input_methods import get_datasources
 from pysurfex.obsoul import ObservationDataSetFromObsoulFile
 
@@ -63,3 +65,21 @@ def test_get_obsoul_cryoclim_datasource(obstime, cryoclim_settings):
 def test_get_obsoul_carra1(obsoul_carra1):
     obsset = ObservationDataSetFromObsoulFile(obsoul_carra1)
     assert len(obsset.observations) == 18
+
+
+def test_get_obsoul_carra1_filtered(obsoul_carra1):
+    obsset = ObservationDataSetFromObsoulFile(
+        obsoul_carra1, obnumber=2, obtypes=[5], subtypes=[81035]
+    )
+    assert obsset.size == 2
+    assert obsset.stids.tolist() == ["01241", "01241"]
+    np.testing.assert_allclose(obsset.values, [269.7, 269.89])
+    assert obsset.varnames.tolist() == ["2", "2"]
+
+    an_time = as_datetime("202002201000")
+    obsset = ObservationDataSetFromObsoulFile(
+        obsoul_carra1, an_time=an_time, neg_dt=3600, pos_dt=0, obnumber=1
+    )
+    assert obsset.size == 1
+    assert obsset.values[0] == 0.0
+    assert obsset.stids[0] == "2600537"
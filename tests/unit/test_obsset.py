@@ -1,10 +1,14 @@
 """Test Observation sets."""
 import json
 
+import numpy as np
 import pytest
 
 from pysurfex.datetime_utils import as_datetime
 from pysurfex.input_methods import get_datasources
+from pysurfex.interpolation import Interpolation
+from pysurfex.obs import JsonObservationSet, ObservationSet
+from pysurfex.observation import Observation, PositionIndex
 
 
 @pytest.fixture()
@@ -58,3 +62,87 @@ def settings(filepattern):
 
 def test_get_bufr_datasource(obs_time, settings):
     get_datasources(obs_time, settings)
+
+
+def test_obsset_columns(tmp_path_factory, filepattern):
+    obsset = JsonObservationSet(filepattern, sigmao=0.5)
+    assert obsset.size == 2
+    assert obsset.obstimes.dtype == np.dtype("datetime64[s]")
+    assert obsset.values.tolist() == [278.04999999999995, 277.15]
+    assert obsset.sigmaos.tolist() == [0.5, 0.5]
+
+    observations = obsset.observations
+    assert observations[1].obstime == as_datetime("20201113060000")
+    assert observations[1].stid == "17280"
+    assert observations[1].varname == "air_temperature"
+
+    from_list = ObservationSet(
+        [Observation(as_datetime("20201113060000"), 10.578, 59.4352, 277.15)]
+    )
+    assert from_list.stids.tolist() == ["NA"]
+    assert np.isnan(from_list.elevs[0])
+
+    filename = tmp_path_factory.getbasetemp() / "obsset_columns.json"
+    obsset.write_json_file(filename)
+    with open(filename, mode="r", encoding="utf-8") as fhandler:
+        data = json.load(fhandler)
+    assert data["1"]["obstime"] == "20201113060000"
+    assert data["1"]["value"] == 277.15
+    assert data["1"]["sigmao"] == 0.5
+
+
+def test_position_index():
+    lons = [10.0, 10.000001, 11.0, np.nan, 10.00001, 11.0]
+    lats = [60.0, 60.0, 61.0, 60.0, 60.0, 61.0]
+    index = PositionIndex(lons, lats)
+    assert index.first().tolist() == [0, 2, 3, 4]
+    assert index.duplicated().tolist() == [False, True, False, False, False, True]
+    found = index.lookup([11.0, 10.0, 12.0, np.nan], [61.0, 60.0, 61.0, 60.0])
+    assert found.tolist() == [5, 1, -1, -1]
+    indices, distances = index.nearest([10.9, 9.0, np.nan], [61.0, 60.0, 60.0])
+    assert indices.tolist() == [2, 0, -1]
+    assert distances[0] == pytest.approx(5.4e3, rel=0.01)
+    assert np.isnan(distances[2])
+
+
+@pytest.mark.parametrize("window", [1, 32])
+def test_position_index_nearest(window):
+    rng = np.random.default_rng(1)
+    lons = rng.uniform(-20.0, 40.0, 2000)
+    lats = rng.uniform(50.0, 80.0, 2000)
+    lons[::100] = np.nan
+    qlons = rng.uniform(-30.0, 50.0, 500)
+    qlats = rng.uniform(40.0, 89.0, 500)
+    qlats[::50] = np.nan
+
+    indices, distances = PositionIndex(lons, lats).nearest(qlons, qlats, window=window)
+
+    valid = np.isfinite(lons)
+    brute = Interpolation.distance(
+        qlons[:, np.newaxis], qlats[:, np.newaxis], lons[valid], lats[valid]
+    )
+    defined = np.isfinite(qlats)
+    expected = np.flatnonzero(valid)[np.argmin(brute[defined], axis=1)]
+    assert indices[defined].tolist() == expected.tolist()
+    assert distances[defined] == pytest.approx(np.min(brute[defined], axis=1))
+    assert (indices[~defined] == -1).all()
+    assert np.isnan(distances[~defined]).all()
+    assert PositionIndex([], []).nearest([10.0], [60.0])[0].tolist() == [-1]
+
+
+def test_obsset_columnar_file(tmp_path_factory, filepattern):
+    obsset = JsonObservationSet(filepattern)
+    filename = tmp_path_factory.getbasetemp() / "obsset_columns.npz"
+    obsset.write_json_file(filename)
+
+    columnar = JsonObservationSet(filename)
+    assert columnar.size == obsset.size
+    assert columnar.obstimes.tolist() == obsset.obstimes.tolist()
+    assert columnar.values.tolist() == obsset.values.tolist()
+    assert columnar.stids.tolist() == obsset.stids.tolist()
+    assert columnar.varnames.tolist() == obsset.varnames.tolist()
+
+    columnar = JsonObservationSet(filename, var="air_temperature", sigmao=0.5)
+    assert columnar.size == 2
+    assert columnar.sigmaos.tolist() == [0.5, 0.5]
+    assert JsonObservationSet(filename, var="relative_humidity").size == 0
@@ -1,7 +1,9 @@
 """Test titan."""
 import numpy as np
 import pytest
+import titanlib as tit
 
+from pysurfex.cache import Cache
 from pysurfex.titan import (
     Blacklist,
     Buddy,
@@ -11,9 +13,13 @@ from pysurfex.titan import (
     Fraction,
     NoMeta,
     Plausibility,
+    QCDataSet,
     Redundancy,
     Sct,
+    dataset_from_file,
     dataset_from_json,
+    merge_json_qc_data_sets,
+    merge_qc_columns,
 )
 
 
@@ -62,7 +68,7 @@ def test_plausibility1(an_time):
     test = Plausibility(minval=272, maxval=273.5)
     test.set_input(2)
     flags = test.test(obs_set(an_time), mask)
-    assert flags == [0.0, 102]
+    assert flags.tolist() == [0.0, 102]
 
 
 def test_plausibility2(an_time):
@@ -70,7 +76,7 @@ def test_plausibility2(an_time):
     test = Plausibility(minval=273.5, maxval=274.5)
     test.set_input(1)
     flags = test.test(obs_set(an_time), mask)
-    assert flags == [0.0, 0.0]
+    assert flags.tolist() == [0.0, 0.0]
 
 
 def test_blacklist(an_time):
@@ -78,7 +84,12 @@ def test_blacklist(an_time):
     blacklist = {"lons": [6.9933], "lats": [62.191]}
     qc = Blacklist(blacklist)
     qc.set_input(2)
-    qc.test(obs_set(an_time), mask)
+    flags = qc.test(obs_set(an_time), mask)
+    assert flags.tolist() == [100, 0]
+
+    qc = Blacklist({"stids": ["NA", "1111"]})
+    flags = qc.test(obs_set(an_time), [1])
+    assert flags.tolist() == [0, 0]
 
 
 def test_buddy(an_time):
@@ -112,6 +123,27 @@ def test_fraction(conf_proj_2x3, an_time):
     qc.test(obs_set(an_time), mask)
 
 
+def test_cached_obs_operator(conf_proj_2x3, an_time):
+    mask = [0, 1]
+    cache = Cache(-1)
+    first_guess = np.full((2, 3), 273.0)
+    lsm = np.ones((2, 3))
+    qc_data = obs_set(an_time)
+    for __ in range(2):
+        qc = FirstGuess(conf_proj_2x3, first_guess, negdiff=0.1, posdiff=0.2, cache=cache)
+        qc.set_input(2)
+        qc.test(qc_data, mask)
+    qc = Fraction(conf_proj_2x3, lsm, minval=0, maxval=1, cache=cache)
+    qc.set_input(2)
+    qc.test(qc_data, mask)
+
+    assert len(cache.obs_operators) == 1
+    cached = list(cache.obs_operators.values())[0]
+    assert len(cached["values"]) == 2
+    assert cached["values"][0][0] is first_guess
+    assert cached["values"][1][0] is lsm
+
+
 def test_sct(an_time):
     mask = [0, 1]
     sct = Sct()
@@ -119,6 +151,24 @@ def test_sct(an_time):
     sct.test(obs_set(an_time), mask)
 
 
+def test_shared_points(an_time):
+    qc_data = obs_set(an_time)
+    buddy = Buddy()
+    buddy.set_input(2)
+    with pytest.raises(TypeError):
+        buddy.test(qc_data, [0, 1])
+    sct = Sct()
+    sct.set_input(2)
+    sct.test(qc_data, [0, 1])
+    assert qc_data.points_built == 1
+    assert qc_data.points_reused == 1
+
+    sct = Sct()
+    sct.set_input(1)
+    sct.test(qc_data, [1])
+    assert qc_data.points_built == 2
+
+
 def test_no_meta(an_time):
     mask = [0, 1]
     qc = NoMeta()
@@ -133,8 +183,204 @@ def test_redundancy(an_time):
     qc.test(obs_set(an_time), mask)
 
 
+def test_redundancy_closest_time(an_time):
+    data = {}
+    for i, obstime in enumerate(
+        ["20200220030000", "20200220050000", "20200220040000", "20200220070000"]
+    ):
+        data[str(i)] = {
+            "varname": "airTemperatureAt2M",
+            "obstime": obstime,
+            "lon": 6.9933,
+            "lat": 62.191,
+            "stid": "1111",
+            "elev": 900.0,
+            "value": 273,
+            "flag": 0.0,
+            "epsilon": 1.0,
+            "laf": 1.0,
+            "provider": "bufr",
+        }
+    qc = Redundancy(an_time)
+    qc.set_input(4)
+    flags = qc.test(dataset_from_json(an_time, data), [0, 1, 2, 3])
+    # 05 and 07 are equally close to 06. The first one is kept.
+    assert flags.tolist() == [115, 0, 115, 115]
+
+    flags = qc.test(dataset_from_json(an_time, data), [0, 2])
+    assert flags.tolist() == [115, 0, 0, 0]
+
+
 def test_climatology(an_time):
     mask = [0, 1]
     clim = Climatology(an_time, minval=270, maxval=280)
     clim.set_input(2)
     clim.test(obs_set(an_time), mask)
+
+
+def test_columnar_qc_file(tmp_path_factory, an_time):
+    qc_data = obs_set(an_time)
+    qc_data.flags[1] = 102
+    qc_data.passed_tests[0] = QCDataSet.passed_tests_bitmask([["domain", "blacklist"]])[0]
+    json_file = f"{tmp_path_factory.getbasetemp().as_posix()}/qc_columnar.json"
+    npz_file = f"{tmp_path_factory.getbasetemp().as_posix()}/qc_columnar.npz"
+    qc_data.write_output(json_file)
+    qc_data.write_output(npz_file)
+
+    columnar = dataset_from_file(an_time, npz_file)
+    from_json = dataset_from_file(an_time, json_file)
+    for name in ["obstimes", "lons", "stids", "flags", "epsilons", "providers"]:
+        assert getattr(columnar, name).tolist() == getattr(from_json, name).tolist()
+    assert columnar.passed_tests.tolist() == from_json.passed_tests.tolist()
+    assert QCDataSet.passed_tests_names(columnar.passed_tests) == [
+        ["domain", "blacklist"],
+        [],
+    ]
+
+    assert dataset_from_file(an_time, npz_file, qc_flag=0).stids.tolist() == ["1111"]
+    assert dataset_from_file(an_time, npz_file, skip_flags=[102]).stids.tolist() == [
+        "1111"
+    ]
+
+    merged = merge_json_qc_data_sets(an_time, [npz_file, json_file])
+    assert merged.lons.tolist() == from_json.lons.tolist()
+    assert merged.values.tolist() == from_json.values.tolist()
+
+
+def test_dataset_from_json(an_time):
+    qc_data = obs_set(an_time)
+    assert qc_data.obstimes.tolist() == [
+        np.datetime64("2020-02-20T06:00:00"),
+        np.datetime64("2020-02-20T06:00:00"),
+    ]
+    assert qc_data.stids.tolist() == ["1111", "NA"]
+    assert qc_data.get_stid_index("1111") == 0
+    assert qc_data.get_pos_index(7.8173, 59.7675) == 1
+    assert qc_data.epsilons.tolist() == [0.8, 1.2]
+    assert qc_data.providers.tolist() == ["bufr", "bufr"]
+
+    data = {
+        "0": {
+            "obstime": "2020022006",
+            "lon": 10.0,
+            "lat": 60.0,
+            "stid": "1",
+            "elev": 10,
+            "value": 270.0,
+            "flag": 0,
+            "epsilon": 1.0,
+            "laf": 1.0,
+        },
+        "1": {
+            "obstime": "202002200610",
+            "lon": 11.0,
+            "lat": 61.0,
+            "stid": "2",
+            "elev": 20,
+            "value": 271.0,
+            "flag": 102,
+            "epsilon": 1.0,
+            "laf": 0.5,
+        },
+    }
+    qc_data = dataset_from_json(an_time, data, skip_flags=[102], fg_dep=[1.0, 2.0])
+    assert qc_data.stids.tolist() == ["1"]
+    assert qc_data.providers.tolist() == ["NA"]
+    assert qc_data.fg_dep.tolist() == [1.0]
+    assert np.isnan(qc_data.an_dep[0])
+    qc_data = dataset_from_json(an_time, data, qc_flag=102)
+    assert qc_data.obstimes[0] == np.datetime64("2020-02-20T06:10:00")
+    assert qc_data.lafs.tolist() == [0.5]
+
+
+def test_merge_qc_columns(tmp_path_factory, an_time):
+    def entry(lon, value):
+        return {
+            "obstime": "2020022006",
+            "lon": lon,
+            "lat": 60.0,
+            "stid": "NA",
+            "elev": 10.0,
+            "value": value,
+            "flag": 0,
+            "epsilon": 1.0,
+            "laf": 1.0,
+        }
+
+    files = []
+    contents = [
+        [entry(10.0, 1.0), entry(11.0, 2.0), entry(10.0, 3.0)],
+        [entry(12.0, 4.0), entry(11.0, 5.0), entry(10.000001, 6.0)],
+        [entry(13.0, 7.0), entry(12.0, 8.0)],
+    ]
+    for ind, content in enumerate(contents):
+        qc_data = dataset_from_json(an_time, dict(enumerate(content)))
+        extension = "npz" if ind == 1 else "json"
+        filename = f"{tmp_path_factory.getbasetemp().as_posix()}/merge{ind}.{extension}"
+        qc_data.write_output(filename)
+        files.append(filename)
+    files.append(f"{tmp_path_factory.getbasetemp().as_posix()}/missing.json")
+
+    columns = merge_qc_columns(files)
+    assert columns["values"].tolist() == [1.0, 2.0, 4.0, 7.0]
+    assert columns["lons"].tolist() == [10.0, 11.0, 12.0, 13.0]
+    merged = merge_json_qc_data_sets(an_time, files)
+    assert merged.values.tolist() == [1.0, 2.0, 4.0, 7.0]
+
+
+def test_passed_tests_bitmask():
+    bitmask = QCDataSet.passed_tests_bitmask(
+        [["domain", "blacklist"], "sct,domain", "", []]
+    )
+    assert bitmask.tolist() == [3, 513, 0, 0]
+    assert QCDataSet.passed_tests_names(bitmask) == [
+        ["domain", "blacklist"],
+        ["domain", "sct"],
+        [],
+        [],
+    ]
+    with pytest.raises(NotImplementedError):
+        QCDataSet.passed_tests_bitmask([["unknown"]])
+
+
+def test_sct_tiles():
+    rng = np.random.default_rng(1)
+    lons = rng.uniform(0, 20, 2000)
+    lats = rng.uniform(55, 70, 2000)
+    tiles = Sct.tiles(lons, lats, 300000, 150000)
+    interiors = np.concatenate([interior for interior, __ in tiles])
+    assert np.sort(interiors).tolist() == list(range(2000))
+
+    # All neighbours within the halo are in the tile
+    lon_rad = np.radians(lons)
+    lat_rad = np.radians(lats)
+    for interior, tile in tiles:
+        for ind in interior[:5]:
+            hav = (
+                np.sin((lat_rad - lat_rad[ind]) / 2) ** 2
+                + np.cos(lat_rad)
+                * np.cos(lat_rad[ind])
+                * np.sin((lon_rad - lon_rad[ind]) / 2) ** 2
+            )
+            distance = 2 * Sct.earth_radius * np.arcsin(np.sqrt(hav))
+            assert np.isin(np.flatnonzero(distance < 150000), tile).all()
+
+
+def test_tiled_sct():
+    rng = np.random.default_rng(3)
+    size = 1000
+    lons = rng.uniform(0, 20, size)
+    lats = rng.uniform(55, 70, size)
+    elevs = rng.uniform(0, 500, size)
+    values = 280 - 0.0065 * elevs + rng.normal(0, 1, size)
+    values[rng.random(size) < 0.02] += 10
+    pos = np.full(size, 4.0)
+    neg = np.full(size, 8.0)
+    eps2 = np.full(size, 0.5)
+
+    sct = Sct(tile_size=600000, workers=1)
+    points = tit.Points(lats, lons, elevs)
+    untiled = np.asarray(tit.sct(points, values, *sct.settings(), pos, neg, eps2)[0])
+    tiled = sct.tiled_sct(lons, lats, elevs, values, pos, neg, eps2)[0]
+    assert np.count_nonzero(untiled) > 0
+    assert np.mean(tiled == untiled) > 0.99
@@ -1,4 +1,5 @@
 """Test variable."""
+import numpy as np
 import pytest
 
 from pysurfex.datetime_utils import as_datetime, as_datetime_args, as_timedelta
@@ -243,6 +244,54 @@ def test_open_new_file_grib2(fixture):
             assert previous_filename == var_dict["blueprint_previous"][str(i)]
 
 
+@pytest.mark.parametrize("case", ["netcdf", "grib1", "grib2"])
+def test_schedule(fixture, case):
+    """Test that the precomputed schedule gives the same file names."""
+    initialtime = as_datetime_args(year=2019, month=11, day=13)
+    if case == "grib2":
+        initialtime = as_datetime_args(year=2019, month=11, day=13, hour=2)
+    intervall = 3600
+
+    var_dict = fixture[case]
+    validtimes = [initialtime + as_timedelta(seconds=intervall * i) for i in range(11)]
+    variable = Variable(case, var_dict, initialtime)
+    variable.set_schedule(validtimes)
+    assert len(variable.schedule) == 11
+    for i, validtime in enumerate(validtimes):
+        previoustime = validtime - as_timedelta(seconds=intervall)
+        filename = variable.get_filename(validtime)
+        previous_filename = variable.get_filename(validtime, previoustime=previoustime)
+        assert filename == var_dict["blueprint"][str(i)]
+        if i > 0:
+            assert previous_filename == var_dict["blueprint_previous"][str(i)]
+
+
+def test_deaccumulate_reuses_previous_read(fixture, monkeypatch, conf_proj_2x3):
+    """Test that the previous accumulated field is reused within a basetime."""
+    initialtime = as_datetime_args(year=2019, month=11, day=13)
+    var_dict = fixture["netcdf"]
+    var_dict.update({"accumulated": True, "offset": 0})
+    variable = Variable("netcdf", var_dict, initialtime)
+
+    reads = []
+
+    def read_var_points(var, geo, validtime, previoustime=None, cache=None):
+        basetime = variable.get_basetime(validtime)
+        if previoustime is not None:
+            validtime = previoustime
+        reads.append(validtime)
+        return np.full(geo.npoints, (validtime - basetime).total_seconds())
+
+    monkeypatch.setattr(variable, "read_var_points", read_var_points)
+    for i in range(1, 9):
+        validtime = initialtime + as_timedelta(seconds=3600 * i)
+        field = variable.read_variable(conf_proj_2x3, validtime)
+        assert np.all(field == 1.0)
+
+    # Previous field is only re-read for the first step and when basetime changes
+    assert len(reads) == 10
+
+
 def test_open_new_file_an(fixture):
     """Test to open a met nordic file."""
     initialtime = as_datetime_args(year=2019, month=11, day=13)